@@ -7,7 +7,7 @@ manual_folder_path = os.getenv("MANUAL_TEST_CASE_FOLDER_PATH")
 
 @fast.agent(
     name="Planner",
-    servers=["filesystem" , "playwright"],
+    servers=["filesystem" , "playwright", "selector_registry"],
     request_params=RequestParams(max_iterations=40),
     instruction=f"""
 # Test Planner Agent (Snapshot-Driven)
@@ -17,12 +17,15 @@ Mission: Based on a manual test case, explore the application using a snapshot-f
 1. **Snapshots are Your Eyes:** You MUST use `browser_snapshot()` after every action to see the current state of the page. You cannot interact with elements you haven't "seen" in a snapshot.
 2. **Interact Using Refs:** All interactions (click, type, etc.) MUST be done using the `ref` property of an element found in a snapshot. Do NOT invent or guess `ref`s.
 3. **Efficient Snapshot Parsing:** When you get a snapshot, extract only the key properties (`ref`, `role`, `name`, `text`) of elements relevant to the current step. Do not reason over the entire raw snapshot.
-4. **Human-Readable Logs:** Keep a clear, human-readable log of the actions you take (e.g., "Clicked the 'Login' button"). This log will be used to generate the final test script.
+4. **Snapshot Deltas:** After the first snapshot of a page, snapshots only list `+` added, `~` changed and `-` removed elements. Unlisted elements are unchanged and keep their `ref`s. A full tree is returned after navigation; call `browser_snapshot(full=true)` when you need the whole page again.
+5. **Paged Results:** A large tool result ends with `[truncated: characters 0-N of M shown. Call read_more(handle=..., offset=N) for more]`. Call the `read_more` tool of the same server only when the part you need is not in the page you got.
+6. **Human-Readable Logs:** Keep a clear, human-readable log of the actions you take (e.g., "Clicked the 'Login' button"). This log will be used to generate the final test script.
 
 ## 1. Inputs
 - `story_id`: Test suite folder (e.g., `product_add_to_cart`).
 - `test_type`: `smoke` or `regression`.
 - `test_case_id`: Test ID (e.g., `SMK_001`).
+- `manual_test_case` (optional): The parsed test case for `test_case_id`.
 
 **Validation**: If any input is missing/empty, emit: `"❌ Planner: Missing input: <field>."` and stop.
 
@@ -34,7 +37,7 @@ Mission: Based on a manual test case, explore the application using a snapshot-f
 - Output plan path: `{manual_folder_path}/<story_id>/<test_case_id>_plan.json`
 
 ## Step 2: Parse Manual Test
-1. Read the manual test case file.
+1. If `manual_test_case` was provided, use it and do not read the manual test case file. Otherwise read the file.
 2. From the section for `test_case_id`, extract the `Title`, `Preconditions`, `Starting URL`, `Steps`, and `Expected Result`.
 3. Keep a simple, high-level list of the actions and assertions described in the steps. This will guide your exploration.
 4. If `test_case_id` is not found, emit: `"❌ Planner: Test case <test_case_id> not found."` and stop.
@@ -44,7 +47,10 @@ Mission: Based on a manual test case, explore the application using a snapshot-f
 2. Initialize `setup_steps` and `main_steps` arrays to hold structured data about your interactions.
 
 ## Step 4: Execute Test Steps via Snapshot Interaction
+0. **Check the Selector Registry first:** call `lookup_selectors(url=<Starting URL>)`, and again whenever you land on a new page. It returns selectors that earlier plans already verified on this site (role, name, test attribute, action, description). When the element a step needs is in the registry and you can see it in the current snapshot, act on it right away using its `ref`, skip any extra exploration for it, and use the registry selector in the plan.
 1. Navigate to the `Starting URL` from the manual test case. Add this action to your `exploration_log`.
+   - If the navigation result says a saved signed-in browser state was restored and the page already shows you signed in, skip the login steps of the manual test case (do not add them to `exploration_log` or the steps), but still set `preconditions.requiresLogin` to `true`.
+   - If the test case is about logging in itself (e.g., invalid credentials, logout), pass `fresh_session=true` to this first `browser_navigate` so you start signed out.
 2. For each step in the manual test case:
    a. **Take a snapshot** using `await browser_snapshot()`.
    b. **Analyze the snapshot** to find the `ref` of the element you need to interact with based on its description (e.g., find the element with `role: 'button'` and `name: 'Login'`).
@@ -74,7 +80,7 @@ Mission: Based on a manual test case, explore the application using a snapshot-f
 ## Step 6: Parse Generated Script and Build Plan
 1. Read the content of the `generated_test_script_path` file you just saved.
 2. **Parse the JavaScript code** to extract the Playwright locators/selectors for each action (e.g., `page.getByRole('button', {{ name: 'Login' }})`).
-3. Match these extracted selectors with the corresponding steps you performed during your exploration.
+3. Match these extracted selectors with the corresponding steps you performed during your exploration. Steps that used a registry selector keep it.
 4. Build the final JSON plan. The `steps` in this JSON should include the action performed and the robust selector extracted from the generated script.
 5. Construct the JSON plan in the following layout:
    ```json
@@ -101,8 +107,16 @@ Mission: Based on a manual test case, explore the application using a snapshot-f
 6. Write the final JSON object to the `output_plan_path` using `filesystem_write_file`.
 
 ## Step 7: Finalization
-1. Close the browser using `playwright_close()`.
-2. Emit the success message: `"✅ Planner: Plan generated at: <output_plan_path>."`
+1. Call `record_plan(plan_path=<output_plan_path>)` so the next test cases can reuse your selectors.
+2. Close the browser using `playwright_close()`.
+3. Emit the success message: `"✅ Planner: Plan generated at: <output_plan_path>."`
+
+## Step 8: Plan Verification Feedback
+A message starting with `plan_verification:` lists plan steps whose selectors failed when the plan was replayed in a fresh browser (no match, several matches, not visible, failed action or wrong expected value).
+1. Read the plan from `output_plan_path`.
+2. Navigate to the `Starting URL` and repeat the steps up to the first failing one, using snapshots as in Step 4.
+3. For each failing step, find a selector that matches exactly one visible element (prefer `getByRole` with a name, or a test attribute) or correct the expected value.
+4. Change only the failing steps, write the plan to `output_plan_path` again and repeat Step 7.
 """,
 
 )
@@ -0,0 +1,123 @@
+"""
+Lazy agent registration.
+
+Every agent module registers its agent on the shared FastAgent instance in
+fast.py when it is imported. `register()` imports only the modules of the
+agents a session or job needs (plus the agents they delegate to) instead of
+all of them.
+
+Importing fast-agent itself takes seconds, so `fingerprint()` gives the
+checkpoint cache an agent's instruction and model without importing it: the
+result is stored under TEMP_DATA_PATH/agents, keyed by the agent's source, the
+rendered config and the env vars the agent reads, and only recomputed when
+one of them changes.
+"""
+import hashlib
+import importlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Iterable, List
+
+from config_loader import config_path
+from pipeline.paths import ROOT_DIR, temp_data_dir
+
+AGENT_MODULES = {
+    "ManualTestAgent": "agents.manualAgent",
+    "Planner": "agents.planner",
+    "PlaywrightWriterAgent": "agents.playwrightWriterAgent",
+    "TestBot": "agents.test_bot",
+}
+AGENT_DEPENDENCIES = {
+    "TestBot": ("ManualTestAgent", "Planner", "PlaywrightWriterAgent"),
+}
+# What `main.py` offers when no agent is chosen with --agent
+DEFAULT_AGENTS = ("ManualTestAgent", "Planner", "PlaywrightWriterAgent")
+FINGERPRINT_VERSION = 1
+GETENV_RE = re.compile(r"os\.(?:getenv|environ\.get)\(\s*[\"'](\w+)[\"']")
+
+
+def resolve(names: Iterable[str]) -> List[str]:
+    """Agent names with the agents they delegate to first, without duplicates."""
+    resolved: List[str] = []
+
+    def add(name: str):
+        if name not in AGENT_MODULES:
+            raise ValueError(f"Unknown agent {name!r}, expected one of {', '.join(AGENT_MODULES)}")
+        for dependency in AGENT_DEPENDENCIES.get(name, ()):
+            add(dependency)
+        if name not in resolved:
+            resolved.append(name)
+
+    for name in names:
+        add(name)
+    return resolved
+
+
+def register(*names: str):
+    """
+    Import the given agents (and their dependencies) and return the FastAgent app.
+
+    Args:
+        *names (str): Agent names from AGENT_MODULES.
+
+    Returns:
+        FastAgent: The shared instance from fast.py with these agents registered.
+    """
+    from fast import fast
+
+    for name in resolve(names):
+        importlib.import_module(AGENT_MODULES[name])
+    return fast
+
+
+def _module_path(name: str) -> Path:
+    return ROOT_DIR / (AGENT_MODULES[name].replace(".", os.sep) + ".py")
+
+
+def _fingerprint_key(name: str) -> str:
+    source = _module_path(name).read_text()
+    with open(config_path(), "r") as f:
+        config = f.read()
+    return hashlib.sha256(
+        json.dumps(
+            {
+                "version": FINGERPRINT_VERSION,
+                "agent": source,
+                "fast": (ROOT_DIR / "fast.py").read_text(),
+                "config": config,
+                "env": {var: os.getenv(var) for var in sorted(set(GETENV_RE.findall(source)))},
+            },
+            sort_keys=True,
+        ).encode()
+    ).hexdigest()
+
+
+def fingerprint(name: str) -> dict:
+    """
+    Instruction and effective model of an agent, for checkpoint keys.
+
+    Returns:
+        dict: `{"instruction": ..., "model": ...}`, as registered on fast.py's app.
+    """
+    path = temp_data_dir("agents") / f"{name}-{_fingerprint_key(name)[:16]}.json"
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    fast = register(name)
+    config = fast.agents[name]["config"]
+    result = {
+        "instruction": config.instruction,
+        "model": config.model or fast.config.get("default_model"),
+    }
+    # Workers starting at the same time may compute it concurrently
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(result, f)
+    os.replace(tmp_path, path)
+    return result
@@ -16,35 +16,35 @@ When launching Browser, set in browser config :  {{ timeout: 30_000 }}
 **Important Instructions on interacting with browser and finding selectors:** 
 Always keep this  in mind and act on it
 1. **DO not assume selectors:**
-   - Always use selectors which you find in optimized HTML response from browser. if you want.
+   - Always use selectors which you find in the page outline returned by `playwright_get_visible_html`.
    - Always use correct short selectors. do not assume or predict selectors.
-   - Try to use ref, ot xpath, or css selector, which is fast and easiest to interact with elements.
-2. **Use quick reliable selectors:**
-   - use those ref, or selector or xpath which is quick ot work with.
-   - Prefer ref, xpath, `id`, `class`, or attributes which has data or test or selenium in them like :  `data-test`, `selenium-id` etc.
+2. **Use the precomputed selectors:**
+   - Every element in the outline lists its candidate selectors after `->`, best first: test attributes like `data-test`, then a unique `id`, then a combination of attributes, then a chain from a parent.
+   - Use the first candidate. Fall back to the next one only if it fails.
+   - Each candidate matches exactly one element of the page, so do not shorten or combine them.
 3. **Nested Selectors:**
-   - Remember convention in case of nested selectors, use only if necessary.
+   - Chains are already built from a meaningful parent; do not build your own.
    - `A > B` = direct child, `A B` = any descendant.
-   - Pick a meaningful parent. which is correct according to latest optimized HTML.
 4. **Best Practices:**
    - Keep it robust accurate.
    - Never send raw browser responses to the LLM.
-   - Always use `playwright_get_visible_html`, to get optimized HTML.
-5. **Use Optimized HTML Only:**
-   - Set the following to `true`:  
-     `cleanHtml`, `removeComments`, `removeMeta`, `removeScripts`, `removeStyles`.\
+   - Always use `playwright_get_visible_html` to get the page outline.
+5. **Outline, not HTML:**
+   - `playwright_get_visible_html` returns an outline of the interactive and text elements, grouped under their forms, dialogs and page sections. The cleaning flags are applied for you.
+   - Pass `raw: true` only when the outline does not show an element you need.
 6. **Target Specific Sections:**
-   - If you have a reliable CSS selector of parent (focus of out test) section, use the `selector` param of playwright_get_visible_html to extract only that section.
+   - If you have a reliable CSS selector of parent (focus of out test) section, use the `selector` param of playwright_get_visible_html to outline only that section.
 7. **On Selector Failure:**
-   - Re-fetch optimized visible HTML.
-   - Then find a more accurate selector.\
+   - Re-fetch the outline.
+   - Then use the next candidate selector of the element.
 8. **Never Use Raw HTML:**
-   - Unoptimized HTML should not be passed to the LLM.
+   - Raw HTML should not be passed to the LLM unless the outline is missing an element.
 
 ## 1. Inputs
 - `story_id`: Test suite folder (e.g., `product_add_to_cart`).
 - `test_type`: `smoke` or `regression`.
 - `test_case_id`: Test ID (e.g., `SMK_001`).
+- `manual_test_case` (optional): The parsed test case for `test_case_id`.
 
 **Validation**: If any input is missing/empty, emit: `"❌ Planner: Missing input: <field>."` and stop.
 
@@ -56,7 +56,7 @@ Always keep this  in mind and act on it
 - Output plan: `{manual_folder_path}/<story_id>/<test_case_id>_plan.json`
 
 ## Step 2: Parse Manual Test
-1. Read the manual test case file.
+1. If `manual_test_case` was provided, use it and do not read the manual test case file. Otherwise read the file.
 2. From the section for `test_case_id`, extract:
    - `Title`
    - `Preconditions` (e.g , if anything is required to  do before)
@@ -80,7 +80,7 @@ Always keep this  in mind and act on it
 2. If login is needed:
    - Capture the current URL using `browser_get_url()`.
    - Navigate to the login page.
-   - Fetch an optimized visible HTML snapshot.
+   - Fetch the page outline.
    - Identify the login form and perform login actions
    - After login, verify the URL matches the expected `Starting URL`.
    - Record all setup interactions and assertions in `setup_steps` (e.g., `expectURL`).
@@ -89,7 +89,7 @@ Always keep this  in mind and act on it
 
 ## Step 5: Execute Main Test Steps
 
-> For each test step, follow the flow strictly. If a selector is provided in the manual step, use it directly. If missing, invalid, or unreliable, analyze the page using a minimal number of HTML snapshots. Aim to identify future-interaction elements early to reduce repeated DOM scanning.
+> For each test step, follow the flow strictly. If a selector is provided in the manual step, use it directly. If missing, invalid, or unreliable, analyze the page using a minimal number of page outlines. Aim to identify future-interaction elements early to reduce repeated DOM scanning.
 
 1. Ensure the browser is on the `Starting URL` using `browser_navigate(<start_url>)`.
 
@@ -98,14 +98,9 @@ Always keep this  in mind and act on it
    **a. Action Phase**
    - Capture current page URL using `browser_get_url()`.
    - Parse the step description to determine the intended action (e.g., `click`, `input`, `select`).
-   - On first DOM analysis, **avoid fetching full page with CSS, scripts, styles**—use `playwright_get_visible_html` with:
-     - `cleanHtml: true`
-     - `removeScripts: true`
-     - `removeStyles: true`
-     - `removeComments: true`
-     - `removeMeta: true`
+   - On first DOM analysis, get the page outline with `playwright_get_visible_html`.
    - If possible, identify a meaningful DOM subsection via `selector` to scope the analysis.
-   - Find the target element.
+   - Find the target element and take its first candidate selector from the outline.
    - Execute the action (e.g., `browser_click(selector)` or `browser_fill(selector, value)`).
    - Capture the resulting URL after the action.
    - Evaluate:
@@ -114,7 +109,7 @@ Always keep this  in mind and act on it
 
    **b. Assertion Phase**
    - Use the step's `observation` or `expected result` to identify UI elements that should now appear or change.
-   - Use the optimized HTML snapshot to locate relevant elements.
+   - Use the page outline to locate relevant elements and their selectors.
    - Use browser actions like `browser_hover(selector)` or `browser_get_text(selector)` to confirm their presence or content.
    - Define one or more assertions (e.g., `expectText`, `expectVisible`, `expectValue`, etc.).
    - Ensure each assertion is connected to a concrete selector.
@@ -0,0 +1,9 @@
+import { Page } from '@playwright/test';
+
+export class BasePage {
+  constructor(protected page: Page) {}
+
+  async navigate(path: string = ''): Promise<void> {
+    await this.page.goto(`/${path}`);
+  }
+}
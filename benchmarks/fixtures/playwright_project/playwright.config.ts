@@ -0,0 +1,9 @@
+import { defineConfig } from '@playwright/test';
+
+export default defineConfig({
+  testDir: './tests',
+  use: {
+    baseURL: process.env.BASE_URL || 'http://127.0.0.1:8765',
+    trace: 'on-first-retry',
+  },
+});
@@ -0,0 +1,14 @@
+import { test, expect } from '@playwright/test';
+import { LoginPage } from '../../../pages/auth/LoginPage';
+import * as users from '../../../data/users.json';
+
+test.describe('Auth: Login', () => {
+  test('SMK_000: Standard user can log in', async ({ page }) => {
+    const loginPage = new LoginPage(page);
+    await loginPage.navigate();
+    await test.step('Log in', async () => {
+      await loginPage.login(users.standard.username, users.standard.password);
+    });
+    await expect(page).toHaveURL(/inventory/);
+  });
+});
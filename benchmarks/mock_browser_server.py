@@ -0,0 +1,220 @@
+"""
+Stand-in for @playwright/mcp that "browses" the static demo app.
+
+Pages are fetched over HTTP from the demo app and turned into an
+accessibility snapshot in the same text layout @playwright/mcp uses (page URL,
+title and a ```yaml``` tree with `[ref=eN]` markers), so the real tool proxy
+and snapshot delta transform can sit in front of it. Clicking a link or a
+button with `data-goto` navigates, `data-toggle` renames a button, and
+`browser_type` stores the value shown next to the textbox.
+
+    python -m benchmarks.mock_browser_server
+"""
+import urllib.request
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
+from mcp.server.fastmcp import FastMCP
+
+VOID_TAGS = {"input", "br", "img", "meta", "link", "hr"}
+ROLES = {
+    "h1": "heading", "h2": "heading", "h3": "heading",
+    "a": "link", "button": "button", "p": "paragraph",
+    "ul": "list", "li": "listitem",
+}
+
+
+class Node:
+    def __init__(self, tag: str, attrs: Dict[str, str]):
+        self.tag = tag
+        self.attrs = attrs
+        self.children: List["Node"] = []
+        self.text = ""
+        self.ref: Optional[str] = None
+
+    @property
+    def role(self) -> Optional[str]:
+        if self.tag == "input":
+            return "button" if self.attrs.get("type") in ("submit", "button") else "textbox"
+        return ROLES.get(self.tag)
+
+    @property
+    def name(self) -> str:
+        if self.tag == "input":
+            return self.attrs.get("placeholder") or self.attrs.get("aria-label") or ""
+        return " ".join(self.text.split())
+
+    def selector(self) -> str:
+        if self.attrs.get("data-test"):
+            return f"page.locator('[data-test=\"{self.attrs['data-test']}\"]')"
+        return f"page.getByRole('{self.role}', {{ name: '{self.name}' }})"
+
+
+class PageParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.root = Node("body", {})
+        self.stack = [self.root]
+        self.title = ""
+        self.in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self.in_title = True
+            return
+        node = Node(tag, {key: value or "" for key, value in attrs})
+        self.stack[-1].children.append(node)
+        if tag not in VOID_TAGS:
+            self.stack.append(node)
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self.in_title = False
+            return
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tag == tag:
+                del self.stack[i:]
+                break
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.title += data.strip()
+        else:
+            # Text counts for the element and every ancestor (accessible name of a link, list item, ...)
+            for node in self.stack[1:]:
+                node.text += data
+
+
+class Browser:
+    def __init__(self):
+        self.url: Optional[str] = None
+        self.title = ""
+        self.root: Optional[Node] = None
+        self.refs: Dict[str, Node] = {}
+        self.values: Dict[str, str] = {}
+        self.actions: List[str] = []
+
+    def load(self, url: str) -> None:
+        with urllib.request.urlopen(url, timeout=10) as response:
+            html = response.read().decode("utf-8", errors="replace")
+        parser = PageParser()
+        parser.feed(html)
+        self.url, self.title, self.root = url, parser.title, parser.root
+        self.refs, self.values = {}, {}
+        counter = 0
+
+        def assign(node: Node):
+            nonlocal counter
+            if node.role:
+                counter += 1
+                node.ref = f"e{counter}"
+                self.refs[node.ref] = node
+            for child in node.children:
+                assign(child)
+
+        assign(self.root)
+
+    def tree(self) -> str:
+        lines: List[str] = []
+
+        def render(node: Node, depth: int):
+            indent = "  " * depth
+            if node.role:
+                label = f' "{node.name}"' if node.name and node.role not in ("paragraph", "list", "listitem") else ""
+                level = f" [level={node.tag[1]}]" if node.role == "heading" else ""
+                value = self.values.get(node.ref)
+                text = f": {value}" if value else ""
+                if node.role == "paragraph" and node.name:
+                    text = f": {node.name}"
+                has_children = any(child.role for child in node.children) or node.role == "link"
+                lines.append(f"{indent}- {node.role}{label}{level} [ref={node.ref}]{text}{':' if has_children and not text else ''}")
+                if node.role == "link":
+                    lines.append(f"{indent}  - /url: {node.attrs.get('href', '')}")
+                depth += 1
+            for child in node.children:
+                render(child, depth)
+
+        render(self.root, 0)
+        return "\n".join(lines)
+
+    def snapshot(self, code: str = "") -> str:
+        parts = []
+        if code:
+            parts.append(f"- Ran Playwright code:\n```js\n{code}\n```\n")
+        parts.append(f"- Page URL: {self.url}\n- Page Title: {self.title}\n- Page Snapshot\n```yaml\n{self.tree()}\n```")
+        return "\n".join(parts)
+
+    def element(self, ref: str) -> Node:
+        if self.root is None:
+            raise ValueError("No page is open. Call browser_navigate first.")
+        node = self.refs.get(ref)
+        if node is None:
+            raise ValueError(f"Ref {ref} not found in the current page snapshot. Try capturing new snapshot.")
+        return node
+
+
+browser = Browser()
+mcp = FastMCP("playwright")
+
+
+@mcp.tool()
+def browser_navigate(url: str) -> str:
+    """Navigate to a URL"""
+    browser.load(url)
+    browser.actions.append(f"await page.goto('{url}');")
+    return browser.snapshot(f"await page.goto('{url}');")
+
+
+@mcp.tool()
+def browser_snapshot() -> str:
+    """Capture accessibility snapshot of the current page, this is better than screenshot"""
+    if browser.root is None:
+        return "No open pages available. Use the \"browser_navigate\" tool to navigate to a page first."
+    return browser.snapshot()
+
+
+@mcp.tool()
+def browser_click(element: str, ref: str) -> str:
+    """Perform click on a web page"""
+    node = browser.element(ref)
+    code = f"await {node.selector()}.click();"
+    browser.actions.append(code)
+    target = node.attrs.get("href") if node.role == "link" else node.attrs.get("data-goto")
+    if target:
+        browser.load(urljoin(browser.url, target))
+    elif node.attrs.get("data-toggle"):
+        node.text, node.attrs["data-toggle"] = node.attrs["data-toggle"], node.name
+    return browser.snapshot(code)
+
+
+@mcp.tool()
+def browser_type(element: str, ref: str, text: str, submit: bool = False) -> str:
+    """Type text into editable element"""
+    node = browser.element(ref)
+    code = f"await {node.selector()}.fill('{text}');"
+    browser.actions.append(code)
+    browser.values[ref] = text
+    return browser.snapshot(code)
+
+
+@mcp.tool()
+def browser_generate_playwright_test(name: str, description: str, steps: List[str]) -> str:
+    """Generate a Playwright test for given scenario"""
+    body = "\n".join(f"  {action}" for action in browser.actions)
+    return (
+        "import { test, expect } from '@playwright/test';\n\n"
+        f"// {description}\n"
+        f"test('{name}', async ({{ page }}) => {{\n{body}\n}});\n"
+    )
+
+
+@mcp.tool()
+def browser_close() -> str:
+    """Close the page"""
+    browser.__init__()
+    return "No open pages available."
+
+
+if __name__ == "__main__":
+    mcp.run()
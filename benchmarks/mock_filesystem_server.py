@@ -0,0 +1,83 @@
+"""
+Local replacement for @modelcontextprotocol/server-filesystem.
+
+Exposes the tools the agents use under the same names, restricted to the
+folders given on the command line, without needing npx or the network.
+
+    python -m benchmarks.mock_filesystem_server <allowed_dir> [<allowed_dir> ...]
+"""
+import json
+import os
+import sys
+from typing import List, Union
+
+from mcp.server.fastmcp import FastMCP
+
+allowed_dirs = [os.path.realpath(path) for path in sys.argv[1:]]
+mcp = FastMCP("filesystem")
+
+
+def checked(path: str) -> str:
+    real_path = os.path.realpath(path)
+    if not any(real_path == root or real_path.startswith(root + os.sep) for root in allowed_dirs):
+        raise ValueError(f"Access denied - path outside allowed directories: {path}")
+    return real_path
+
+
+@mcp.tool()
+def read_file(path: str) -> str:
+    """Read the complete contents of a file from the file system."""
+    with open(checked(path), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@mcp.tool()
+def read_multiple_files(paths: List[str]) -> str:
+    """Read the contents of multiple files simultaneously."""
+    parts = []
+    for path in paths:
+        try:
+            parts.append(f"{path}:\n{read_file(path)}\n")
+        except (OSError, ValueError) as exc:
+            parts.append(f"{path}: Error - {exc}")
+    return "\n---\n".join(parts)
+
+
+@mcp.tool()
+def write_file(path: str, content: Union[str, dict, list]) -> str:
+    """Create a new file or completely overwrite an existing file with new content."""
+    # FastMCP pre-parses string arguments that look like JSON (plan.json, data files)
+    if not isinstance(content, str):
+        content = json.dumps(content, indent=2)
+    real_path = checked(path)
+    os.makedirs(os.path.dirname(real_path), exist_ok=True)
+    with open(real_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return f"Successfully wrote to {path}"
+
+
+@mcp.tool()
+def create_directory(path: str) -> str:
+    """Create a new directory or ensure a directory exists."""
+    os.makedirs(checked(path), exist_ok=True)
+    return f"Successfully created directory {path}"
+
+
+@mcp.tool()
+def list_directory(path: str) -> str:
+    """Get a detailed listing of all files and directories in a specified path."""
+    real_path = checked(path)
+    return "\n".join(
+        f"[{'DIR' if os.path.isdir(os.path.join(real_path, name)) else 'FILE'}] {name}"
+        for name in sorted(os.listdir(real_path))
+    )
+
+
+@mcp.tool()
+def list_allowed_directories() -> str:
+    """Returns the list of directories that this server is allowed to access."""
+    return "Allowed directories:\n" + "\n".join(allowed_dirs)
+
+
+if __name__ == "__main__":
+    mcp.run()
@@ -0,0 +1,154 @@
+"""
+Scripted OpenAI-compatible chat completions endpoint for the benchmarks.
+
+fast-agent's `generic` provider is pointed at this server. Before each stage
+the runner loads the stage's scripted turns with `ScriptedModel.load`, and
+every completion request receives the next turn: tool calls (named as
+fast-agent exposes them, `<server>-<tool>`) or a final text reply. Along the
+way it measures what a real model would have received and produced:
+requests, bytes and tokens in and out, tool calls, tool result bytes, failed
+tool calls and the largest prompt.
+"""
+import json
+import threading
+import time
+import uuid
+from typing import List, Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+def _tokenizer():
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return "cl100k_base", lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception:  # tiktoken missing or its BPE file cannot be downloaded offline
+        return "chars/4", lambda text: (len(text) + 3) // 4
+
+
+TOKENIZER, count_tokens = _tokenizer()
+
+
+def message_text(message: dict) -> str:
+    content = message.get("content")
+    if isinstance(content, list):
+        content = "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    text = content or ""
+    for call in message.get("tool_calls") or []:
+        function = call.get("function", {})
+        text += function.get("name", "") + function.get("arguments", "")
+    return text
+
+
+def empty_stats(stage: Optional[str]) -> dict:
+    return {
+        "stage": stage,
+        "requests": 0,
+        "tool_calls": 0,
+        "bytes_in": 0,
+        "bytes_out": 0,
+        "tokens_in": 0,
+        "tokens_out": 0,
+        "tool_result_bytes": 0,
+        "tool_errors": 0,
+        "system_prompt_tokens": 0,
+        "tools_schema_bytes": 0,
+        "max_prompt_tokens": 0,
+        "unknown_tools": [],
+        "script_exhausted": False,
+    }
+
+
+class ScriptedModel:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stage: Optional[str] = None
+        self.turns: List[dict] = []
+        self.position = 0
+        self.stats = empty_stats(None)
+
+    def load(self, stage: str, turns: List[dict]) -> None:
+        with self.lock:
+            self.stage, self.turns, self.position = stage, turns, 0
+            self.stats = empty_stats(stage)
+
+    def complete(self, body: bytes) -> dict:
+        request = json.loads(body)
+        messages = request.get("messages", [])
+        tools = request.get("tools") or []
+        tool_names = {tool.get("function", {}).get("name") for tool in tools}
+
+        with self.lock:
+            stats = self.stats
+            stats["requests"] += 1
+            stats["bytes_in"] += len(body)
+            prompt_tokens = sum(count_tokens(message_text(m)) for m in messages)
+            prompt_tokens += count_tokens(json.dumps(tools)) if tools else 0
+            stats["tokens_in"] += prompt_tokens
+            stats["max_prompt_tokens"] = max(stats["max_prompt_tokens"], prompt_tokens)
+            if stats["requests"] == 1:
+                system = next((m for m in messages if m.get("role") == "system"), None)
+                stats["system_prompt_tokens"] = count_tokens(message_text(system)) if system else 0
+                stats["tools_schema_bytes"] = len(json.dumps(tools))
+            # Tool results appended since the previous assistant turn
+            for message in reversed(messages):
+                if message.get("role") != "tool":
+                    break
+                result = message_text(message)
+                stats["tool_result_bytes"] += len(result.encode())
+                stats["tool_errors"] += result.startswith(("Error", "Failed to call"))
+
+            if self.position < len(self.turns):
+                turn = self.turns[self.position]
+                self.position += 1
+            else:
+                stats["script_exhausted"] = True
+                turn = {"content": f"✅ {self.stage}: script finished."}
+
+            message = {"role": "assistant", "content": turn.get("content")}
+            calls = turn.get("tools") or ([turn] if "tool" in turn else [])
+            if calls:
+                message["tool_calls"] = []
+                for call in calls:
+                    if call["tool"] not in tool_names and call["tool"] not in stats["unknown_tools"]:
+                        stats["unknown_tools"].append(call["tool"])
+                    message["tool_calls"].append(
+                        {
+                            "id": f"call_{uuid.uuid4().hex[:12]}",
+                            "type": "function",
+                            "function": {"name": call["tool"], "arguments": json.dumps(call.get("arguments", {}))},
+                        }
+                    )
+                stats["tool_calls"] += len(calls)
+            completion_tokens = count_tokens(message_text(message))
+            stats["tokens_out"] += completion_tokens
+
+        response = {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "testpilot-mock"),
+            "choices": [
+                {"index": 0, "message": message, "finish_reason": "tool_calls" if calls else "stop"}
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+        with self.lock:
+            stats["bytes_out"] += len(json.dumps(response))
+        return response
+
+
+def build_app(model: ScriptedModel) -> Starlette:
+    async def completions(request: Request):
+        return JSONResponse(model.complete(await request.body()))
+
+    return Starlette(routes=[Route("/v1/chat/completions", completions, methods=["POST"])])
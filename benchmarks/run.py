@@ -0,0 +1,436 @@
+"""
+Offline end-to-end benchmark of ManualTestAgent -> Planner -> PlaywrightWriterAgent.
+
+The real agent definitions and the real MCP servers of this repo
+(tool proxy with snapshot deltas, project index, selector registry) are
+exercised against local stand-ins only:
+
+- a scripted OpenAI-compatible model (benchmarks/mock_llm.py) behind the
+  `generic` provider,
+- the static demo shop in benchmarks/demo_app, served over HTTP,
+- a mock Playwright MCP server browsing that app and a mock filesystem server,
+- a copy of the Playwright project in benchmarks/fixtures/playwright_project.
+
+Every stage runs in its own process (benchmarks/stage_runner.py). The report
+contains per-stage wall time, tool calls, bytes and tokens in and out, and
+peak RSS. It is written as JSON, so two runs can be compared with
+`--compare`. Token and byte counts are deterministic for a given scenario, so
+prompt growth or extra orchestration turns show up as diffs.
+
+Usage:
+    python -m benchmarks.run [--scenario demo_shop] [--cases 3] [--output report.json]
+                             [--compare baseline.json] [--threshold 0.1] [--keep-workspace]
+"""
+import argparse
+import functools
+import http.server
+import json
+import os
+import platform
+import shutil
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+import uvicorn
+import yaml
+
+from benchmarks.mock_llm import TOKENIZER, ScriptedModel, build_app
+from pipeline.case_worker import RESULT_PREFIX
+from pipeline.manual_cases import ManualCaseIndex
+from pipeline.paths import ROOT_DIR, temp_data_dir
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+MOCK_MODEL = "generic.testpilot-mock"
+PRODUCTS = [("Backpack", "backpack", "e7"), ("Bike Light", "bike-light", "e11"), ("T-Shirt", "t-shirt", "e15")]
+SUMMED = ("wall_s", "startup_s", "send_s", "requests", "tool_calls", "bytes_in", "bytes_out",
+          "tokens_in", "tokens_out", "tool_result_bytes", "tool_errors")
+MAXED = ("peak_rss_mb", "children_peak_rss_mb", "max_prompt_tokens", "system_prompt_tokens", "tools_schema_bytes")
+# Metrics that do not depend on machine load; only these fail a comparison
+DETERMINISTIC = ("requests", "tool_calls", "tool_errors", "bytes_in", "tokens_in", "tokens_out", "tool_result_bytes",
+                 "max_prompt_tokens", "system_prompt_tokens", "tools_schema_bytes")
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_demo_app() -> socketserver.TCPServer:
+    handler = functools.partial(QuietHandler, directory=os.path.join(BENCH_DIR, "demo_app"))
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def serve_mock_llm(model: ScriptedModel, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(build_app(model), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.monotonic() + 10
+    while not server.started and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return server
+
+
+def fill(value, variables: Dict[str, str]):
+    """Replace `{{name}}` placeholders in every string of a scenario structure."""
+    if isinstance(value, str):
+        for name, replacement in variables.items():
+            value = value.replace("{{" + name + "}}", replacement)
+        return value
+    if isinstance(value, list):
+        return [fill(item, variables) for item in value]
+    if isinstance(value, dict):
+        return {key: fill(item, variables) for key, item in value.items()}
+    return value
+
+
+def build_cases(count: int, app: str) -> List[dict]:
+    cases = []
+    for number in range(1, count + 1):
+        product, slug, ref = PRODUCTS[(number - 1) % len(PRODUCTS)]
+        cases.append(
+            {
+                "case_id": f"SMK_{number:03d}",
+                "title": f"Add {product} to cart",
+                "product": product,
+                "slug": slug,
+                "product_ref": ref,
+                "app": app,
+            }
+        )
+    return cases
+
+
+def smoke_markdown(cases: List[dict]) -> str:
+    sections = ["# Smoke Test Cases\n"]
+    for case in cases:
+        sections.append(
+            f"### ID: {case['case_id']}\n"
+            f"**Title:** {case['title']}\n"
+            f"**Preconditions:** User is on the login page {case['app']}/index.html\n"
+            "**Steps:**\n"
+            "1. Type 'standard_user' into the 'Username' field.\n"
+            "2. Type 'secret_sauce' into the 'Password' field.\n"
+            "3. Click the 'Login' button.\n"
+            f"4. Click 'Add to cart' for '{case['product']}'.\n"
+            f"**Expected Result:** The button for '{case['product']}' changes to 'Remove'.\n"
+        )
+    return "\n---\n\n".join(sections)
+
+
+def regression_markdown(cases: List[dict]) -> str:
+    rows = ["| ID | Title | Preconditions | Steps | Expected Result | Dependencies |", "|---|---|---|---|---|---|"]
+    for case in cases:
+        rows.append(
+            f"| REG_{case['case_id'][4:]} | Remove {case['product']} from cart | Initial URL: {case['app']}/index.html "
+            f"| 1. Log in. <br> 2. Add '{case['product']}' to the cart. <br> 3. Click 'Remove'. "
+            "| The button changes back to 'Add to cart'. | Username: standard_user |"
+        )
+    return "\n".join(rows) + "\n"
+
+
+def case_plan(case: dict, story_id: str) -> dict:
+    return {
+        "storyId": story_id,
+        "testCaseId": case["case_id"],
+        "title": case["title"],
+        "description": f"Log in and add {case['product']} to the cart.",
+        "preconditions": {"requiresLogin": False, "manualPreconditions": []},
+        "startUrl": f"{case['app']}/index.html",
+        "setupSteps": [],
+        "steps": [
+            {"action": "fill", "selector": "page.locator('[data-test=\"username\"]')", "value": "standard_user",
+             "description": "Type the username"},
+            {"action": "fill", "selector": "page.locator('[data-test=\"password\"]')", "value": "secret_sauce",
+             "description": "Type the password"},
+            {"action": "click", "selector": "page.locator('[data-test=\"login-button\"]')",
+             "description": "Click the 'Login' button", "url": f"{case['app']}/index.html"},
+            {"action": "click", "selector": f"page.locator('[data-test=\"add-to-cart-{case['slug']}\"]')",
+             "description": f"Add {case['product']} to the cart", "url": f"{case['app']}/inventory.html",
+             "assertions": [{"action": "assertText", "expected": "Remove",
+                             "selector": f"page.locator('[data-test=\"add-to-cart-{case['slug']}\"]')"}]},
+        ],
+    }
+
+
+def writer_files(plan: dict, project: str) -> Dict[str, str]:
+    """What a good writer produces for the plan, rendered by the template generator."""
+    from pipeline.project_index import ProjectIndex
+    from pipeline.template_codegen import TemplateCodegen
+
+    index = ProjectIndex(project)
+    index.refresh()
+    result = TemplateCodegen(plan, "smoke", index).generate()
+    data_path = next(path for path in result.files if path.startswith("data"))
+    po_path = next(path for path in result.files if path.startswith("pages"))
+    return {
+        "data_path": data_path,
+        "po_path": po_path,
+        "spec_path": result.spec_path,
+        "data_content": result.files[data_path],
+        "po_content": result.files[po_path],
+        "spec_content": result.files[result.spec_path],
+    }
+
+
+def render_config(workspace: str, llm_port: int, env: Dict[str, str]) -> None:
+    with open(os.path.join(ROOT_DIR, "config.yaml"), "r") as f:
+        template = f.read()
+    saved = dict(os.environ)
+    os.environ.update(env)
+    try:
+        servers = yaml.safe_load(os.path.expandvars(template))["mcp"]["servers"]
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+
+    python, root = sys.executable, str(ROOT_DIR)
+    servers["playwright"] = {
+        "command": python,
+        "cwd": root,
+        "args": ["-m", "mcp_servers.tool_proxy", "--snapshot-delta", "--", python, "-m", "benchmarks.mock_browser_server"],
+    }
+    servers["filesystem"] = {
+        "command": python,
+        "cwd": root,
+        "args": ["-m", "benchmarks.mock_filesystem_server", env["MANUAL_TEST_CASE_FOLDER_PATH"], env["PLAYWRIGHT_PROJECT_PATH"]],
+    }
+    config = {
+        "generic": {"base_url": f"http://127.0.0.1:{llm_port}/v1"},
+        "default_model": MOCK_MODEL,
+        "logger": {
+            "type": "file",
+            "path": os.path.join(workspace, "fastagent.jsonl"),
+            "progress_display": False,
+            "show_chat": False,
+            "show_tools": False,
+        },
+        "mcp": {"servers": servers},
+    }
+    with open(os.path.join(workspace, "fastagent.config.yaml"), "w") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+
+
+def run_stage(model: ScriptedModel, stage: str, spec: dict, variables: Dict[str, str],
+              workspace: str, env: Dict[str, str]) -> dict:
+    model.load(stage, fill(spec["turns"], variables))
+    job = {"agent": stage, "message": fill(spec["message"], variables), "model": MOCK_MODEL}
+    started_at = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-m", "benchmarks.stage_runner"],
+        cwd=workspace,
+        env=env,
+        input=json.dumps(job).encode(),
+        capture_output=True,
+    )
+    elapsed = time.perf_counter() - started_at
+    result = {"status": "failed", "error": f"stage runner exited with code {process.returncode} without a result"}
+    for line in reversed(process.stdout.decode(errors="replace").splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            result = json.loads(line[len(RESULT_PREFIX):])
+            break
+    if result["status"] != "passed":
+        with open(os.path.join(workspace, f"{stage}.stderr.log"), "ab") as f:
+            f.write(process.stderr)
+    with model.lock:
+        stats = dict(model.stats)
+    # A scripted run that drifted from the real tools still "succeeds"; count it as a failure
+    if result["status"] == "passed" and (stats["tool_errors"] or stats["unknown_tools"]):
+        result = {**result, "status": "failed", "error": f"{stats['tool_errors']} tool errors, unknown tools {stats['unknown_tools']}"}
+    return {"stage": stage, "case_id": variables.get("case_id"), "process_s": round(elapsed, 3), **result, **stats}
+
+
+def summarize(runs: List[dict]) -> Dict[str, dict]:
+    stages: Dict[str, dict] = {}
+    for run in runs:
+        summary = stages.setdefault(run["stage"], {"runs": 0, "failed": 0, **{k: 0 for k in SUMMED + MAXED}})
+        summary["runs"] += 1
+        summary["failed"] += run.get("status") != "passed"
+        for key in SUMMED:
+            summary[key] = round(summary[key] + (run.get(key) or 0), 3)
+        for key in MAXED:
+            summary[key] = max(summary[key], run.get(key) or 0)
+    for summary in stages.values():
+        summary["wall_s_per_run"] = round(summary["wall_s"] / summary["runs"], 3)
+    return stages
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> List[str]:
+    """Print a per-stage diff against a baseline report and return regressions."""
+    regressions = []
+    print(f"\nCompared with {baseline.get('created_at')} ({baseline.get('git_commit') or 'unknown commit'}):")
+    for stage, summary in report["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if not previous:
+            print(f"  {stage}: no baseline")
+            continue
+        for key in DETERMINISTIC + ("wall_s_per_run", "peak_rss_mb"):
+            old, new = previous.get(key), summary.get(key)
+            if not old or new is None or old == new:
+                continue
+            change = (new - old) / old
+            flag = ""
+            if key in DETERMINISTIC and change > threshold:
+                flag = "  <-- regression"
+                regressions.append(f"{stage}.{key}")
+            print(f"  {stage}.{key}: {old} -> {new} ({change:+.1%}){flag}")
+    return regressions
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_report(report: dict) -> str:
+    headers = ["Stage", "Runs", "Wall (s)", "Tool calls", "Requests", "Tokens in", "Tokens out", "Bytes in", "Peak RSS (MB)"]
+    rows = [
+        [stage, str(s["runs"]), f"{s['wall_s']:.2f}", str(s["tool_calls"]), str(s["requests"]), str(s["tokens_in"]),
+         str(s["tokens_out"]), str(s["bytes_in"]), f"{s['peak_rss_mb']} + {s['children_peak_rss_mb']}"]
+        for stage, s in report["stages"].items()
+    ]
+    widths = [max(len(row[i]) for row in [headers] + rows) for i in range(len(headers))]
+    lines = [" | ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in [headers] + rows]
+    lines.insert(1, "-+-".join("-" * width for width in widths))
+    return "\n".join(lines)
+
+
+def run_benchmark(scenario_name: str, case_count: int, keep_workspace: bool = False) -> dict:
+    with open(os.path.join(BENCH_DIR, "scenarios", f"{scenario_name}.json"), "r") as f:
+        scenario = json.load(f)
+    story_id = scenario["story_id"]
+
+    workspace = tempfile.mkdtemp(prefix="testpilot-bench-")
+    manual = os.path.join(workspace, "manual")
+    project = os.path.join(workspace, "project")
+    os.makedirs(manual)
+    shutil.copytree(os.path.join(BENCH_DIR, "fixtures", "playwright_project"), project)
+
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(ROOT_DIR),
+        "MANUAL_TEST_CASE_FOLDER_PATH": manual,
+        "PLAYWRIGHT_PROJECT_PATH": project,
+        "TEMP_DATA_PATH": os.path.join(workspace, "tmp"),
+        "TESTPILOT_PYTHON": sys.executable,
+        "TESTPILOT_ROOT": str(ROOT_DIR),
+        "MCP_SUPERVISOR": "off",
+        "TESTPILOT_TRACE_PATH": os.path.join(workspace, "fastagent.jsonl"),
+        "TESTPILOT_CONFIG_PATH": os.path.join(workspace, "fastagent.config.yaml"),
+    }
+    # The runner itself parses manual cases and indexes the project like the case worker does
+    saved_temp_data_path = os.environ.get("TEMP_DATA_PATH")
+    os.environ["TEMP_DATA_PATH"] = env["TEMP_DATA_PATH"]
+
+    demo_app = serve_demo_app()
+    app = f"http://127.0.0.1:{demo_app.server_address[1]}"
+    model = ScriptedModel()
+    llm_port = free_port()
+    llm = serve_mock_llm(model, llm_port)
+    render_config(workspace, llm_port, env)
+
+    cases = build_cases(case_count, app)
+    base = {
+        "app": app, "manual": manual, "project": project, "story": story_id,
+        "user_story": scenario["user_story"],
+        "smoke_md": smoke_markdown(cases), "regression_md": regression_markdown(cases),
+    }
+    runs = []
+    started_at = time.perf_counter()
+    try:
+        for stage, spec in scenario["stages"].items():
+            if not spec.get("per_case"):
+                runs.append(run_stage(model, stage, spec, base, workspace, env))
+                print(f"{stage}: {runs[-1]['status']} in {runs[-1]['process_s']}s", flush=True)
+                continue
+            for case in cases:
+                plan = case_plan(case, story_id)
+                manual_case = ManualCaseIndex().get(
+                    os.path.join(manual, story_id, "smoke_test_cases.md"), case["case_id"]
+                )
+                variables = {
+                    **base,
+                    **{key: value for key, value in case.items() if isinstance(value, str)},
+                    "case_message": manual_case.as_message() if manual_case else "",
+                    "plan_path": os.path.join(manual, story_id, f"{case['case_id']}_plan.json"),
+                    "script_path": os.path.join(manual, story_id, f"{case['case_id']}_generated_test.js"),
+                    "script": "import { test } from '@playwright/test';\n// recorded by the mock browser\n",
+                    "plan_json": json.dumps(plan, indent=2),
+                }
+                if stage == "PlaywrightWriterAgent":
+                    variables.update(writer_files(plan, project))
+                runs.append(run_stage(model, stage, spec, variables, workspace, env))
+                print(f"{stage} {case['case_id']}: {runs[-1]['status']} in {runs[-1]['process_s']}s", flush=True)
+    finally:
+        if saved_temp_data_path is None:
+            os.environ.pop("TEMP_DATA_PATH", None)
+        else:
+            os.environ["TEMP_DATA_PATH"] = saved_temp_data_path
+        llm.should_exit = True
+        demo_app.shutdown()
+        if not keep_workspace:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    return {
+        "scenario": scenario_name,
+        "cases": case_count,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "tokenizer": TOKENIZER,
+        "total_wall_s": round(time.perf_counter() - started_at, 3),
+        "workspace": workspace if keep_workspace else None,
+        "stages": summarize(runs),
+        "runs": runs,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark of the TestPilot agent pipeline.")
+    parser.add_argument("--scenario", default="demo_shop", help="Name of a file in benchmarks/scenarios.")
+    parser.add_argument("--cases", type=int, default=3, help="Number of test cases in the generated story.")
+    parser.add_argument("--output", help="Report path (default: TEMP_DATA_PATH/benchmarks/<scenario>-<time>.json).")
+    parser.add_argument("--compare", help="Baseline report to diff against.")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Allowed growth of deterministic metrics.")
+    parser.add_argument("--keep-workspace", action="store_true", help="Keep the generated files for inspection.")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.scenario, args.cases, args.keep_workspace)
+    output = args.output or str(
+        temp_data_dir("benchmarks") / f"{args.scenario}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print()
+    print(format_report(report))
+    print(f"\nReport written to {output}")
+    failed = sum(run.get("status") != "passed" for run in report["runs"])
+    if args.compare:
+        with open(args.compare, "r") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} metrics grew by more than {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
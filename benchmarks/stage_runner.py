@@ -0,0 +1,70 @@
+"""
+Run one real agent for the benchmark in its own process.
+
+Started by `benchmarks.run` with the benchmark workspace as working
+directory and TESTPILOT_CONFIG_PATH pointing at the workspace's
+fastagent.config.yaml. The job is read as JSON from stdin:
+
+    {"agent": "Planner", "message": "...", "model": "generic.testpilot-mock"}
+
+and the outcome (reply, wall time, peak RSS) is printed as one JSON line
+prefixed with RESULT_PREFIX, like the case worker does. Timing spans go to
+the workspace's fastagent.jsonl.
+"""
+import asyncio
+import json
+import resource
+import sys
+import time
+
+from agents import registry
+from pipeline import completion_cache, history_compaction, model_router, tracing
+from pipeline.case_worker import RESULT_PREFIX
+
+
+def peak_rss_mb(who: int) -> float:
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+async def run_stage(job: dict) -> dict:
+    fast = registry.register(job["agent"])
+
+    # Decorator models win over the config default, so point every agent at the mock
+    for agent in fast.agents.values():
+        agent["config"].model = job["model"]
+
+    started_at = time.perf_counter()
+    async with fast.run() as app:
+        ready_at = time.perf_counter()
+        with tracing.span("stage", job["agent"]):
+            reply = await app[job["agent"]].send(job["message"])
+        replied_at = time.perf_counter()
+    return {
+        "status": "passed" if "✅" in reply and "❌" not in reply else "failed",
+        "reply": reply[-500:],
+        "wall_s": round(time.perf_counter() - started_at, 3),
+        "startup_s": round(ready_at - started_at, 3),
+        "send_s": round(replied_at - ready_at, 3),
+    }
+
+
+def main():
+    job = json.loads(sys.stdin.read())
+    completion_cache.install()
+    tracing.instrument()
+    model_router.install()
+    history_compaction.install()
+    try:
+        result = asyncio.run(run_stage(job))
+    except (Exception, SystemExit) as exc:  # fast-agent exits on config errors
+        result = {"status": "failed", "error": f"{type(exc).__name__}: {exc}"}
+    result["peak_rss_mb"] = peak_rss_mb(resource.RUSAGE_SELF)
+    result["children_peak_rss_mb"] = peak_rss_mb(resource.RUSAGE_CHILDREN)
+    print(RESULT_PREFIX + json.dumps(result), flush=True)
+    sys.exit(0 if result["status"] == "passed" else 1)
+
+
+if __name__ == "__main__":
+    main()
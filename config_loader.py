@@ -1,19 +1,127 @@
+import hashlib
+import json
 import os
+import re
+import sys
+import tempfile
+import time
 import yaml
+from pathlib import Path
 from dotenv import load_dotenv
+from pipeline.mcp_supervisor import running_servers
 
 load_dotenv()
 
+ROOT_DIR = Path(__file__).resolve().parent
+# Kept below the project root: fast-agent looks for fastagent.secrets.yaml
+# in the folders above the config file
+CONFIG_CACHE_DIR = ROOT_DIR / ".testpilot" / "config"
+ENV_VAR_RE = re.compile(r"\$\{?(\w+)")
+RENDER_VERSION = 1
+# Renderings nobody has used for this long are removed
+STALE_AFTER_S = 7 * 24 * 3600
+HEADLESS_LOGGER = {"progress_display": False, "show_chat": False, "show_tools": False}
+
+
+def headless_mode() -> bool:
+    return os.getenv("TESTPILOT_HEADLESS", "0").lower() not in ("0", "false", "off", "no")
+
+
+def load_and_create_config(input_path=str(ROOT_DIR / "config.yaml"), output_path=None):
+    """
+    Render config.yaml into a fast-agent config file.
+
+    Env vars are expanded and the servers of a running MCP supervisor are
+    swapped in. With TESTPILOT_HEADLESS set (the bulk and headless runners set
+    it for their workers) the console's progress display, chat and tool
+    rendering are switched off, since nobody watches a worker log live.
+    Without `output_path` the result goes to a file named after the hash of
+    everything it depends on (config.yaml, the values of the env vars it
+    references and the supervised servers), and an existing file with that
+    name is reused without rendering again. Processes with different env vars
+    get different files, and files are written atomically, so any number of
+    TestPilot processes can render and read configs at once.
+
+    Args:
+        input_path (str): The config template.
+        output_path (Optional[str]): Fixed file to write instead of the cache.
+
+    Returns:
+        str: Path of the rendered config.
+    """
+    # config.yaml starts the project's own MCP helpers (mcp_servers/) with this interpreter
+    os.environ.setdefault("TESTPILOT_PYTHON", sys.executable)
+    os.environ.setdefault("TESTPILOT_ROOT", str(ROOT_DIR))
+    # MCP servers only inherit the env vars listed in config.yaml, so make sure this one is set
+    os.environ.setdefault("TEMP_DATA_PATH", str(ROOT_DIR / ".testpilot"))
 
-def load_and_create_config(
-    input_path="config.yaml", output_path="fastagent.config.yaml"
-):
     with open(input_path, "r") as f:
         raw_yaml = f.read()
 
+    # Use the warm servers of a running MCP supervisor instead of npx cold starts
+    supervised = running_servers()
+    headless = headless_mode()
+
+    if output_path is None:
+        key = hashlib.sha256(
+            json.dumps(
+                {
+                    "version": RENDER_VERSION,
+                    "config": raw_yaml,
+                    "env": {name: os.getenv(name) for name in sorted(set(ENV_VAR_RE.findall(raw_yaml)))},
+                    "supervised": supervised,
+                    "headless": headless,
+                },
+                sort_keys=True,
+            ).encode()
+        ).hexdigest()
+        CONFIG_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        output_path = str(CONFIG_CACHE_DIR / f"fastagent.config.{key[:16]}.yaml")
+        try:
+            os.utime(output_path)  # marks it as in use for prune_configs()
+            return output_path
+        except OSError:
+            prune_configs()
+
     expanded_yaml = os.path.expandvars(raw_yaml)
 
-    with open(output_path, "w") as f:
+    if supervised or headless:
+        config = yaml.safe_load(expanded_yaml)
+        config["mcp"]["servers"].update(supervised)
+        if headless:
+            config["logger"] = {**(config.get("logger") or {}), **HEADLESS_LOGGER}
+        expanded_yaml = yaml.safe_dump(config, sort_keys=False)
+
+    # A reader never sees a half-written file: it either finds the old one or the complete new one
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_path)), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
         f.write(expanded_yaml)
+    os.replace(tmp_path, output_path)
 
     return output_path
+
+
+def prune_configs(max_age_s: float = STALE_AFTER_S) -> None:
+    cutoff = time.time() - max_age_s
+    for path in CONFIG_CACHE_DIR.iterdir():
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            pass
+
+
+def config_path() -> str:
+    """
+    The fast-agent config of this run.
+
+    TESTPILOT_CONFIG_PATH wins when set; otherwise config.yaml is rendered (or
+    its cached rendering reused) and the path is exported in
+    TESTPILOT_CONFIG_PATH, so worker processes started from here use the same
+    file without expanding config.yaml again.
+    """
+    path = os.getenv("TESTPILOT_CONFIG_PATH")
+    if not path:
+        path = load_and_create_config()
+        os.environ["TESTPILOT_CONFIG_PATH"] = path
+    return path
@@ -1,2 +1,3 @@
 from mcp_agent.core.fastagent import FastAgent
-fast = FastAgent("LocalOllamaAgent")
+from config_loader import config_path
+fast = FastAgent("LocalOllamaAgent", config_path=config_path())
@@ -1,29 +1,35 @@
-import os
-import atexit
+import sys
+import argparse
 import asyncio
-import yaml
-import time
-from config_loader import load_and_create_config
 from logs_loader import ensure_logs_file
 
-ensure_logs_file()
-config_path = load_and_create_config()
+# `main.py run <manifest>` executes a jobs manifest headlessly instead of the interactive session
+if __name__ == "__main__" and sys.argv[1:2] == ["run"]:
+    from pipeline.batch_runner import main as run_manifest
 
-from fast import fast
-from agents import manualAgent, playwrightWriterAgent , planner
+    sys.exit(run_manifest(sys.argv[2:]))
 
+ensure_logs_file()
 
-def cleanup():
-    if os.path.exists(config_path):
-        os.remove(config_path)
+# fast-agent's own --agent flag; when given, only that agent (and the agents it uses) is registered
+parser = argparse.ArgumentParser(add_help=False)
+parser.add_argument("--agent", default="default")
+agent_name = parser.parse_known_args()[0].agent
 
+from agents.registry import DEFAULT_AGENTS, register
+from pipeline import completion_cache, history_compaction, model_router, rate_limiter, tracing
 
-atexit.register(cleanup)
+fast = register(*(DEFAULT_AGENTS if agent_name == "default" else [agent_name]))
+rate_limiter.install()
+completion_cache.install()
+tracing.instrument()
+model_router.install()
+history_compaction.install()
 
 
 async def main():
     async with fast.run() as agent:
-        await agent.interactive()
+        await agent.interactive(agent=None if agent_name == "default" else agent_name)
 
 
 if __name__ == "__main__":
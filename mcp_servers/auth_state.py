@@ -0,0 +1,180 @@
+"""
+Signed-in browser state transform for the Playwright MCP server.
+
+Enabled with the tool proxy's `--auth-state` flag. For a stdio upstream the
+proxy adds `--storage-state <session file>` to the @playwright/mcp command;
+the isolated browser reads that file when it creates its context, on the first
+navigation. Before that navigation is forwarded, this transform writes the
+saved state of the target origin (pipeline/auth_state.py) into the session
+file and tells the agent that it starts signed in. Stories about logging in
+itself pass `fresh_session=true` to `browser_navigate` to start signed out.
+
+A login is recognised by text typed into a password field. Once the form is
+submitted (`submit=true`, or the next click or key press) the browser's
+storage state is read and saved for the origin the session started on, and it
+is saved again before the browser is closed. When the agent has to log in
+although a saved state was loaded, that state no longer works: it is dropped
+and replaced by the one captured after the new login.
+
+A supervised Playwright server (`--upstream-url`) is shared, so it cannot get a
+storage state file per session; there the transform only captures.
+"""
+import atexit
+import json
+import os
+import re
+import time
+from typing import List, Optional
+
+import mcp.types as types
+
+from mcp_servers.tool_proxy import CallNext, ToolTransform
+from pipeline.auth_state import EMPTY_STATE, RESTORED_NOTE, AuthStateStore, origin_of, write_json
+from pipeline.paths import temp_data_dir
+
+PASSWORD_RE = re.compile(r"pass(word|code|phrase)?\b|\bpin\b", re.IGNORECASE)
+SUBMIT_TOOLS = {"browser_click", "browser_press_key"}
+# Tools that do not open the browser context
+NO_CONTEXT_TOOLS = {"browser_install", "browser_close"}
+
+# Full storage state, HttpOnly cookies included (newer @playwright/mcp versions)
+RUN_CODE_TOOL = "browser_run_code"
+RUN_CODE = "async (page) => await page.context().storageState()"
+# Fallback: what page scripts can see, i.e. localStorage and non-HttpOnly cookies
+EVALUATE_TOOL = "browser_evaluate"
+EVALUATE = (
+    "() => ({origin: location.origin, hostname: location.hostname, cookie: document.cookie, "
+    "localStorage: Object.entries(localStorage)})"
+)
+
+
+def session_state_file() -> str:
+    """A storage state file for the browser of this proxy process, removed when it exits."""
+    path = str(temp_data_dir("auth", "sessions") / f"{os.getpid()}.json")
+    write_json(path, EMPTY_STATE)
+    atexit.register(lambda: os.path.exists(path) and os.remove(path))
+    return path
+
+
+def result_value(result: types.CallToolResult):
+    """The JSON value @playwright/mcp reports in a `Result` section."""
+    text = "\n".join(item.text for item in result.content if isinstance(item, types.TextContent))
+    start = text.find("Result")
+    for opener in ("{", '"'):
+        index = text.find(opener, max(start, 0))
+        if index < 0:
+            continue
+        try:
+            value, _ = json.JSONDecoder().raw_decode(text[index:])
+        except ValueError:
+            continue
+        return json.loads(value) if isinstance(value, str) else value
+    return None
+
+
+def page_state(page: dict) -> dict:
+    """Storage state from what a page script can read."""
+    cookies = []
+    for pair in filter(None, (page.get("cookie") or "").split("; ")):
+        name, _, value = pair.partition("=")
+        cookies.append({
+            "name": name, "value": value, "domain": page["hostname"], "path": "/", "expires": -1,
+            "httpOnly": False, "secure": page["origin"].startswith("https:"), "sameSite": "Lax",
+        })
+    local_storage = [{"name": name, "value": value} for name, value in page.get("localStorage") or []]
+    return {"cookies": cookies, "origins": [{"origin": page["origin"], "localStorage": local_storage}]}
+
+
+class AuthState(ToolTransform):
+    def __init__(self, session_file: Optional[str], store: Optional[AuthStateStore] = None):
+        self.session_file = session_file
+        self.store = store or AuthStateStore()
+        self.tools = set()
+        self.browser_open = False
+        self.origin: Optional[str] = None
+        self.restored = False
+        self.login_pending = False
+        self.logged_in = False
+
+    def list_tools(self, tools: List[types.Tool]) -> List[types.Tool]:
+        self.tools = {tool.name for tool in tools}
+        if not self.session_file:
+            return tools
+        updated = []
+        for tool in tools:
+            if tool.name == "browser_navigate":
+                schema = dict(tool.inputSchema or {"type": "object"})
+                schema["properties"] = {
+                    **schema.get("properties", {}),
+                    "fresh_session": {
+                        "type": "boolean",
+                        "description": "Start signed out instead of restoring the saved login of this site, "
+                        "e.g. to test logging in itself. Only applies to the first navigation.",
+                    },
+                }
+                tool = tool.model_copy(update={"inputSchema": schema})
+            updated.append(tool)
+        return updated
+
+    async def call_tool(self, name: str, arguments: dict, call_next: CallNext) -> types.CallToolResult:
+        note = None
+        fresh_session = bool(arguments.pop("fresh_session", False)) if name == "browser_navigate" else False
+        if name == "browser_navigate" and not self.browser_open:
+            self.origin = origin_of(arguments.get("url", ""))
+            note = self.restore(None if fresh_session else self.origin)
+        elif name == "browser_close" and self.logged_in:
+            await self.capture(call_next)
+
+        result = await call_next(name, arguments)
+        if name == "browser_close":
+            self.browser_open = self.restored = self.login_pending = self.logged_in = False
+            return result
+        self.browser_open = self.browser_open or name not in NO_CONTEXT_TOOLS
+        if result.isError:
+            return result
+
+        if name == "browser_type" and PASSWORD_RE.search(arguments.get("element") or ""):
+            if self.restored:
+                # The saved state did not keep the session signed in
+                self.store.drop(self.origin)
+                self.restored = False
+            self.login_pending = True
+            if arguments.get("submit"):
+                await self.capture(call_next)
+        elif self.login_pending and name in SUBMIT_TOOLS:
+            await self.capture(call_next)
+
+        if note:
+            result = result.model_copy(update={"content": [types.TextContent(type="text", text=note), *result.content]})
+        return result
+
+    def restore(self, origin: Optional[str]) -> Optional[str]:
+        if not self.session_file:
+            return None
+        entry = self.store.load(origin) if origin else None
+        write_json(self.session_file, entry["state"] if entry else EMPTY_STATE)
+        if entry is None:
+            return None
+        self.restored = True
+        age_min = (time.time() - entry["captured_at"]) / 60
+        return (
+            f"{RESTORED_NOTE} saved for {origin} {age_min:.0f} min ago. "
+            "If the page already shows you signed in, skip the login steps."
+        )
+
+    async def capture(self, call_next: CallNext) -> None:
+        self.login_pending = False
+        self.logged_in = True
+        if not self.origin:
+            return
+        state = None
+        try:
+            if RUN_CODE_TOOL in self.tools:
+                state = result_value(await call_next(RUN_CODE_TOOL, {"code": RUN_CODE}))
+            elif EVALUATE_TOOL in self.tools:
+                page = result_value(await call_next(EVALUATE_TOOL, {"function": EVALUATE}))
+                state = page_state(page) if isinstance(page, dict) and "origin" in page else None
+        except Exception:  # a failed capture must not fail the agent's action
+            state = None
+        if isinstance(state, dict) and "cookies" in state:
+            self.store.save(self.origin, state)
@@ -0,0 +1,96 @@
+"""
+HTML outline transform for the mcp-playwright server (`playwright_e`).
+
+`playwright_get_visible_html` returns the page's HTML, which is large even
+with all of its cleaning flags set. With the tool proxy's `--html-outline`
+flag its result is replaced by the page outline of pipeline/html_outline.py:
+the interactive and text elements only, each with ranked candidate
+selectors. The agent passes `raw=true` to get the HTML instead.
+
+The outline needs the whole document, so the cleaning flags the server
+supports default to true and its length limit is lifted. The page URL is
+read with `playwright_evaluate` when the server has it, otherwise the last
+`playwright_navigate` URL is used.
+"""
+import re
+from typing import List, Optional
+
+import mcp.types as types
+
+from mcp_servers.tool_proxy import CallNext, ToolTransform
+from pipeline.html_outline import OutlineCache
+
+HTML_TOOL = "playwright_get_visible_html"
+NAVIGATE_TOOL = "playwright_navigate"
+EVALUATE_TOOL = "playwright_evaluate"
+CLEANING_FLAGS = ("removeScripts", "removeComments", "removeStyles", "removeMeta")
+MAX_LENGTH = 5_000_000
+
+URL_RE = re.compile(r"https?://[^\s\"'<>]+")
+
+
+class HtmlOutline(ToolTransform):
+    def __init__(self, cache: Optional[OutlineCache] = None):
+        self.cache = cache or OutlineCache()
+        self.parameters = set()
+        self.tools = set()
+        self.url: Optional[str] = None
+
+    def list_tools(self, tools: List[types.Tool]) -> List[types.Tool]:
+        self.tools = {tool.name for tool in tools}
+        updated = []
+        for tool in tools:
+            if tool.name == HTML_TOOL:
+                schema = dict(tool.inputSchema or {"type": "object"})
+                self.parameters = set(schema.get("properties", {}))
+                schema["properties"] = {
+                    **schema.get("properties", {}),
+                    "raw": {
+                        "type": "boolean",
+                        "description": "Return the HTML itself instead of the outline of its elements.",
+                    },
+                }
+                tool = tool.model_copy(
+                    update={
+                        "inputSchema": schema,
+                        "description": "Get an outline of the visible page: its interactive and text elements, each"
+                        " with ready-to-use selectors (best first). Pass `selector` to outline one section only,"
+                        " raw=true for the HTML.",
+                    }
+                )
+            updated.append(tool)
+        return updated
+
+    async def call_tool(self, name: str, arguments: dict, call_next: CallNext) -> types.CallToolResult:
+        if name == NAVIGATE_TOOL and arguments.get("url"):
+            self.url = arguments["url"]
+        if name != HTML_TOOL or arguments.pop("raw", False):
+            return await call_next(name, arguments)
+
+        for flag in CLEANING_FLAGS:
+            if flag in self.parameters:
+                arguments.setdefault(flag, True)
+        if "maxLength" in self.parameters:
+            arguments["maxLength"] = MAX_LENGTH
+        result = await call_next(name, arguments)
+        if result.isError:
+            return result
+
+        text = "\n".join(item.text for item in result.content if isinstance(item, types.TextContent))
+        start = text.find("<")
+        if start < 0:
+            return result
+        outline = self.cache.outline(text[start:], await self.page_url(call_next), arguments.get("selector"))
+        return result.model_copy(update={"content": [types.TextContent(type="text", text=outline)]})
+
+    async def page_url(self, call_next: CallNext) -> Optional[str]:
+        if EVALUATE_TOOL in self.tools:
+            try:
+                result = await call_next(EVALUATE_TOOL, {"script": "location.href"})
+            except Exception:  # the outline does not depend on it
+                return self.url
+            text = "\n".join(item.text for item in result.content if isinstance(item, types.TextContent))
+            match = None if result.isError else URL_RE.search(text[max(text.find("Result"), 0):])
+            if match:
+                self.url = match.group(0)
+        return self.url
@@ -0,0 +1,57 @@
+"""
+MCP server answering questions about the Playwright project from the index.
+
+    python -m mcp_servers.project_index_server <playwright_project_path>
+
+Every tool call first refreshes the index by mtime, so answers always reflect
+files written earlier in the same session.
+"""
+import json
+import sys
+
+from mcp.server.fastmcp import FastMCP
+
+import config_loader  # noqa: F401  (loads .env)
+from pipeline.project_index import ProjectIndex
+
+mcp = FastMCP("project_index")
+index = ProjectIndex(sys.argv[1] if len(sys.argv) > 1 else None)
+
+
+@mcp.tool()
+def project_summary() -> str:
+    """baseURL, page objects (locators and method names), utilities, fixtures, data files and tests of the Playwright project."""
+    index.refresh()
+    return index.summary()
+
+
+@mcp.tool()
+def get_page_object(name: str) -> str:
+    """Full details of one page object class: file, base class, readonly locators with selectors and method signatures."""
+    index.refresh()
+    page_object = index.page_objects().get(name)
+    if page_object is None:
+        return f"No page object named '{name}'. Known: {', '.join(index.page_objects()) or 'none'}."
+    return json.dumps(page_object, indent=2)
+
+
+@mcp.tool()
+def search_project(query: str) -> str:
+    """Find page objects, locators, methods, utilities, fixtures, tests and data files whose name or selector contains `query`."""
+    index.refresh()
+    hits = index.search(query)
+    return "\n".join(hits) if hits else f"No matches for '{query}'."
+
+
+@mcp.tool()
+def get_data_shape(path: str) -> str:
+    """Keys and value types of a data file, e.g. `data/users.json` (relative to the project root)."""
+    index.refresh()
+    entry = index.data["files"].get(path)
+    if entry is None or entry["kind"] != "data":
+        return f"No data file '{path}'. Known: {', '.join(index.files('data')) or 'none'}."
+    return json.dumps(entry.get("shape"), indent=2)
+
+
+if __name__ == "__main__":
+    mcp.run()
@@ -0,0 +1,60 @@
+"""
+Paged result transform for any MCP server behind the tool proxy.
+
+With the tool proxy's `--paged-results` flag every tool result is capped by
+pipeline/result_pages.py: the agent gets the first page and a note with a
+handle, and the full text stays on disk. The transform adds a `read_more`
+tool that returns the next page of a handle, so a turn never carries more
+than one page of a result however large the page or file is. Images and other
+non-text content are passed through.
+
+It sees the results of the other transforms (snapshot deltas, outlines), so
+it always runs last, whatever the order of the flags.
+"""
+from typing import List, Optional
+
+import mcp.types as types
+
+from mcp_servers.tool_proxy import CallNext, ToolTransform, text_result
+from pipeline.result_pages import ResultPages
+
+READ_MORE_TOOL = "read_more"
+
+
+class PagedResults(ToolTransform):
+    def __init__(self, pages: Optional[ResultPages] = None):
+        self.pages = pages or ResultPages()
+
+    def list_tools(self, tools: List[types.Tool]) -> List[types.Tool]:
+        read_more = types.Tool(
+            name=READ_MORE_TOOL,
+            description="Read the next page of a tool result that was truncated. Pass the handle and offset"
+            " given in its [truncated: ...] note.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "handle": {"type": "string", "description": "Handle from the truncation note."},
+                    "offset": {"type": "integer", "description": "Character offset to continue from."},
+                },
+                "required": ["handle", "offset"],
+            },
+        )
+        return [tool for tool in tools if tool.name != READ_MORE_TOOL] + [read_more]
+
+    async def call_tool(self, name: str, arguments: dict, call_next: CallNext) -> types.CallToolResult:
+        if name == READ_MORE_TOOL:
+            page = self.pages.read_more(str(arguments.get("handle", "")), int(arguments.get("offset") or 0))
+            if page is None:
+                return text_result(
+                    f"Unknown or expired handle {arguments.get('handle')!r}; call the original tool again.",
+                    is_error=True,
+                )
+            return text_result(page.render())
+
+        result = await call_next(name, arguments)
+        texts = [item.text for item in result.content if isinstance(item, types.TextContent)]
+        page = self.pages.page("\n".join(texts), tool=name)
+        if page.complete:
+            return result
+        others = [item for item in result.content if not isinstance(item, types.TextContent)]
+        return result.model_copy(update={"content": [types.TextContent(type="text", text=page.render()), *others]})
@@ -0,0 +1,43 @@
+"""
+MCP server for the cross-test selector registry.
+
+    python -m mcp_servers.selector_registry_server
+"""
+import json
+
+from mcp.server.fastmcp import FastMCP
+
+import config_loader  # noqa: F401  (loads .env)
+from pipeline.selector_registry import SelectorRegistry, format_rows
+
+mcp = FastMCP("selector_registry")
+registry = SelectorRegistry()
+
+
+@mcp.tool()
+def lookup_selectors(url: str, role: str = "", name: str = "") -> str:
+    """Selectors that earlier plans used on this page (and elsewhere on the same site), optionally filtered by ARIA role and by name/description text."""
+    rows = registry.lookup(url, role=role or None, name=name or None)
+    return format_rows(rows) if rows else "No known selectors for this page yet."
+
+
+@mcp.tool()
+def record_selector(url: str, selector: str, action: str = "", description: str = "") -> str:
+    """Remember a selector that worked on this page, e.g. `page.getByRole('button', { name: 'Login' })`."""
+    registry.record(url, selector, action=action or None, description=description or None)
+    return "Recorded."
+
+
+@mcp.tool()
+def record_plan(plan_path: str) -> str:
+    """Remember every selector of a finished plan.json in one call."""
+    try:
+        with open(plan_path, "r") as f:
+            plan = json.load(f)
+    except (OSError, ValueError) as exc:
+        return f"Could not read plan: {exc}"
+    return f"Recorded {registry.ingest_plan(plan)} selectors."
+
+
+if __name__ == "__main__":
+    mcp.run()
@@ -0,0 +1,162 @@
+"""
+Snapshot delta transform for the Playwright MCP server.
+
+@playwright/mcp returns the whole accessibility tree from `browser_snapshot`
+and appends it to the result of every action. Most of that tree is identical
+from one step to the next, so after the first snapshot of a page this
+transform only returns the nodes that were added, removed or changed (keyed
+by element ref). A full tree is sent again after navigation, when the URL
+changes, or when the agent calls `browser_snapshot(full=true)`.
+"""
+import re
+from typing import Dict, List, Optional
+
+import mcp.types as types
+
+from mcp_servers.tool_proxy import CallNext, ToolTransform
+
+SNAPSHOT_TOOL = "browser_snapshot"
+NAVIGATION_TOOLS = {
+    "browser_navigate",
+    "browser_navigate_back",
+    "browser_navigate_forward",
+    "browser_tab_new",
+    "browser_tab_select",
+    "browser_tab_close",
+}
+
+# A delta that touches more than this share of the tree is not worth it
+MAX_DELTA_RATIO = 0.6
+
+SNAPSHOT_BLOCK_RE = re.compile(r"(- Page Snapshot:?\s*\n```yaml\n)(.*?)(\n```)", re.DOTALL)
+PAGE_URL_RE = re.compile(r"^- Page URL: (.*)$", re.MULTILINE)
+REF_RE = re.compile(r"\[ref=([^\]]+)\]")
+SNAPSHOT_PREFIX_RE = re.compile(r"^(s\d+)e\d+$")
+
+
+def parse_nodes(tree: str) -> Dict[str, str]:
+    """
+    Map each element ref to its line in the snapshot tree.
+
+    Ref-less lines (`- /url: ...`, `- text: ...`) are folded into their
+    closest ref-carrying ancestor, so a text change shows up as a change of
+    that element.
+    """
+    nodes: Dict[str, str] = {}
+    stack = []  # (indent, ref)
+    for line in tree.splitlines():
+        content = line.strip()
+        if not content:
+            continue
+        indent = len(line) - len(line.lstrip())
+        while stack and stack[-1][0] >= indent:
+            stack.pop()
+        ref = REF_RE.search(content)
+        if ref:
+            nodes[ref.group(1)] = content
+            stack.append((indent, ref.group(1)))
+        elif stack:
+            nodes[stack[-1][1]] += " | " + content.lstrip("- ")
+        else:
+            nodes[f"line:{content}"] = content
+    return nodes
+
+
+def ref_prefix(nodes: Dict[str, str]) -> Optional[str]:
+    """Older @playwright/mcp versions prefix refs per snapshot (`s3e12`)."""
+    for ref in nodes:
+        match = SNAPSHOT_PREFIX_RE.match(ref)
+        if match:
+            return match.group(1)
+    return None
+
+
+def render_delta(previous: Dict[str, str], current: Dict[str, str]) -> List[str]:
+    def item(content: str) -> str:
+        return content[2:] if content.startswith("- ") else content
+
+    lines = []
+    for ref, content in current.items():
+        if ref not in previous:
+            lines.append(f"+ {item(content)}")
+        elif previous[ref] != content:
+            lines.append(f"~ {item(content)}")
+    for ref, content in previous.items():
+        if ref not in current:
+            lines.append(f"- {item(content.split(' | ')[0])}")
+    return lines
+
+
+class SnapshotDelta(ToolTransform):
+    def __init__(self):
+        self.previous_nodes: Optional[Dict[str, str]] = None
+        self.previous_url: Optional[str] = None
+
+    def list_tools(self, tools: List[types.Tool]) -> List[types.Tool]:
+        updated = []
+        for tool in tools:
+            if tool.name == SNAPSHOT_TOOL:
+                schema = dict(tool.inputSchema or {"type": "object"})
+                schema["properties"] = {
+                    **schema.get("properties", {}),
+                    "full": {
+                        "type": "boolean",
+                        "description": "Return the whole accessibility tree instead of the changes since the last snapshot.",
+                    },
+                }
+                tool = tool.model_copy(
+                    update={
+                        "inputSchema": schema,
+                        "description": (tool.description or "")
+                        + " Returns only added (+), changed (~) and removed (-) elements since the previous"
+                        " snapshot of the same page; pass full=true for the whole tree.",
+                    }
+                )
+            updated.append(tool)
+        return updated
+
+    async def call_tool(self, name: str, arguments: dict, call_next: CallNext) -> types.CallToolResult:
+        force_full = name in NAVIGATION_TOOLS
+        if name == SNAPSHOT_TOOL:
+            force_full = bool(arguments.pop("full", False))
+
+        result = await call_next(name, arguments)
+        if result.isError:
+            return result
+
+        content = []
+        for item in result.content:
+            if isinstance(item, types.TextContent):
+                item = item.model_copy(update={"text": self.rewrite(item.text, force_full)})
+            content.append(item)
+        return result.model_copy(update={"content": content})
+
+    def rewrite(self, text: str, force_full: bool) -> str:
+        block = SNAPSHOT_BLOCK_RE.search(text)
+        if not block:
+            return text
+
+        url_match = PAGE_URL_RE.search(text)
+        url = url_match.group(1).strip() if url_match else None
+        nodes = parse_nodes(block.group(2))
+        previous, previous_url = self.previous_nodes, self.previous_url
+        self.previous_nodes, self.previous_url = nodes, url
+
+        if (
+            force_full
+            or previous is None
+            or url != previous_url
+            or ref_prefix(nodes) != ref_prefix(previous)
+        ):
+            return text
+
+        delta = render_delta(previous, nodes)
+        if len(delta) > MAX_DELTA_RATIO * max(len(nodes), 1):
+            return text
+
+        summary = (
+            f"- Page Snapshot delta ({len(delta)} of {len(nodes)} elements changed since the previous snapshot;"
+            " + added, ~ changed, - removed; call browser_snapshot(full=true) for the whole tree)\n```yaml\n"
+        )
+        body = "\n".join(delta) if delta else "# no changes"
+        return text[:block.start()] + summary + body + text[block.start(3):]
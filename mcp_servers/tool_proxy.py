@@ -0,0 +1,212 @@
+"""
+MCP proxy between fast-agent and an upstream MCP server.
+
+    python -m mcp_servers.tool_proxy [--snapshot-delta] [--auth-state] -- npx @playwright/mcp@latest --isolated
+    python -m mcp_servers.tool_proxy --html-outline -- npx -y @executeautomation/playwright-mcp-server
+    python -m mcp_servers.tool_proxy --port 8932 --snapshot-delta --upstream-url http://127.0.0.1:8931/sse
+    python -m mcp_servers.tool_proxy --paged-results -- npx -y @modelcontextprotocol/server-filesystem ./tests
+
+The upstream is either the command after `--` (stdio) or `--upstream-url`
+(SSE). The proxy serves stdio by default, or SSE on `--port`; in SSE mode a
+stdio upstream is started once and shared by all clients, while a URL
+upstream gets its own session per client. Tools are listed and forwarded
+unchanged, except where an enabled transform rewrites a tool's schema or
+result. Transforms are chained in the order of their flags, except that
+`--paged-results` always pages the final result, and every client session
+gets fresh transform instances.
+"""
+import argparse
+import asyncio
+import contextlib
+import functools
+import os
+import sys
+from typing import Awaitable, Callable, List
+
+import mcp.types as types
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client
+from mcp.server.lowlevel import Server
+from mcp.server.stdio import stdio_server
+
+CallNext = Callable[[str, dict], Awaitable[types.CallToolResult]]
+
+# Upstream SSE sessions live as long as the agent session, which can idle for a while
+UPSTREAM_SSE_READ_TIMEOUT = 60 * 60
+
+
+class ToolTransform:
+    """Base class for proxy transforms. Override only what you need."""
+
+    def list_tools(self, tools: List[types.Tool]) -> List[types.Tool]:
+        return tools
+
+    async def call_tool(self, name: str, arguments: dict, call_next: CallNext) -> types.CallToolResult:
+        return await call_next(name, arguments)
+
+
+def text_result(text: str, is_error: bool = False) -> types.CallToolResult:
+    return types.CallToolResult(content=[types.TextContent(type="text", text=text)], isError=is_error)
+
+
+def build_transforms(args) -> List[ToolTransform]:
+    transforms = []
+    if args.snapshot_delta:
+        from mcp_servers.snapshot_delta import SnapshotDelta
+
+        transforms.append(SnapshotDelta())
+    if args.auth_state:
+        from mcp_servers.auth_state import AuthState
+
+        transforms.append(AuthState(args.session_state))
+    if args.html_outline:
+        from mcp_servers.html_outline import HtmlOutline
+
+        transforms.append(HtmlOutline())
+    if args.paged_results:
+        from mcp_servers.result_pages import PagedResults
+
+        # First in the chain, so it sees the results of all other transforms
+        transforms.insert(0, PagedResults())
+    return transforms
+
+
+@contextlib.asynccontextmanager
+async def upstream_session(args):
+    async with contextlib.AsyncExitStack() as stack:
+        if args.upstream_url:
+            read, write = await stack.enter_async_context(
+                sse_client(args.upstream_url, sse_read_timeout=UPSTREAM_SSE_READ_TIMEOUT)
+            )
+        else:
+            storage_state = ["--storage-state", args.session_state] if args.session_state else []
+            params = StdioServerParameters(
+                command=args.upstream[0],
+                args=args.upstream[1:] + storage_state,
+                env=dict(os.environ),
+            )
+            read, write = await stack.enter_async_context(stdio_client(params))
+        session = await stack.enter_async_context(ClientSession(read, write))
+        await session.initialize()
+        yield session
+
+
+def build_server(upstream: ClientSession, transforms: List[ToolTransform], name: str) -> Server:
+    async def forward(tool_name: str, arguments: dict) -> types.CallToolResult:
+        return await upstream.call_tool(tool_name, arguments)
+
+    call = forward
+    for transform in reversed(transforms):
+        call = functools.partial(transform.call_tool, call_next=call)
+
+    async def list_tools(_request: types.ListToolsRequest) -> types.ServerResult:
+        tools = (await upstream.list_tools()).tools
+        for transform in transforms:
+            tools = transform.list_tools(tools)
+        return types.ServerResult(types.ListToolsResult(tools=tools))
+
+    async def call_tool(request: types.CallToolRequest) -> types.ServerResult:
+        try:
+            result = await call(request.params.name, dict(request.params.arguments or {}))
+        except Exception as exc:
+            result = text_result(f"{type(exc).__name__}: {exc}", is_error=True)
+        return types.ServerResult(result)
+
+    # Registered directly (not via @server.call_tool) so upstream isError flags survive
+    server = Server(name)
+    server.request_handlers[types.ListToolsRequest] = list_tools
+    server.request_handlers[types.CallToolRequest] = call_tool
+    return server
+
+
+async def serve_stdio(args) -> None:
+    async with upstream_session(args) as upstream:
+        server = build_server(upstream, build_transforms(args), args.name)
+        async with stdio_server() as (read, write):
+            await server.run(read, write, server.create_initialization_options())
+
+
+async def serve_sse(args) -> None:
+    import uvicorn
+    from mcp.server.sse import SseServerTransport
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, Response
+    from starlette.routing import Mount, Route
+
+    sse = SseServerTransport("/messages/")
+
+    async with contextlib.AsyncExitStack() as stack:
+        # A stdio upstream is started once up front, so clients find it warm
+        shared = None if args.upstream_url else await stack.enter_async_context(upstream_session(args))
+
+        async def handle_sse(request):
+            async with contextlib.AsyncExitStack() as session_stack:
+                upstream = shared or await session_stack.enter_async_context(upstream_session(args))
+                server = build_server(upstream, build_transforms(args), args.name)
+                async with sse.connect_sse(request.scope, request.receive, request._send) as (read, write):
+                    await server.run(read, write, server.create_initialization_options())
+            return Response()
+
+        async def health(_request):
+            return JSONResponse({"status": "ok", "name": args.name})
+
+        app = Starlette(
+            routes=[
+                Route("/sse", endpoint=handle_sse),
+                Route("/health", endpoint=health),
+                Mount("/messages/", app=sse.handle_post_message),
+            ]
+        )
+        config = uvicorn.Config(app, host=args.host, port=args.port, log_level="warning")
+        await uvicorn.Server(config).serve()
+
+
+def parse_args(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    split = argv.index("--") if "--" in argv else len(argv)
+    parser = argparse.ArgumentParser(description="MCP proxy with tool result transforms.")
+    parser.add_argument("--name", default="tool-proxy")
+    parser.add_argument("--upstream-url", help="SSE URL of the upstream server instead of a command.")
+    parser.add_argument("--port", type=int, help="Serve SSE on this port instead of stdio.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument(
+        "--snapshot-delta",
+        action="store_true",
+        help="Return only changed accessibility-tree nodes from Playwright snapshots.",
+    )
+    parser.add_argument(
+        "--auth-state",
+        action="store_true",
+        help="Save the Playwright storage state after logins and restore it per origin (pipeline/auth_state.py).",
+    )
+    parser.add_argument(
+        "--html-outline",
+        action="store_true",
+        help="Return an outline with ranked selectors instead of playwright_get_visible_html's HTML.",
+    )
+    parser.add_argument(
+        "--paged-results",
+        action="store_true",
+        help="Cap tool results at RESULT_PAGE_CHARS and add a read_more tool for the rest (pipeline/result_pages.py).",
+    )
+    args = parser.parse_args(argv[:split])
+    args.upstream = argv[split + 1:]
+    if not args.upstream and not args.upstream_url:
+        parser.error("an upstream command after '--' or --upstream-url is required")
+    # Only a browser this proxy starts itself can be given a storage state file
+    args.session_state = None
+    if args.auth_state and not args.upstream_url and not args.port:
+        from mcp_servers.auth_state import session_state_file
+
+        args.session_state = session_state_file()
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    asyncio.run(serve_sse(args) if args.port else serve_stdio(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Ordered hooks on fast-agent's agent, LLM and MCP tool entry points.
+
+Tracing, model routing, the completion cache, rate limiting, metering and
+history compaction all act on the same three places: `BaseAgent.generate`,
+the provider request (the executor for the OpenAI-compatible and Anthropic
+providers, the google-genai client for the native Google provider) and
+`MCPAggregator.call_tool`. This module patches them once and runs the hooks
+that features register for each point in a fixed order, whatever order the
+features are installed in, and keeps the agent invocation that is running in
+a context variable (`current()`), so LLM and tool hooks know their agent.
+
+A hook has `before` and `after` callbacks, or an `around` coroutine for a
+feature that has to wrap the call (a span, a retry loop, an answer from the
+cache). Lower orders run first on the way in and last on the way out:
+
+    COMPACTION   shrink the history before the request is metered, traced or cached
+    METERING     check budgets before the request and count its usage after it
+    ROUTING      pick the model, so spans and cache keys show the routed one
+    TRACING      time the request, including the wait for a rate limit slot
+    CACHE        answer a recorded request without waiting for a slot
+    RATE_LIMIT   wait for the provider's slot, retry after rate limits
+
+Provider errors of LLM requests are set on `LLMRequest.error` rather than
+raised, as the executor reports them, so `after` callbacks see failed
+requests too. Errors of agents and tool calls, and errors raised by hooks,
+propagate.
+"""
+import contextvars
+import functools
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+COMPACTION = 10
+METERING = 20
+ROUTING = 30
+TRACING = 40
+CACHE = 50
+RATE_LIMIT = 60
+
+POINTS = ("agent", "llm", "tool")
+
+_current: contextvars.ContextVar = contextvars.ContextVar("testpilot_agent", default=None)
+_hooks: Dict[str, List["Hook"]] = {point: [] for point in POINTS}
+_patched = False
+
+
+@dataclass
+class AgentCall:
+    """One agent invocation (one `generate` call)."""
+
+    agent: Any
+    messages: list
+    request_params: Any = None
+    response: Any = None
+    # Per-invocation state of the features, by feature name
+    state: dict = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return self.agent.name
+
+    @property
+    def provider(self) -> Optional[str]:
+        provider = getattr(getattr(self.agent, "_llm", None), "provider", None)
+        return provider.value if provider else None
+
+    @property
+    def model(self) -> Optional[str]:
+        params = getattr(getattr(self.agent, "_llm", None), "default_request_params", None)
+        return getattr(params, "model", None)
+
+
+@dataclass
+class LLMRequest:
+    """One provider request; `kwargs` are the keyword arguments it is sent with."""
+
+    api: str  # "executor" (OpenAI-compatible and Anthropic providers) or "google"
+    endpoint: str
+    kwargs: dict
+    task: Any = None
+    agent: Optional[AgentCall] = None
+    response: Any = None
+    error: Optional[BaseException] = None
+
+    @property
+    def model(self) -> Optional[str]:
+        return self.kwargs.get("model")
+
+    @model.setter
+    def model(self, model: str) -> None:
+        self.kwargs["model"] = model
+
+    @property
+    def messages(self) -> Any:
+        return self.kwargs.get("contents" if self.api == "google" else "messages")
+
+    @property
+    def tools(self) -> Any:
+        if self.api == "google":
+            return getattr(self.kwargs.get("config"), "tools", None)
+        return self.kwargs.get("tools")
+
+    @property
+    def usage(self) -> Any:
+        return getattr(self.response, "usage_metadata" if self.api == "google" else "usage", None)
+
+    @property
+    def provider(self) -> Optional[str]:
+        if self.api == "google":
+            return "google"
+        return self.agent.provider if self.agent else None
+
+    @property
+    def agent_name(self) -> Optional[str]:
+        return self.agent.name if self.agent else None
+
+
+@dataclass
+class ToolRequest:
+    """One MCP tool call of an agent."""
+
+    agent: Optional[str]
+    name: str
+    arguments: Optional[dict]
+    result: Any = None
+
+
+@dataclass
+class Hook:
+    name: str
+    order: int
+    before: Optional[Callable[[Any], None]] = None
+    after: Optional[Callable[[Any], None]] = None
+    around: Optional[Callable[[Any, Callable[[], Awaitable[None]]], Awaitable[None]]] = None
+
+
+def current() -> Optional[AgentCall]:
+    """The invocation of the innermost agent running in this context, if any."""
+    return _current.get()
+
+
+def register(
+    name: str,
+    point: str,
+    order: int,
+    before: Optional[Callable[[Any], None]] = None,
+    after: Optional[Callable[[Any], None]] = None,
+    around: Optional[Callable[[Any, Callable[[], Awaitable[None]]], Awaitable[None]]] = None,
+) -> None:
+    """
+    Run hooks on every call of `point` in this process. Registering a name
+    again for the same point replaces its hooks.
+
+    Args:
+        name (str): Feature name, e.g. `tracing`.
+        point (str): `agent` (AgentCall), `llm` (LLMRequest) or `tool` (ToolRequest).
+        order (int): Position among the hooks of the point, one of the constants above.
+        before, after: Called with the call object before and after the call.
+        around: Coroutine function called with the call object and a
+            `proceed` coroutine function running the rest of the chain.
+    """
+    if point not in _hooks:
+        raise ValueError(f"Unknown hook point {point!r}, expected one of {', '.join(POINTS)}")
+    _patch()
+    hooks = [hook for hook in _hooks[point] if hook.name != name]
+    hooks.append(Hook(name, order, before, after, around))
+    _hooks[point] = sorted(hooks, key=lambda hook: hook.order)
+
+
+async def _run(point: str, call: Any, send: Callable[[Any], Awaitable[None]]) -> None:
+    hooks = _hooks[point]
+
+    async def step(index: int) -> None:
+        if index == len(hooks):
+            await send(call)
+            return
+        hook = hooks[index]
+        if hook.before:
+            hook.before(call)
+        if hook.around:
+            await hook.around(call, functools.partial(step, index + 1))
+        else:
+            await step(index + 1)
+        if hook.after:
+            hook.after(call)
+
+    await step(0)
+
+
+def _patch() -> None:
+    global _patched
+    if _patched:
+        return
+    _patched = True
+
+    from mcp_agent.agents.base_agent import BaseAgent
+    from mcp_agent.executor.executor import AsyncioExecutor
+    from mcp_agent.mcp.mcp_aggregator import MCPAggregator
+
+    generate = BaseAgent.generate
+
+    @functools.wraps(generate)
+    async def hooked_generate(self, multipart_messages, request_params=None):
+        async def send(call: AgentCall) -> None:
+            call.response = await generate(call.agent, call.messages, call.request_params)
+
+        call = AgentCall(self, multipart_messages, request_params)
+        token = _current.set(call)
+        try:
+            await _run("agent", call, send)
+        finally:
+            _current.reset(token)
+        return call.response
+
+    BaseAgent.generate = hooked_generate
+
+    # The OpenAI-compatible and Anthropic providers send every completion request through the executor
+    execute = AsyncioExecutor.execute
+
+    @functools.wraps(execute)
+    async def hooked_execute(self, *tasks, **kwargs):
+        if "messages" not in kwargs or len(tasks) != 1:
+            return await execute(self, *tasks, **kwargs)
+
+        async def send(call: LLMRequest) -> None:
+            response = (await execute(self, call.task, **call.kwargs))[0]
+            # The executor returns exceptions instead of raising them
+            failed = isinstance(response, BaseException)
+            call.response, call.error = (None, response) if failed else (response, None)
+
+        call = LLMRequest("executor", getattr(tasks[0], "__qualname__", ""), kwargs, tasks[0], current())
+        await _run("llm", call, send)
+        return [call.error if call.error is not None else call.response]
+
+    AsyncioExecutor.execute = hooked_execute
+
+    # The native Google provider calls the google-genai client directly
+    try:
+        from google.genai.models import AsyncModels
+    except ImportError:
+        AsyncModels = None
+    if AsyncModels is not None:
+        generate_content = AsyncModels.generate_content
+
+        @functools.wraps(generate_content)
+        async def hooked_generate_content(self, *, model, contents, config=None):
+            async def send(call: LLMRequest) -> None:
+                try:
+                    call.response, call.error = await generate_content(self, **call.kwargs), None
+                except Exception as exc:
+                    call.response, call.error = None, exc
+
+            call = LLMRequest(
+                "google",
+                "google.generate_content",
+                {"model": model, "contents": contents, "config": config},
+                agent=current(),
+            )
+            await _run("llm", call, send)
+            if call.error is not None:
+                raise call.error
+            return call.response
+
+        AsyncModels.generate_content = hooked_generate_content
+
+    call_tool = MCPAggregator.call_tool
+
+    @functools.wraps(call_tool)
+    async def hooked_call_tool(self, name, arguments=None):
+        async def send(call: ToolRequest) -> None:
+            call.result = await call_tool(self, call.name, call.arguments)
+
+        call = ToolRequest(self.agent_name, name, arguments)
+        await _run("tool", call, send)
+        return call.result
+
+    MCPAggregator.call_tool = hooked_call_tool
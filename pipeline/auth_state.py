@@ -0,0 +1,128 @@
+"""
+Signed-in browser state, saved per site origin and reused by later browser sessions.
+
+The `--auth-state` transform of the tool proxy (mcp_servers/auth_state.py)
+saves Playwright's storage state (cookies and localStorage) after an agent
+logs in, and loads it into the next isolated browser that starts on the same
+origin, so Planner and ManualTestAgent runs skip the login steps. Entries live
+in TEMP_DATA_PATH/auth, one JSON file per origin:
+
+    {"origin": "https://shop.example.com", "captured_at": 1718000000.0,
+     "state": {"cookies": [...], "origins": [{"origin": "...", "localStorage": [...]}]}}
+
+An entry is stale once it is older than `max_age_s` or all of its expiring
+cookies have expired; stale entries are not loaded and get replaced by the
+next login.
+
+    python -m pipeline.auth_state list
+    python -m pipeline.auth_state clear [origin]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from typing import List, Optional
+from urllib.parse import urlsplit
+
+from pipeline.paths import temp_data_dir
+
+DEFAULT_MAX_AGE_S = float(os.getenv("AUTH_STATE_MAX_AGE_H", "12")) * 3600
+EMPTY_STATE = {"cookies": [], "origins": []}
+# Start of the note the proxy adds to the first navigation after a state was loaded
+RESTORED_NOTE = "Restored the signed-in browser state"
+
+
+def origin_of(url: str) -> Optional[str]:
+    parts = urlsplit(url or "")
+    if parts.scheme not in ("http", "https") or not parts.netloc:
+        return None
+    return f"{parts.scheme}://{parts.netloc.lower()}"
+
+
+def write_json(path: str, value: dict) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(value, f)
+    os.replace(tmp_path, path)
+
+
+class AuthStateStore:
+    def __init__(self, root: Optional[str] = None, max_age_s: float = DEFAULT_MAX_AGE_S):
+        self.root = root or str(temp_data_dir("auth"))
+        self.max_age_s = max_age_s
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, origin: str) -> str:
+        slug = re.sub(r"[^a-z0-9]+", "_", origin.lower()).strip("_")[:60]
+        return os.path.join(self.root, f"{slug}-{hashlib.sha256(origin.encode()).hexdigest()[:8]}.json")
+
+    def stale_reason(self, entry: dict) -> Optional[str]:
+        age = time.time() - entry.get("captured_at", 0)
+        if age > self.max_age_s:
+            return f"saved {age / 3600:.1f}h ago"
+        expiring = [c["expires"] for c in entry["state"].get("cookies", []) if c.get("expires", -1) > 0]
+        if expiring and max(expiring) < time.time():
+            return "all cookies expired"
+        return None
+
+    def load(self, origin: str) -> Optional[dict]:
+        """The saved entry of `origin`, or None when there is none or it is stale."""
+        try:
+            with open(self._path(origin), "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return None if self.stale_reason(entry) else entry
+
+    def save(self, origin: str, state: dict) -> dict:
+        entry = {"origin": origin, "captured_at": time.time(), "state": state}
+        write_json(self._path(origin), entry)
+        return entry
+
+    def drop(self, origin: str) -> None:
+        try:
+            os.remove(self._path(origin))
+        except OSError:
+            pass
+
+    def entries(self) -> List[dict]:
+        entries = []
+        for name in sorted(os.listdir(self.root)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.root, name), "r") as f:
+                    entries.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Saved signed-in browser state per origin.")
+    parser.add_argument("command", choices=["list", "clear"])
+    parser.add_argument("origin", nargs="?", help="Only this origin (clear); all when omitted.")
+    args = parser.parse_args(argv)
+    store = AuthStateStore()
+
+    if args.command == "list":
+        for entry in store.entries():
+            reason = store.stale_reason(entry)
+            captured = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["captured_at"]))
+            print(f"{entry['origin']}  saved {captured}  {len(entry['state'].get('cookies', []))} cookies"
+                  f"  {'stale: ' + reason if reason else 'fresh'}")
+        return 0
+
+    origins = [origin_of(args.origin) or args.origin] if args.origin else [e["origin"] for e in store.entries()]
+    for origin in origins:
+        store.drop(origin)
+        print(f"Cleared {origin}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,455 @@
+"""
+Headless execution of a jobs manifest, for scheduled runs without a human at the prompt.
+
+Started with `python main.py run <manifest>` (or `python -m pipeline.batch_runner`).
+The manifest is JSONL (one job object per line, `#` comments allowed) or CSV
+with a header row. Job types:
+
+    {"type": "manual_cases", "url": "https://www.bing.com", "user_story": "...", "story_id": "bing_search"}
+    {"type": "case", "story_id": "bing_search", "test_type": "regression", "test_case_id": "REG_001"}
+    {"type": "bulk", "story_id": "bing_search", "test_type": "regression", "test_ids": "REG_001,REG_002"}
+
+`bulk` converts every test case of the story when `test_ids` is omitted; with
+`"changed": true` only new and changed test cases are converted and the specs
+of deleted ones are removed (pipeline/story_state.py). Every
+job may set `id`, `needs` (ids of jobs that must pass first, e.g. generating
+the manual cases before converting them), `retries`, `timeout`, `use_cache`,
+`use_template`, `token_budget` and `latency_budget_s` (per attempt), and
+`story_token_budget` (all attempts of a story together, taken from the first
+job of the story that starts; see pipeline/metering.py). Token and tool
+payload usage is reported per job.
+
+Progress events (job, test case, attempt, retry, stage and tool call) go to
+the `--events` sinks while the batch runs (pipeline/events.py).
+
+Each manual test case run and each test case conversion runs in its own worker
+process (pipeline/manual_worker.py, pipeline/case_worker.py). At most
+`--concurrency` of them run at once across all jobs. One result line per job
+is appended to the output JSONL as soon as the job finishes.
+
+Exit codes: 0 when every job passed, 1 when a job failed or was skipped, 2 when
+the manifest is invalid.
+
+Usage:
+    python main.py run jobs.jsonl [--concurrency 3] [--retries 1] [--timeout 1800]
+                                  [--output results.jsonl] [--no-cache] [--no-template] [--dry-run]
+                                  [--token-budget 200000] [--latency-budget 600] [--story-token-budget 2000000]
+                                  [--events jsonl:events.jsonl] [--events stdout] [--events sse:127.0.0.1:8765]
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import re
+import sys
+import time
+from dataclasses import asdict
+from typing import Dict, List, Optional
+
+from config_loader import config_path
+from logs_loader import ensure_logs_file
+from pipeline import events
+from pipeline.bulk_runner import changed_test_ids, run_attempt, run_case_with_retries
+from pipeline.manual_cases import ManualCaseIndex, manual_case_path
+from pipeline.metering import StoryBudget, Usage, write_usage
+from pipeline.paths import temp_data_dir
+
+TEST_TYPES = ("smoke", "regression")
+REQUIRED_FIELDS = {
+    "manual_cases": ("url", "user_story"),
+    "case": ("story_id", "test_type", "test_case_id"),
+    "bulk": ("story_id", "test_type"),
+}
+LIST_SPLIT_RE = re.compile(r"[,;\s]+")
+EXIT_OK, EXIT_FAILED, EXIT_INVALID_MANIFEST = 0, 1, 2
+
+
+class ManifestError(ValueError):
+    pass
+
+
+def split_list(value) -> List[str]:
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item for item in LIST_SPLIT_RE.split(str(value or "")) if item]
+
+
+def parse_bool(value) -> bool:
+    return value if isinstance(value, bool) else str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+def read_manifest(path: str) -> List[dict]:
+    """Raw job objects of a JSONL or CSV manifest, with their line numbers in `_line`."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        jobs = []
+        if path.lower().endswith(".csv"):
+            reader = csv.DictReader(f)
+            for row in reader:
+                # Empty cells are treated like missing keys
+                job = {key.strip(): value.strip() for key, value in row.items() if key and value and value.strip()}
+                if job:
+                    jobs.append({**job, "_line": reader.line_num})
+            return jobs
+        for number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                job = json.loads(line)
+            except ValueError as exc:
+                raise ManifestError(f"line {number}: invalid JSON ({exc})")
+            if not isinstance(job, dict):
+                raise ManifestError(f"line {number}: a job must be a JSON object")
+            jobs.append({**job, "_line": number})
+        return jobs
+
+
+def validate_jobs(raw_jobs: List[dict]) -> List[dict]:
+    """Check required fields, fill in ids and normalise lists and flags."""
+    jobs, errors = [], []
+    for position, raw in enumerate(raw_jobs, start=1):
+        job = dict(raw)
+        where = f"line {job.pop('_line', position)}"
+        job_type = job.get("type")
+        if job_type not in REQUIRED_FIELDS:
+            errors.append(f"{where}: unknown job type {job_type!r} (expected {', '.join(REQUIRED_FIELDS)})")
+            continue
+        missing = [name for name in REQUIRED_FIELDS[job_type] if not job.get(name)]
+        if missing:
+            errors.append(f"{where}: {job_type} job needs {', '.join(missing)}")
+        if "test_type" in job and job["test_type"] not in TEST_TYPES:
+            errors.append(f"{where}: test_type must be smoke or regression")
+        job["id"] = str(job.get("id") or f"job{position}")
+        job["needs"] = split_list(job.get("needs"))
+        if job_type == "bulk":
+            job["test_ids"] = split_list(job.get("test_ids"))
+        for flag in ("use_cache", "use_template", "changed"):
+            if flag in job:
+                job[flag] = parse_bool(job[flag])
+        for number in ("retries", "timeout", "token_budget", "latency_budget_s", "story_token_budget"):
+            if number in job:
+                try:
+                    job[number] = (
+                        float(job[number]) if number in ("timeout", "latency_budget_s") else int(job[number])
+                    )
+                except (TypeError, ValueError):
+                    errors.append(f"{where}: {number} must be a number")
+        jobs.append(job)
+
+    ids = [job["id"] for job in jobs]
+    duplicates = sorted({job_id for job_id in ids if ids.count(job_id) > 1})
+    if duplicates:
+        errors.append(f"duplicate job ids: {', '.join(duplicates)}")
+    known = set(ids)
+    for job in jobs:
+        unknown = [need for need in job["needs"] if need not in known]
+        if unknown:
+            errors.append(f"job {job['id']}: needs unknown jobs {', '.join(unknown)}")
+    if not errors:
+        errors.extend(dependency_cycles(jobs))
+    if errors:
+        raise ManifestError("\n".join(errors))
+    return jobs
+
+
+def dependency_cycles(jobs: List[dict]) -> List[str]:
+    needs = {job["id"]: job["needs"] for job in jobs}
+    state: Dict[str, str] = {}
+
+    def visit(job_id: str, path: List[str]) -> Optional[str]:
+        if state.get(job_id) == "done":
+            return None
+        if state.get(job_id) == "visiting":
+            return " -> ".join(path[path.index(job_id):] + [job_id])
+        state[job_id] = "visiting"
+        for need in needs[job_id]:
+            cycle = visit(need, path + [job_id])
+            if cycle:
+                return cycle
+        state[job_id] = "done"
+        return None
+
+    for job_id in needs:
+        cycle = visit(job_id, [])
+        if cycle:
+            return [f"dependency cycle: {cycle}"]
+    return []
+
+
+def load_manifest(path: str) -> List[dict]:
+    try:
+        return validate_jobs(read_manifest(path))
+    except OSError as exc:
+        raise ManifestError(f"cannot read manifest: {exc}")
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        jobs: List[dict],
+        output_path: str,
+        concurrency: int = 3,
+        max_retries: int = 1,
+        timeout: Optional[float] = None,
+        use_cache: bool = True,
+        use_template: bool = True,
+        token_budget: Optional[int] = None,
+        latency_budget_s: Optional[float] = None,
+        story_token_budget: Optional[int] = None,
+    ):
+        self.jobs = jobs
+        self.output_path = output_path
+        # Limits worker processes across all jobs; a bulk job takes one slot per test case
+        self.slots = asyncio.Semaphore(max(1, concurrency))
+        self.defaults = {
+            "retries": max_retries,
+            "timeout": timeout,
+            "use_cache": use_cache,
+            "use_template": use_template,
+            "token_budget": token_budget,
+            "latency_budget_s": latency_budget_s,
+            "story_token_budget": story_token_budget,
+        }
+        # One token budget per story, shared by all of its jobs
+        self.story_budgets: Dict[str, StoryBudget] = {}
+        self.results: Dict[str, dict] = {}
+        self.done = {job["id"]: asyncio.Event() for job in jobs}
+
+    def option(self, job: dict, name: str):
+        return job.get(name, self.defaults[name])
+
+    def story_budget(self, job: dict) -> StoryBudget:
+        story_id = job.get("story_id") or job.get("url")
+        if story_id not in self.story_budgets:
+            self.story_budgets[story_id] = StoryBudget.from_value(self.option(job, "story_token_budget"))
+        return self.story_budgets[story_id]
+
+    async def run(self) -> List[dict]:
+        events.publish("run.started", jobs=[job["id"] for job in self.jobs])
+        await asyncio.gather(*(self.run_job(job) for job in self.jobs))
+        events.publish(
+            "run.finished",
+            passed=sum(result["status"] == "passed" for result in self.results.values()),
+            total=len(self.jobs),
+            output=self.output_path,
+        )
+        for story_id, budget in self.story_budgets.items():
+            write_usage("story", story_id, asdict(budget.used), budget=budget.tokens)
+        return [self.results[job["id"]] for job in self.jobs]
+
+    async def run_job(self, job: dict) -> None:
+        with events.context(job=job["id"]):
+            await self._run_job(job)
+
+    async def _run_job(self, job: dict) -> None:
+        started_at = time.monotonic()
+        try:
+            for need in job["needs"]:
+                await self.done[need].wait()
+            started_at = time.monotonic()
+            failed_needs = [need for need in job["needs"] if self.results[need]["status"] != "passed"]
+            if failed_needs:
+                result = {"status": "skipped", "error": f"needed jobs did not pass: {', '.join(failed_needs)}"}
+            else:
+                print(f"▶ {job['id']}: {job['type']}", flush=True)
+                events.publish("job.started", job_type=job["type"], story_id=job.get("story_id"))
+                result = await getattr(self, f"run_{job['type']}")(job)
+        except Exception as exc:  # one broken job must not stop the batch
+            result = {"status": "failed", "error": f"{type(exc).__name__}: {exc}"}
+        result = {
+            "id": job["id"],
+            "type": job["type"],
+            **result,
+            "duration_s": round(time.monotonic() - started_at, 2),
+        }
+        self.write_result(result)
+        events.publish(
+            "job.finished", job_type=job["type"], status=result["status"], error=result.get("error"),
+            duration_s=result["duration_s"], usage=result.get("usage"),
+        )
+        self.results[job["id"]] = result
+        self.done[job["id"]].set()
+        print(f"{'✔' if result['status'] == 'passed' else '✖'} {job['id']}: {result['status']}"
+              f"{' - ' + result['error'] if result.get('error') else ''}", flush=True)
+
+    def write_result(self, result: dict) -> None:
+        with open(self.output_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
+
+    async def run_manual_cases(self, job: dict) -> dict:
+        worker_job = {key: job[key] for key in ("url", "user_story", "story_id") if job.get(key)}
+        worker_job["latency_budget_s"] = self.option(job, "latency_budget_s")
+        story_budget = self.story_budget(job)
+        log_dir = temp_data_dir("logs", job.get("story_id") or "manual_cases")
+        log_files = []
+        outcome = {}
+        usage = Usage()
+        for attempt in range(1, self.option(job, "retries") + 2):
+            if story_budget.spent:
+                outcome = {**outcome, "status": outcome.get("status", "skipped"), "error": story_budget.exceeded_error()}
+                break
+            if attempt > 1:
+                events.publish("retry", attempt=attempt, stage=outcome.get("stage"), error=outcome.get("error"))
+            worker_job["attempt"] = attempt
+            worker_job["token_budget"] = story_budget.attempt_budget(self.option(job, "token_budget"))
+            log_files.append(str(log_dir / f"{job['id']}.manual_cases.attempt{attempt}.log"))
+            events.publish("attempt.started", attempt=attempt, log_file=log_files[-1])
+            async with self.slots:
+                outcome = await run_attempt(
+                    worker_job, log_files[-1], self.option(job, "timeout"), module="pipeline.manual_worker"
+                )
+            events.publish(
+                "attempt.finished", attempt=attempt, status=outcome["status"], stage=outcome.get("stage"),
+                error=outcome.get("error"), usage=outcome.get("usage"),
+            )
+            story_budget.charge(outcome.get("usage"))
+            usage.add(Usage.from_dict(outcome.get("usage")))
+            if outcome["status"] == "passed":
+                break
+        return {**outcome, "attempts": len(log_files), "log_files": log_files, "usage": asdict(usage)}
+
+    async def convert(self, job: dict, test_id: str):
+        async with self.slots:
+            return await run_case_with_retries(
+                job["story_id"],
+                job["test_type"],
+                test_id,
+                self.option(job, "retries"),
+                self.option(job, "timeout"),
+                self.option(job, "use_cache"),
+                self.option(job, "use_template"),
+                self.option(job, "token_budget"),
+                self.option(job, "latency_budget_s"),
+                self.story_budget(job),
+            )
+
+    async def run_case(self, job: dict) -> dict:
+        return {"story_id": job["story_id"], **asdict(await self.convert(job, job["test_case_id"]))}
+
+    async def run_bulk(self, job: dict) -> dict:
+        # Resolved when the job starts, so a manual_cases job it needs has written the file by then
+        changes = None
+        if job.get("changed"):
+            changes = changed_test_ids(job["story_id"], job["test_type"], job["test_ids"])
+            test_ids = changes.scheduled
+        else:
+            test_ids = job["test_ids"] or list(
+                ManualCaseIndex().index(manual_case_path(job["story_id"], job["test_type"]))
+            )
+            if not test_ids:
+                return {"status": "failed", "error": f"no {job['test_type']} test cases found for {job['story_id']}"}
+        cases = await asyncio.gather(*(self.convert(job, test_id) for test_id in dict.fromkeys(test_ids)))
+        passed = sum(case.status == "passed" for case in cases)
+        result = {
+            "status": "passed" if passed == len(cases) else "failed",
+            "story_id": job["story_id"],
+            "passed": passed,
+            "total": len(cases),
+            "error": None if passed == len(cases) else f"{len(cases) - passed}/{len(cases)} test cases failed",
+            "cases": [asdict(case) for case in cases],
+            "usage": asdict(sum_usage(case.usage for case in cases)),
+        }
+        if changes is not None:
+            result["changes"] = {
+                name: getattr(changes, name) for name in ("new", "changed", "removed", "unchanged")
+            }
+        return result
+
+
+def sum_usage(usages) -> Usage:
+    total = Usage()
+    for usage in usages:
+        total.add(Usage.from_dict(usage))
+    return total
+
+
+def format_results(results: List[dict]) -> str:
+    headers = ["Job", "Type", "Status", "Duration (s)", "Tokens", "Error"]
+    rows = [
+        [r["id"], r["type"], r["status"], f"{r['duration_s']:.1f}", str(Usage.from_dict(r.get("usage")).tokens),
+         r.get("error") or ""]
+        for r in results
+    ]
+    widths = [max(len(row[i]) for row in [headers] + rows) for i in range(len(headers))]
+    lines = [" | ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in [headers] + rows]
+    lines.insert(1, "-+-".join("-" * width for width in widths))
+    passed = sum(r["status"] == "passed" for r in results)
+    tokens = sum_usage(r.get("usage") for r in results).tokens
+    lines.append(f"\n{passed}/{len(results)} jobs passed, {tokens} tokens used.")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="main.py run", description="Run a JSONL or CSV manifest of TestPilot jobs without the interactive prompt."
+    )
+    parser.add_argument("manifest", help="Jobs manifest (.jsonl or .csv).")
+    parser.add_argument(
+        "--concurrency", type=int, default=int(os.getenv("BULK_CONCURRENCY", "3")),
+        help="Worker processes running at once across all jobs.",
+    )
+    parser.add_argument("--retries", type=int, default=1, help="Extra attempts per failing test case or manual job.")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds per attempt.")
+    parser.add_argument("--output", help="Results JSONL (default: TEMP_DATA_PATH/batch/results-<time>.jsonl).")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore stage checkpoints.")
+    parser.add_argument(
+        "--no-template", action="store_true", help="Always use PlaywrightWriterAgent, even for simple plans."
+    )
+    parser.add_argument("--token-budget", type=int, default=None, help="LLM tokens per worker attempt.")
+    parser.add_argument(
+        "--latency-budget", type=float, default=None, help="Seconds per worker attempt before LLM requests stop."
+    )
+    parser.add_argument(
+        "--story-token-budget", type=int, default=None, help="LLM tokens for all jobs of a story together."
+    )
+    parser.add_argument(
+        "--events", action="append",
+        help="Progress event sink: jsonl:<path>, stdout or sse[:host:port] (repeatable, see pipeline/events.py).",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only validate the manifest and list the jobs.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    events.configure(args.events)
+    try:
+        jobs = load_manifest(args.manifest)
+    except ManifestError as exc:
+        print(f"❌ Invalid manifest {args.manifest}:\n{exc}", file=sys.stderr)
+        return EXIT_INVALID_MANIFEST
+    if args.dry_run:
+        for job in jobs:
+            needs = f" (needs {', '.join(job['needs'])})" if job["needs"] else ""
+            print(f"{job['id']}: {job['type']} {job.get('story_id') or job.get('url')}{needs}")
+        return EXIT_OK
+
+    output_path = args.output or str(temp_data_dir("batch") / f"results-{time.strftime('%Y%m%d-%H%M%S')}.jsonl")
+    ensure_logs_file()
+    # Workers render no progress display or chat into their logs
+    os.environ.setdefault("TESTPILOT_HEADLESS", "1")
+    # Rendered once here; the workers inherit its path in TESTPILOT_CONFIG_PATH
+    config_path()
+    results = asyncio.run(events.serve(
+        BatchRunner(
+            jobs,
+            output_path,
+            concurrency=args.concurrency,
+            max_retries=args.retries,
+            timeout=args.timeout,
+            use_cache=not args.no_cache,
+            use_template=not args.no_template,
+            token_budget=args.token_budget,
+            latency_budget_s=args.latency_budget,
+            story_token_budget=args.story_token_budget,
+        ).run()
+    ))
+
+    print(format_results(results))
+    print(f"\nResults written to {output_path}")
+    return EXIT_OK if all(r["status"] == "passed" for r in results) else EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,501 @@
+"""
+Deterministic bulk conversion of manual test cases into Playwright specs.
+
+Replaces the LLM-driven queue of the old BulkWDIOAutomationAgent: test IDs are
+fanned out over an asyncio worker pool, every attempt runs in its own
+`pipeline.case_worker` process (and therefore its own browser), and retries
+are counted here instead of by a model.
+
+Usage:
+    python -m pipeline.bulk_runner <story_id> <smoke|regression> [REG_001,REG_002] [--changed] \
+        [--concurrency 3] [--pipeline] [--planner-concurrency 2] [--writer-concurrency 3] [--queue-size 2]
+        [--retries 1] [--timeout 1800] [--no-cache] [--no-template] [--json results.json]
+        [--token-budget 200000] [--latency-budget 600] [--story-token-budget 2000000]
+        [--events jsonl:events.jsonl] [--events stdout] [--events sse:127.0.0.1:8765]
+
+Without test IDs every test case of the story is converted. Retry attempts run
+with every agent turn escalated to the large model tier (pipeline/model_router.py).
+
+Every passing test case has its hashes recorded by pipeline/story_state.py.
+With `--changed` only new and changed test cases are converted, and the specs
+of test cases deleted from the manual file are removed.
+
+Token and tool payload usage is reported per test case and summed per story
+(pipeline/metering.py). With a story token budget, each attempt gets at most
+the tokens the story has left and test cases not started once it is spent are
+`skipped`.
+
+With `--pipeline` every test case runs as two worker processes: one for the
+Planner and Verifier (with the browser) and one for the writer (filesystem
+only), each stage with its own pool and its own retries. Planned test cases
+wait in a bounded queue for a writer, so a story takes about as long as its
+slower stage instead of the sum of both.
+
+Progress events (test case, attempt, retry, stage and tool call) go to the
+`--events` sinks while the run is going (pipeline/events.py).
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+from config_loader import config_path
+from logs_loader import ensure_logs_file
+from pipeline import events
+from pipeline.case_worker import RESULT_PREFIX
+from pipeline.manual_cases import ManualCaseIndex, manual_case_path
+from pipeline.metering import StoryBudget, Usage, write_usage
+from pipeline.paths import ROOT_DIR, temp_data_dir
+from pipeline.story_state import Changes, StoryState
+
+# Longest worker output line read (fast-agent prints whole tool results)
+MAX_LINE_BYTES = 16 * 1024 * 1024
+
+
+@dataclass
+class CaseResult:
+    test_id: str
+    status: str = "pending"
+    attempts: int = 0
+    duration_s: float = 0.0
+    error: Optional[str] = None
+    stage: Optional[str] = None
+    cached_stages: List[str] = field(default_factory=list)
+    log_files: List[str] = field(default_factory=list)
+    usage: dict = field(default_factory=dict)
+
+
+def unique_ids(test_ids: List[str]) -> List[str]:
+    """Strip, drop empties and de-duplicate while keeping the given order."""
+    seen = []
+    for test_id in test_ids:
+        test_id = test_id.strip()
+        if test_id and test_id not in seen:
+            seen.append(test_id)
+    return seen
+
+
+async def run_attempt(
+    job: dict, log_path: str, timeout: Optional[float], module: str = "pipeline.case_worker"
+) -> dict:
+    """
+    Run one worker process (case_worker by default) and return its parsed result line.
+
+    Its output is read while it runs, so the progress events it prints are
+    republished (pipeline/events.py) as they happen.
+    """
+    result = None
+    with open(log_path, "wb") as log_file:
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", module,
+            cwd=str(ROOT_DIR),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=log_file,
+            limit=MAX_LINE_BYTES,
+        )
+
+        async def read_output():
+            nonlocal result
+            process.stdin.write(json.dumps(job).encode())
+            await process.stdin.drain()
+            process.stdin.close()
+            async for raw_line in process.stdout:
+                log_file.write(raw_line)
+                log_file.flush()
+                line = raw_line.decode(errors="replace")
+                if line.startswith(RESULT_PREFIX):
+                    result = json.loads(line[len(RESULT_PREFIX):])
+                elif (event := events.from_worker(line)) is not None:
+                    events.republish(event, attempt=job.get("attempt"))
+            await process.wait()
+
+        try:
+            await asyncio.wait_for(read_output(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return {"status": "failed", "stage": "worker", "error": f"timed out after {timeout}s"}
+
+    if result is not None:
+        return result
+    return {
+        "status": "failed",
+        "stage": "worker",
+        "error": f"worker exited with code {process.returncode} without a result",
+    }
+
+
+@dataclass
+class CaseRun:
+    """A test case on its way through the attempts of one or both stages."""
+
+    result: CaseResult
+    job: dict
+    usage: Usage = field(default_factory=Usage)
+    started_at: float = field(default_factory=time.monotonic)
+
+
+def new_case_run(
+    story_id: str,
+    test_type: str,
+    test_id: str,
+    use_cache: bool = True,
+    use_template: bool = True,
+    token_budget: Optional[int] = None,
+    latency_budget_s: Optional[float] = None,
+) -> CaseRun:
+    job = {
+        "story_id": story_id,
+        "test_type": test_type,
+        "test_case_id": test_id,
+        "use_cache": use_cache,
+        "use_template": use_template,
+        "token_budget": token_budget,
+        "latency_budget_s": latency_budget_s,
+    }
+    events.publish("case.started", test_type=test_type)
+    return CaseRun(CaseResult(test_id=test_id), job)
+
+
+async def run_stage_with_retries(
+    run: CaseRun,
+    max_retries: int,
+    timeout: Optional[float],
+    story_budget: StoryBudget,
+    stages: str = "all",
+) -> None:
+    """
+    Run the worker attempts of one stage group of a test case ("all", "plan"
+    or "write", see pipeline/case_worker.py) until one passes.
+
+    Attempts are numbered per stage group, so only retries are escalated to
+    the large model; `result.attempts` counts the worker runs of all groups.
+    """
+    result, job = run.result, run.job
+    token_budget = job["token_budget"]
+    job["stages"] = stages
+    log_dir = temp_data_dir("logs", job["story_id"])
+    log_name = result.test_id if stages == "all" else f"{result.test_id}.{stages}"
+    stage_group = None if stages == "all" else stages
+    earlier_cached = list(result.cached_stages)
+    for attempt in range(1, max_retries + 2):
+        if story_budget.spent:
+            if result.status in ("pending", "planned"):
+                result.status = "skipped"
+            result.error = story_budget.exceeded_error()
+            break
+        if attempt > 1:
+            events.publish("retry", attempt=attempt, stage=result.stage, error=result.error, stages=stage_group)
+        result.attempts += 1
+        job["attempt"] = attempt
+        job["token_budget"] = story_budget.attempt_budget(token_budget)
+        log_path = str(log_dir / f"{log_name}.attempt{attempt}.log")
+        result.log_files.append(log_path)
+        print(f"▶ {result.test_id}: {stage_group or 'attempt'} {attempt}/{max_retries + 1}", flush=True)
+        events.publish("attempt.started", attempt=attempt, log_file=log_path, stages=stage_group)
+
+        outcome = await run_attempt(job, log_path, timeout)
+        result.status = outcome["status"]
+        result.stage = outcome.get("stage")
+        result.error = outcome.get("error")
+        result.cached_stages = earlier_cached + outcome.get("cached_stages", [])
+        story_budget.charge(outcome.get("usage"))
+        run.usage.add(Usage.from_dict(outcome.get("usage")))
+        events.publish(
+            "attempt.finished", attempt=attempt, status=result.status, stage=result.stage, error=result.error,
+            cached_stages=outcome.get("cached_stages", []), usage=outcome.get("usage"), stages=stage_group,
+        )
+        if result.status == "passed":
+            job["upstream"] = outcome.get("upstream")
+            if stages == "plan":
+                result.status = "planned"
+            else:
+                StoryState(job["story_id"], job["test_type"]).record(result.test_id)
+            break
+        print(f"✖ {result.test_id}: attempt {attempt} failed in {result.stage}: {result.error}", flush=True)
+    job["token_budget"] = token_budget
+
+
+def finish_case(run: CaseRun) -> CaseResult:
+    result = run.result
+    result.usage = asdict(run.usage)
+    result.duration_s = round(time.monotonic() - run.started_at, 2)
+    events.publish(
+        "case.finished", status=result.status, attempts=result.attempts, stage=result.stage,
+        error=result.error, duration_s=result.duration_s, usage=result.usage,
+    )
+    return result
+
+
+async def run_case_with_retries(
+    story_id: str,
+    test_type: str,
+    test_id: str,
+    max_retries: int,
+    timeout: Optional[float],
+    use_cache: bool = True,
+    use_template: bool = True,
+    token_budget: Optional[int] = None,
+    latency_budget_s: Optional[float] = None,
+    story_budget: Optional[StoryBudget] = None,
+) -> CaseResult:
+    with events.context(test_id=f"{story_id}/{test_id}"):
+        run = new_case_run(story_id, test_type, test_id, use_cache, use_template, token_budget, latency_budget_s)
+        await run_stage_with_retries(run, max_retries, timeout, story_budget or StoryBudget())
+        return finish_case(run)
+
+
+async def run_bulk(
+    story_id: str,
+    test_type: str,
+    test_ids: List[str],
+    concurrency: int = 3,
+    max_retries: int = 1,
+    timeout: Optional[float] = None,
+    use_cache: bool = True,
+    use_template: bool = True,
+    token_budget: Optional[int] = None,
+    latency_budget_s: Optional[float] = None,
+    story_token_budget: Optional[int] = None,
+    pipeline: bool = False,
+    planner_concurrency: Optional[int] = None,
+    writer_concurrency: Optional[int] = None,
+    queue_size: Optional[int] = None,
+) -> List[CaseResult]:
+    """
+    Convert every test ID of a story, `concurrency` cases at a time.
+
+    With `pipeline`, the Planner (with the Verifier) and the writer run as two
+    stages with their own worker pools. Planned test cases wait in a queue of
+    at most `queue_size` for a writer, so the browser explores the next test
+    case while the previous one is written.
+
+    Args:
+        story_id (str): Folder name of the story in the manual test folder.
+        test_type (str): `smoke` or `regression`.
+        test_ids (List[str]): Test case IDs; duplicates are processed once.
+        concurrency (int): Number of worker processes running at once.
+        max_retries (int): Extra attempts per test ID after a failure.
+        timeout (Optional[float]): Seconds before a single attempt is killed.
+        use_cache (bool): Skip stages whose checkpoint inputs are unchanged.
+        use_template (bool): Generate simple plans without PlaywrightWriterAgent.
+        token_budget (Optional[int]): LLM tokens one attempt may use before it fails.
+        latency_budget_s (Optional[float]): Seconds after which an attempt sends no more LLM requests.
+        story_token_budget (Optional[int]): LLM tokens all attempts of the story may use together.
+        pipeline (bool): Run the Planner and writer stages as a pipeline.
+        planner_concurrency (Optional[int]): Planner workers in pipeline mode (default `concurrency`).
+        writer_concurrency (Optional[int]): Writer workers in pipeline mode (default `concurrency`).
+        queue_size (Optional[int]): Planned test cases waiting for a writer (default `writer_concurrency`).
+
+    Returns:
+        List[CaseResult]: One result per unique test ID, in input order.
+    """
+    ids = unique_ids(test_ids)
+    queue: asyncio.Queue = asyncio.Queue()
+    for test_id in ids:
+        queue.put_nowait(test_id)
+    results = {}
+    story_budget = StoryBudget.from_value(story_token_budget)
+
+    async def worker():
+        while True:
+            try:
+                test_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            results[test_id] = await run_case_with_retries(
+                story_id, test_type, test_id, max_retries, timeout, use_cache, use_template,
+                token_budget, latency_budget_s, story_budget,
+            )
+
+    planners = max(1, min(planner_concurrency or concurrency, len(ids)))
+    writers = max(1, min(writer_concurrency or concurrency, len(ids)))
+    # A full queue holds the Planner back, so plans do not pile up ahead of the writers
+    planned: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size or writers))
+
+    async def planner():
+        while True:
+            try:
+                test_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            with events.context(test_id=f"{story_id}/{test_id}"):
+                run = new_case_run(
+                    story_id, test_type, test_id, use_cache, use_template, token_budget, latency_budget_s
+                )
+                await run_stage_with_retries(run, max_retries, timeout, story_budget, stages="plan")
+                if run.result.status != "planned":
+                    results[test_id] = finish_case(run)
+                    continue
+            await planned.put(run)
+
+    async def planner_pool():
+        await asyncio.gather(*(planner() for _ in range(planners)))
+        for _ in range(writers):
+            await planned.put(None)
+
+    async def writer():
+        while (run := await planned.get()) is not None:
+            test_id = run.result.test_id
+            with events.context(test_id=f"{story_id}/{test_id}"):
+                await run_stage_with_retries(run, max_retries, timeout, story_budget, stages="write")
+                results[test_id] = finish_case(run)
+
+    events.publish("run.started", story_id=story_id, test_type=test_type, test_ids=ids)
+    if pipeline:
+        print(f"⇶ pipeline: {planners} Planner and {writers} writer workers", flush=True)
+        await asyncio.gather(planner_pool(), *(writer() for _ in range(writers)))
+    else:
+        await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(ids))))))
+    events.publish(
+        "run.finished", story_id=story_id, test_type=test_type,
+        passed=sum(results[test_id].status == "passed" for test_id in ids), total=len(ids),
+        usage=asdict(story_budget.used),
+    )
+    write_usage("story", f"{story_id}/{test_type}", asdict(story_budget.used), budget=story_budget.tokens)
+    return [results[test_id] for test_id in ids]
+
+
+def changed_test_ids(story_id: str, test_type: str, test_ids: Optional[List[str]] = None) -> Changes:
+    """
+    New and changed test cases of a story; the files of removed ones are deleted.
+
+    Args:
+        test_ids (Optional[List[str]]): Only consider these test IDs. Removed
+            test cases are only cleaned up when this is empty.
+
+    Returns:
+        Changes: `scheduled` holds the test IDs to convert.
+    """
+    state = StoryState(story_id, test_type)
+    changes = state.changes(unique_ids(test_ids or []))
+    print(f"🔎 {story_id} {test_type}: {changes.summary()}", flush=True)
+    for test_id in changes.scheduled:
+        print(f"  {test_id}: {changes.reasons[test_id]}", flush=True)
+    outcome = state.remove(changes.removed)
+    for path in outcome["deleted"]:
+        print(f"🗑 removed {path}", flush=True)
+    for path in outcome["kept"]:
+        print(f"⚠ kept {path}: edited after it was generated", flush=True)
+    return changes
+
+
+def format_results(results: List[CaseResult]) -> str:
+    headers = ["Test ID", "Status", "Attempts", "Duration (s)", "Tokens", "Error"]
+    rows = [
+        [r.test_id, r.status, str(r.attempts), f"{r.duration_s:.1f}", str(Usage.from_dict(r.usage).tokens),
+         r.error or ""]
+        for r in results
+    ]
+    widths = [max(len(row[i]) for row in [headers] + rows) for i in range(len(headers))]
+    lines = [" | ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in [headers] + rows]
+    lines.insert(1, "-+-".join("-" * width for width in widths))
+    passed = sum(r.status == "passed" for r in results)
+    tokens = sum(Usage.from_dict(r.usage).tokens for r in results)
+    lines.append(f"\n{passed}/{len(results)} test cases automated, {tokens} tokens used.")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-convert manual test cases into Playwright specs.")
+    parser.add_argument("story_id")
+    parser.add_argument("test_type", choices=["smoke", "regression"])
+    parser.add_argument(
+        "test_ids", nargs="?", default="", help="Comma separated test case IDs, e.g. REG_001,REG_002 (default: all)"
+    )
+    parser.add_argument(
+        "--changed", action="store_true",
+        help="Only convert new and changed test cases and remove the specs of deleted ones.",
+    )
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("BULK_CONCURRENCY", "3")))
+    parser.add_argument(
+        "--pipeline", action="store_true",
+        help="Plan the next test cases while earlier ones are written, with separate worker pools.",
+    )
+    parser.add_argument(
+        "--planner-concurrency", type=int, default=int(os.getenv("PLANNER_CONCURRENCY") or 0) or None,
+        help="Planner workers with --pipeline (default: --concurrency).",
+    )
+    parser.add_argument(
+        "--writer-concurrency", type=int, default=int(os.getenv("WRITER_CONCURRENCY") or 0) or None,
+        help="Writer workers with --pipeline (default: --concurrency).",
+    )
+    parser.add_argument(
+        "--queue-size", type=int, default=int(os.getenv("PIPELINE_QUEUE_SIZE") or 0) or None,
+        help="Planned test cases waiting for a writer with --pipeline (default: writer workers).",
+    )
+    parser.add_argument("--retries", type=int, default=1, help="Extra attempts per failing test ID.")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds per attempt.")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore stage checkpoints.")
+    parser.add_argument(
+        "--no-template", action="store_true", help="Always use PlaywrightWriterAgent, even for simple plans."
+    )
+    parser.add_argument("--token-budget", type=int, default=None, help="LLM tokens per attempt.")
+    parser.add_argument(
+        "--latency-budget", type=float, default=None, help="Seconds per attempt before LLM requests stop."
+    )
+    parser.add_argument(
+        "--story-token-budget", type=int, default=None, help="LLM tokens for all test cases of the story together."
+    )
+    parser.add_argument("--json", dest="json_path", help="Also write the results table as JSON.")
+    parser.add_argument(
+        "--events", action="append",
+        help="Progress event sink: jsonl:<path>, stdout or sse[:host:port] (repeatable, see pipeline/events.py).",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    events.configure(args.events)
+    ensure_logs_file()
+    # Workers render no progress display or chat into their logs
+    os.environ.setdefault("TESTPILOT_HEADLESS", "1")
+    # Rendered once here; the workers inherit its path in TESTPILOT_CONFIG_PATH
+    config_path()
+    test_ids = unique_ids(args.test_ids.split(","))
+    if args.changed:
+        try:
+            test_ids = changed_test_ids(args.story_id, args.test_type, test_ids).scheduled
+        except FileNotFoundError as exc:
+            print(f"❌ {exc}", file=sys.stderr)
+            return 1
+    elif not test_ids:
+        test_ids = list(ManualCaseIndex().index(manual_case_path(args.story_id, args.test_type)))
+        if not test_ids:
+            print(f"❌ no {args.test_type} test cases found for {args.story_id}", file=sys.stderr)
+            return 1
+    results = asyncio.run(events.serve(
+        run_bulk(
+            args.story_id,
+            args.test_type,
+            test_ids,
+            concurrency=args.concurrency,
+            max_retries=args.retries,
+            timeout=args.timeout,
+            use_cache=not args.no_cache,
+            use_template=not args.no_template,
+            token_budget=args.token_budget,
+            latency_budget_s=args.latency_budget,
+            story_token_budget=args.story_token_budget,
+            pipeline=args.pipeline,
+            planner_concurrency=args.planner_concurrency,
+            writer_concurrency=args.writer_concurrency,
+            queue_size=args.queue_size,
+        )
+    ))
+
+    print(format_results(results))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump([asdict(r) for r in results], f, indent=2)
+    return 0 if all(r.status == "passed" for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
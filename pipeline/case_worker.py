@@ -0,0 +1,372 @@
+"""
+Convert a single manual test case into a Playwright spec in its own process.
+
+The job is read as JSON from stdin:
+
+    {"story_id": "bing_search", "test_type": "regression", "test_case_id": "REG_001",
+     "use_cache": true, "use_template": true, "attempt": 1,
+     "token_budget": 200000, "latency_budget_s": 300, "stages": "all"}
+
+Every worker process starts its own MCP servers, so each test case gets an
+isolated browser. The outcome is printed as one JSON line prefixed with
+RESULT_PREFIX, which the bulk runner picks out of the console output. Stage
+starts and ends and tool calls are printed as progress events for it while the
+case runs (pipeline/events.py).
+
+Stages go through the checkpoint cache (pipeline/checkpoints.py): when the
+manual test case, instruction and model are unchanged, the stage is skipped.
+The writer's checkpoint holds the files it wrote; a hit puts the spec and data
+file back (and page objects that are missing) and only counts when the spec
+is then in place.
+Simple plans are turned into code by pipeline/template_codegen.py without
+calling PlaywrightWriterAgent at all. fast-agent itself is only imported when a
+stage misses the cache (agents/registry.py).
+
+The case, its stages, the MCP start-up and every agent, LLM and tool call are
+recorded as timing spans in fastagent.jsonl (pipeline/tracing.py).
+
+LLM requests are routed per phase by pipeline/model_router.py: exploration
+turns go to a small model and retry attempts (`attempt` > 1) escalate to the
+large one. Requests wait for their provider's shared rate limit
+(pipeline/rate_limiter.py). pipeline/metering.py counts tokens and tool
+payload bytes per agent; the result line carries them as `usage`. Once a
+budget is spent the case fails with stage "budget" and lists the stages it
+`completed`. With LLM_CACHE set, completions are recorded and replayed by
+pipeline/completion_cache.py.
+
+Before the writer runs, pipeline/plan_verifier.py replays the plan in a fresh
+browser and checks every selector; failing steps go back to the Planner and
+a plan that still fails after PLAN_VERIFY_REPAIRS rounds fails the case with
+stage "Verifier". A verification is reused for PLAN_VERIFY_TTL_H hours only.
+
+`stages` runs only part of the case for the pipelined bulk runner: "plan"
+runs the Planner and Verifier and returns the checkpoint key the writer
+builds on as `upstream`; "write" runs the writer on the plan on disk, with the
+`upstream` key of the plan job, and starts no browser.
+"""
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+import config_loader  # noqa: F401  (loads .env for standalone runs)
+from agents import registry
+from pipeline.checkpoints import CheckpointCache, cached_stage
+from pipeline import (
+    completion_cache,
+    events,
+    history_compaction,
+    metering,
+    model_router,
+    plan_verifier,
+    rate_limiter,
+    template_codegen,
+    tracing,
+)
+from pipeline.manual_cases import load_case
+from pipeline.selector_registry import SelectorRegistry
+from pipeline.story_state import StoryState
+
+RESULT_PREFIX = "@@testpilot-result "
+STAGE_AGENTS = {
+    "all": ("Planner", "PlaywrightWriterAgent"),
+    "plan": ("Planner",),
+    "write": ("PlaywrightWriterAgent",),
+}
+
+manual_folder_path = os.getenv("MANUAL_TEST_CASE_FOLDER_PATH")
+
+
+def plan_path(story_id: str, test_case_id: str) -> str:
+    return os.path.join(manual_folder_path or "", story_id, f"{test_case_id}_plan.json")
+
+
+def plan_is_valid(path: str, started_at: float) -> bool:
+    """A plan counts only if it was (re)written during this run and parses."""
+    try:
+        if os.path.getmtime(path) < started_at:
+            return False
+        with open(path, "r") as f:
+            json.load(f)
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def record_plan(plan: dict) -> None:
+    registry = SelectorRegistry()
+    try:
+        registry.ingest_plan(plan)
+    finally:
+        registry.close()
+
+
+def write_plan(path: str, plan: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(plan, f, indent=2)
+
+
+def project_file(rel_path: str) -> str:
+    return os.path.join(os.getenv("PLAYWRIGHT_PROJECT_PATH") or "", rel_path)
+
+
+def read_files(rel_paths: List[str]) -> Dict[str, str]:
+    """Contents of generated files (relative to the Playwright project) for the writer checkpoint."""
+    files = {}
+    for rel_path in rel_paths:
+        try:
+            with open(project_file(rel_path), "r") as f:
+                files[rel_path] = f.read()
+        except OSError:
+            continue
+    return files
+
+
+def restore_files(files: Dict[str, str], test_case_id: str) -> None:
+    """
+    Write the files of a writer checkpoint back. The spec and data file belong
+    to the test case and are always restored; page objects are shared by the
+    story's test cases, so they are only written when they are missing.
+    """
+    for rel_path, content in files.items():
+        path = project_file(rel_path)
+        own = rel_path.endswith(".spec.ts") or os.path.basename(rel_path) == f"{test_case_id}.json"
+        if not own and os.path.exists(path):
+            continue
+        try:
+            with open(path, "r") as f:
+                if f.read() == content:
+                    continue
+        except OSError:
+            pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+
+
+def last_line(reply: str, default: str) -> str:
+    lines = (reply or "").strip().splitlines()
+    return lines[-1] if lines else default
+
+
+class StageFailed(Exception):
+    def __init__(self, stage: str, error: str):
+        super().__init__(error)
+        self.stage = stage
+        self.error = error
+
+
+async def run_case(job: dict) -> dict:
+    story_id = job["story_id"]
+    test_type = job["test_type"]
+    test_case_id = job["test_case_id"]
+    started_at = time.time()
+    budget = metering.Budget.from_job(job)
+    case = load_case(story_id, test_type, test_case_id)
+    if case is None:
+        return {"status": "failed", "stage": "Planner", "error": f"Test case {test_case_id} not found."}
+    cache = CheckpointCache() if job.get("use_cache", True) else None
+    use_template = job.get("use_template", True)
+    stages = job.get("stages") or "all"
+    if stages not in STAGE_AGENTS:
+        return {"status": "failed", "stage": "worker", "error": f"unknown stages {stages!r}"}
+    path = plan_path(story_id, test_case_id)
+    story = StoryState(story_id, test_type)
+    planner_inputs = {
+        "case": case.fields(),
+        **registry.fingerprint("Planner"),
+    }
+    cached_stages = []
+    completed = []
+
+    async with contextlib.AsyncExitStack() as stack:
+        running = {}
+
+        async def agents():
+            # fast-agent, MCP servers and the browser are only loaded when a stage misses the cache
+            if "app" not in running:
+                fast = registry.register(*STAGE_AGENTS[stages])
+                rate_limiter.install()
+                completion_cache.install(refresh=job.get("attempt", 1) > 1)
+                tracing.instrument()
+                model_router.install(escalate=job.get("attempt", 1) > 1)
+                running["meter"] = metering.install(budget)
+                history_compaction.install()
+                with tracing.span("startup", "mcp_servers"):
+                    running["app"] = await stack.enter_async_context(fast.run())
+            return running["app"]
+
+        async def run_planner():
+            reply = await (await agents())["Planner"].send(
+                f"story_id: {story_id}\n"
+                f"test_type: {test_type}\n"
+                f"test_case_id: {test_case_id}\n"
+                f"manual_test_case:\n{case.as_message()}"
+            )
+            if not plan_is_valid(path, started_at):
+                raise StageFailed("Planner", last_line(reply, "no plan written"))
+            with open(path, "r") as f:
+                plan = json.load(f)
+            record_plan(plan)
+            return {"reply": reply, "plan": plan}
+
+        async def run_verifier():
+            report = await plan_verifier.verify_plan(path)
+            repairs = 0
+            while report.status == "failed" and repairs < int(os.getenv("PLAN_VERIFY_REPAIRS", "1")):
+                repairs += 1
+                # Only the failing steps go back to the Planner
+                await (await agents())["Planner"].send(report.feedback())
+                report = await plan_verifier.verify_plan(path)
+            if report.status == "failed":
+                raise StageFailed("Verifier", report.summary())
+            if report.status == "skipped":
+                print(f"⚠ {test_case_id}: {report.summary()}", file=sys.stderr)
+                return None
+            with open(path, "r") as f:
+                plan = json.load(f)
+            if repairs:
+                record_plan(plan)
+            return {"plan": plan, "report": report.to_dict(), "verified_at": time.time()}
+
+        async def run_writer():
+            handoff = ""
+            if use_template:
+                with tracing.span("codegen", "template") as codegen_span:
+                    try:
+                        with open(path, "r") as f:
+                            result = template_codegen.generate_and_write(json.load(f), test_type)
+                    except Exception as exc:  # the LLM writer handles plans the generator chokes on
+                        result = None
+                        codegen_span.fail(exc)
+                        print(f"⚠ {test_case_id}: template codegen failed: {exc!r}", file=sys.stderr)
+                    else:
+                        codegen_span.attrs["complete"] = result.complete
+                    if result is not None and result.complete:
+                        return {
+                            "reply": f"✅ Template codegen: {result.spec_path}",
+                            "generator": "template",
+                            "files": {**dict(result.files), **read_files(story.generated_files(test_case_id))},
+                        }
+                if result is not None:
+                    handoff = "\n" + result.handoff()
+            reply = await (await agents())["PlaywrightWriterAgent"].send(
+                f"story_id: {story_id}\n"
+                f"test_case_id: {test_case_id}"
+                f"{handoff}"
+            )
+            if "❌" in reply or "✅" not in reply:
+                raise StageFailed("PlaywrightWriterAgent", last_line(reply, "no writer output"))
+            return {"reply": reply, "files": read_files(story.generated_files(test_case_id))}
+
+        def restore_writer_output(output: dict) -> bool:
+            """Put the checkpointed files back; a hit only counts when the spec is then in place."""
+            if isinstance(output.get("files"), dict):
+                restore_files(output["files"], test_case_id)
+            return any(rel_path.endswith(".spec.ts") for rel_path in story.generated_files(test_case_id))
+
+        async def plan_stages():
+            """Planner and Verifier; returns the checkpoint key the writer builds on."""
+            with tracing.span("stage", "Planner") as stage_span:
+                planner_output, planner_key, hit = await cached_stage(cache, "Planner", planner_inputs, run_planner)
+                stage_span.attrs["cached"] = hit
+            completed.append("Planner")
+            if hit:
+                cached_stages.append("Planner")
+                write_plan(path, planner_output["plan"])
+
+            if not plan_verifier.enabled():
+                return planner_key
+            with tracing.span("stage", "Verifier") as stage_span:
+                verifier_output, verifier_key, hit = await cached_stage(
+                    cache,
+                    "Verifier",
+                    {"upstream": planner_key, "version": plan_verifier.VERIFIER_VERSION},
+                    run_verifier,
+                    # The site changes while the plan does not; a verification is only reused for a while
+                    valid=plan_verifier.fresh,
+                )
+                stage_span.attrs["cached"] = hit
+            completed.append("Verifier")
+            if hit:
+                cached_stages.append("Verifier")
+                write_plan(path, verifier_output["plan"])
+            if verifier_output is None:
+                return planner_key
+            # A later verification may repair the plan under the same key, so the writer builds on its content
+            return CheckpointCache.key("Verifier", {"upstream": verifier_key, "plan": verifier_output["plan"]})
+
+        async def write_stage(upstream_key: str):
+            with tracing.span("stage", "PlaywrightWriterAgent") as stage_span:
+                _, _, hit = await cached_stage(
+                    cache,
+                    "PlaywrightWriterAgent",
+                    {
+                        "upstream": upstream_key,
+                        "template": template_codegen.TEMPLATE_VERSION if use_template else None,
+                        **registry.fingerprint("PlaywrightWriterAgent"),
+                    },
+                    run_writer,
+                    valid=restore_writer_output,
+                )
+                stage_span.attrs["cached"] = hit
+            if hit:
+                cached_stages.append("PlaywrightWriterAgent")
+
+        try:
+            if stages == "write":
+                if not os.path.exists(path):
+                    raise StageFailed("PlaywrightWriterAgent", f"no plan at {path}")
+                # The plan job's key; without one the plan is taken to be the Planner's own
+                upstream_key = job.get("upstream") or CheckpointCache.key("Planner", planner_inputs)
+            else:
+                upstream_key = await plan_stages()
+            if stages != "plan":
+                await write_stage(upstream_key)
+            result = {"status": "passed", "plan_path": path, "upstream": upstream_key}
+        except StageFailed as exc:
+            result = {"status": "failed", "stage": exc.stage, "error": exc.error}
+        except metering.BudgetExceeded as exc:
+            # Partial result: the completed stages are checkpointed, a retry resumes after them
+            result = {"status": "failed", "stage": "budget", "error": str(exc), "completed": completed}
+            if "Planner" in completed:
+                result["plan_path"] = path
+
+    usage = running["meter"].to_dict() if "meter" in running else metering.Meter().to_dict()
+    metering.write_usage(
+        "attempt", f"{story_id}/{test_case_id}", usage, attempt=job.get("attempt", 1), status=result["status"]
+    )
+    return {
+        **result,
+        "cached_stages": cached_stages,
+        "usage": usage,
+        "duration_s": round(time.time() - started_at, 2),
+    }
+
+
+def main():
+    job = json.loads(sys.stdin.read())
+    events.forward_spans()
+    with tracing.span(
+        "case",
+        job["test_case_id"],
+        test_id=f"{job['story_id']}/{job['test_case_id']}",
+        test_type=job["test_type"],
+        attempt=job.get("attempt", 1),
+    ) as case_span:
+        try:
+            result = asyncio.run(run_case(job))
+        except (Exception, SystemExit) as exc:  # fast-agent exits on config errors
+            result = {"status": "failed", "stage": "worker", "error": f"{type(exc).__name__}: {exc}"}
+        if result["status"] != "passed":
+            case_span.fail(f"{result['stage']}: {result['error']}")
+    print(RESULT_PREFIX + json.dumps(result), flush=True)
+    sys.exit(0 if result["status"] == "passed" else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Content-addressed checkpoints for agent stages.
+
+A stage (Planner, PlaywrightWriterAgent, ...) is keyed by a hash of everything
+that can change its output: the parsed manual test case, the agent instruction,
+the model and the key of the upstream checkpoint. A hit means the stage can be
+skipped entirely. Entries live in TEMP_DATA_PATH/checkpoints and the least
+recently used ones are evicted once the directory grows past `max_bytes`.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from typing import Awaitable, Callable, Optional, Tuple
+
+from pipeline.paths import temp_data_dir
+
+DEFAULT_MAX_BYTES = int(float(os.getenv("CHECKPOINT_CACHE_MAX_MB", "200")) * 1024 * 1024)
+
+
+class CheckpointCache:
+    def __init__(self, root: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root or str(temp_data_dir("checkpoints"))
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def key(stage: str, inputs: dict) -> str:
+        payload = json.dumps({"stage": stage, "inputs": inputs}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.json")
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+        os.utime(path)  # mark as recently used for eviction
+        return value
+
+    def put(self, key: str, value: dict) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+
+async def cached_stage(
+    cache: Optional[CheckpointCache],
+    stage: str,
+    inputs: dict,
+    run: Callable[[], Awaitable[Optional[dict]]],
+    valid: Optional[Callable[[dict], bool]] = None,
+) -> Tuple[Optional[dict], str, bool]:
+    """
+    Run a stage through the checkpoint cache.
+
+    Args:
+        cache (Optional[CheckpointCache]): Cache to use, or None to always run.
+        stage (str): Stage name, part of the key.
+        inputs (dict): Everything the stage output depends on.
+        run (Callable): Coroutine factory executing the stage. It returns the
+            output to store, or None when the stage failed (nothing is cached).
+        valid (Optional[Callable]): Called with a cached output; when it returns
+            False the entry is treated as a miss and the stage runs again.
+
+    Returns:
+        Tuple[Optional[dict], str, bool]: Stage output, checkpoint key and
+        whether the output came from the cache.
+    """
+    key = CheckpointCache.key(stage, inputs)
+    if cache is not None:
+        value = cache.get(key)
+        if value is not None and (valid is None or valid(value)):
+            return value, key, True
+
+    value = await run()
+    if cache is not None and value is not None:
+        cache.put(key, value)
+    return value, key, False
@@ -0,0 +1,179 @@
+"""
+Record/replay cache for LLM completions.
+
+Hooks the provider calls (pipeline/agent_hooks.py) inside the span that
+pipeline/tracing.py times them in, so replayed requests are traced as
+`cached`. A completion is keyed by the provider API, the model, the request
+parameters (tools, temperature, ...) and the message history. The ids providers generate for tool calls are
+replaced by their position, so a conversation that repeats an earlier run turn
+by turn hits the cache at every turn. Entries are JSON files in LLM_CACHE_PATH
+(default TEMP_DATA_PATH/completions); the least recently used ones are evicted
+once they take more than COMPLETION_CACHE_MAX_MB (see pipeline/checkpoints.py).
+
+Modes (LLM_CACHE):
+    off      every request goes to the provider (default)
+    write    write-through: answer from the cache, send and store misses
+    record   send every request and store the answer, e.g. to refresh entries
+    replay   strict: answer only from the cache and raise CompletionCacheMiss
+             for anything else, for tests and offline re-runs
+"""
+import contextvars
+import functools
+import hashlib
+import importlib
+import json
+import os
+from typing import Any, Optional
+
+from pipeline import agent_hooks
+from pipeline.checkpoints import CheckpointCache
+from pipeline.paths import temp_data_dir
+
+MODES = ("off", "write", "record", "replay")
+CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = int(float(os.getenv("COMPLETION_CACHE_MAX_MB", "500")) * 1024 * 1024)
+
+_replayed: contextvars.ContextVar = contextvars.ContextVar("testpilot_replayed", default=False)
+_cache: Optional["CompletionCache"] = None
+
+
+class CompletionCacheMiss(RuntimeError):
+    pass
+
+
+def mode() -> str:
+    value = (os.getenv("LLM_CACHE") or "off").lower()
+    if value not in MODES:
+        raise ValueError(f"LLM_CACHE must be one of {', '.join(MODES)}, got {value!r}")
+    return value
+
+
+def replayed() -> bool:
+    """Whether the LLM request that just returned in this context was answered from the cache."""
+    return _replayed.get()
+
+
+def _plain(value: Any) -> Any:
+    dump = getattr(value, "model_dump", None)
+    if dump is not None:
+        return _plain(dump(mode="json", exclude_none=True))
+    if isinstance(value, dict):
+        return {str(key): _plain(item) for key, item in value.items() if item is not None}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if isinstance(value, bytes):
+        return hashlib.sha256(value).hexdigest()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _is_tool_call(value: dict) -> bool:
+    # OpenAI tool calls, Anthropic tool_use blocks, Gemini function calls and responses
+    return "function" in value or value.get("type") == "tool_use" or ("name" in value and ("args" in value or "response" in value))
+
+
+def normalize(value: Any) -> Any:
+    """JSON-ready copy of a request with provider-generated tool call ids replaced by `#<n>`."""
+    ids = {}
+
+    def placeholder(call_id: str) -> str:
+        return ids.setdefault(call_id, f"#{len(ids) + 1}")
+
+    def walk(item: Any) -> Any:
+        if isinstance(item, list):
+            return [walk(element) for element in item]
+        if not isinstance(item, dict):
+            return item
+        result = {}
+        for key, element in item.items():
+            if isinstance(element, str) and (
+                key in ("tool_call_id", "tool_use_id") or (key == "id" and _is_tool_call(item))
+            ):
+                result[key] = placeholder(element)
+            else:
+                result[key] = walk(element)
+        return result
+
+    return walk(_plain(value))
+
+
+def request_key(request: dict) -> str:
+    payload = json.dumps({"version": CACHE_VERSION, "request": normalize(request)}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class CompletionCache:
+    def __init__(self, cache_mode: str, root: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.mode = cache_mode
+        self.store = CheckpointCache(
+            root or os.getenv("LLM_CACHE_PATH") or str(temp_data_dir("completions")), max_bytes
+        )
+
+    def lookup(self, key: str, model: str):
+        """The cached response for `key`, or None when it has to be sent."""
+        _replayed.set(False)
+        if self.mode in ("write", "replay"):
+            entry = self.store.get(key)
+            if entry is not None:
+                try:
+                    module, _, name = entry["type"].partition(":")
+                    response_type = functools.reduce(getattr, name.split("."), importlib.import_module(module))
+                    response = response_type.model_validate(entry["response"])
+                except (ImportError, AttributeError, KeyError, ValueError):
+                    response = None  # written by another SDK version; send it again
+                if response is not None:
+                    _replayed.set(True)
+                    return response
+        if self.mode == "replay":
+            raise CompletionCacheMiss(f"No cached completion of {model} for request {key[:16]} in {self.store.root}")
+        return None
+
+    def save(self, key: str, response) -> None:
+        if response is None or isinstance(response, BaseException) or not hasattr(response, "model_dump"):
+            return
+        response_type = type(response)
+        self.store.put(
+            key,
+            {
+                "type": f"{response_type.__module__}:{response_type.__qualname__}",
+                "response": response.model_dump(mode="json"),
+            },
+        )
+
+
+def install(refresh: bool = False) -> Optional[CompletionCache]:
+    """
+    Put the completion cache in front of the provider calls of this process.
+    Calling it again only updates `refresh`.
+
+    Args:
+        refresh (bool): Do not answer from the cache in write mode, e.g. on a
+            retry attempt, where the cached answers led to the failure.
+
+    Returns:
+        Optional[CompletionCache]: The active cache; None when LLM_CACHE is off.
+    """
+    global _cache
+    cache_mode = mode()
+    if cache_mode == "off":
+        return None
+    if refresh and cache_mode == "write":
+        cache_mode = "record"
+    if _cache is not None:
+        _cache.mode = cache_mode
+        return _cache
+    _cache = cache = CompletionCache(cache_mode)
+
+    async def cached_request(call: agent_hooks.LLMRequest, proceed) -> None:
+        # The model string names the provider; the endpoint URL is left out so recordings replay anywhere
+        key = request_key({"endpoint": call.endpoint, **call.kwargs})
+        response = cache.lookup(key, str(call.model))
+        if response is not None:
+            call.response = response
+            return
+        await proceed()
+        cache.save(key, call.response)
+
+    agent_hooks.register("completion_cache", "llm", agent_hooks.CACHE, around=cached_request)
+    return cache
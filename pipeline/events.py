@@ -0,0 +1,268 @@
+"""
+Progress events of bulk and headless runs, for dashboards and scripts.
+
+The runners publish typed events on an in-process bus; worker processes
+forward the start and end of their stages and every MCP tool call as
+EVENT_PREFIX lines on stdout, which the runner reads while the worker runs
+and republishes with the job and test case they belong to.
+
+Event types:
+    run.started / run.finished            a bulk or headless run
+    job.started / job.finished            one job of a headless run
+    case.started / case.finished          one test case, with its final status and usage
+    attempt.started / attempt.finished    one worker process
+    retry                                 an attempt failed and the next one starts
+    stage.started / stage.finished        Planner, Verifier, PlaywrightWriterAgent, ... (from the worker)
+    tool.called                           an MCP tool call, with duration and outcome (from the worker)
+
+Every event carries `type`, `seq`, `time` and `run`, plus the `job`,
+`test_id` and `attempt` it belongs to where there is one.
+
+Sinks (`--events`, repeatable, or TESTPILOT_EVENTS separated by commas):
+    jsonl:<path>        append to a JSONL file
+    stdout              NDJSON on stdout; all other output of the runner moves to stderr
+    sse[:host:port]     Server-Sent Events at http://host:port/events (default 127.0.0.1:8765);
+                        a reconnecting client gets what it missed via Last-Event-ID
+"""
+import asyncio
+import contextlib
+import contextvars
+import json
+import os
+import sys
+import time
+import uuid
+from collections import deque
+from typing import Awaitable, List, Optional
+
+from pipeline import tracing
+
+EVENT_PREFIX = "@@testpilot-event "
+EVENT_TYPES = (
+    "run.started", "run.finished",
+    "job.started", "job.finished",
+    "case.started", "case.finished",
+    "attempt.started", "attempt.finished",
+    "retry",
+    "stage.started", "stage.finished",
+    "tool.called",
+)
+SSE_HOST, SSE_PORT = "127.0.0.1", 8765
+# Events an SSE client can catch up on, and events queued per slow client
+SSE_HISTORY = 1000
+SSE_HEARTBEAT_S = 15
+
+_fields: contextvars.ContextVar = contextvars.ContextVar("testpilot_event_fields", default={})
+
+
+class JsonlSink:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.file = open(path, "a", encoding="utf-8")
+
+    def send(self, event: dict) -> None:
+        self.file.write(json.dumps(event) + "\n")
+        self.file.flush()
+
+    async def close(self) -> None:
+        self.file.close()
+
+
+class StdoutSink:
+    def __init__(self):
+        # Progress lines and tables of the runner would corrupt the stream
+        self.stream = sys.stdout
+        sys.stdout = sys.stderr
+
+    def send(self, event: dict) -> None:
+        self.stream.write(json.dumps(event) + "\n")
+        self.stream.flush()
+
+    async def close(self) -> None:
+        self.stream.flush()
+
+
+class SseSink:
+    def __init__(self, host: str = SSE_HOST, port: int = SSE_PORT):
+        self.host, self.port = host, port
+        self.history: deque = deque(maxlen=SSE_HISTORY)
+        self.clients: List[asyncio.Queue] = []
+        self.handlers = set()
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        print(f"📡 Progress events at http://{self.host}:{self.port}/events", file=sys.stderr, flush=True)
+
+    def send(self, event: dict) -> None:
+        self.history.append(event)
+        for queue in self.clients:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.handlers.add(asyncio.current_task())
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SSE_HISTORY)
+        try:
+            request = (await reader.readline()).decode(errors="replace").split()
+            headers = {}
+            while (line := (await reader.readline()).decode(errors="replace").strip()):
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if len(request) < 2 or request[0] != "GET" or request[1].split("?")[0] != "/events":
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                await writer.drain()
+                return
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                b"Connection: keep-alive\r\nAccess-Control-Allow-Origin: *\r\n\r\n"
+            )
+            last_id = headers.get("last-event-id", "")
+            last_seq = int(last_id) if last_id.isdigit() else 0
+            for event in list(self.history):
+                if event["seq"] > last_seq:
+                    queue.put_nowait(event)
+            self.clients.append(queue)
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT_S)
+                except asyncio.TimeoutError:
+                    writer.write(b": ping\n\n")
+                    await writer.drain()
+                    continue
+                if event is None:
+                    return
+                writer.write(f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n".encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if queue in self.clients:
+                self.clients.remove(queue)
+            writer.close()
+            self.handlers.discard(asyncio.current_task())
+
+    async def close(self) -> None:
+        # Connected clients get the remaining events, then the stream ends
+        for queue in self.clients:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(None)
+        if self.handlers:
+            await asyncio.wait(list(self.handlers), timeout=2)
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+
+def make_sink(spec: str):
+    kind, _, rest = spec.strip().partition(":")
+    if kind == "jsonl" and rest:
+        return JsonlSink(rest)
+    if kind == "stdout":
+        return StdoutSink()
+    if kind == "sse":
+        host, _, port = rest.rpartition(":")
+        return SseSink(host or SSE_HOST, int(port) if port else SSE_PORT)
+    raise ValueError(f"unknown event sink {spec!r} (expected jsonl:<path>, stdout or sse[:host:port])")
+
+
+class EventBus:
+    def __init__(self):
+        self.run = uuid.uuid4().hex[:12]
+        self.seq = 0
+        self.sinks: list = []
+
+    def publish(self, event_type: str, **fields) -> None:
+        if event_type not in EVENT_TYPES:
+            raise ValueError(f"unknown event type {event_type!r}")
+        if not self.sinks:
+            return
+        self.seq += 1
+        event = {"type": event_type, "seq": self.seq, "time": round(time.time(), 3), "run": self.run}
+        event.update({key: value for key, value in {**_fields.get(), **fields}.items() if value is not None})
+        for sink in self.sinks:
+            try:
+                sink.send(event)
+            except Exception as exc:  # a broken sink must not stop the run
+                print(f"Error in event sink {type(sink).__name__}: {exc}", file=sys.stderr)
+
+
+bus = EventBus()
+
+
+def publish(event_type: str, **fields) -> None:
+    """Publish an event with the fields of the enclosing `context()` blocks."""
+    bus.publish(event_type, **fields)
+
+
+@contextlib.contextmanager
+def context(**fields):
+    """Add `fields` (e.g. job, test_id) to the events published inside the block, also in its tasks."""
+    token = _fields.set({**_fields.get(), **fields})
+    try:
+        yield
+    finally:
+        _fields.reset(token)
+
+
+def configure(specs: Optional[List[str]] = None) -> None:
+    """
+    Open the sinks given on the command line, or in TESTPILOT_EVENTS. Call it
+    first thing, so that the stdout sink moves all other output to stderr.
+    """
+    specs = specs or (os.getenv("TESTPILOT_EVENTS") or "").split(",")
+    bus.sinks.extend(make_sink(spec) for spec in specs if spec.strip())
+
+
+async def serve(run: Awaitable):
+    """Await `run` with the SSE endpoints of the configured sinks up; returns its result."""
+    for sink in bus.sinks:
+        if isinstance(sink, SseSink):
+            await sink.start()
+    try:
+        return await run
+    finally:
+        sinks, bus.sinks = bus.sinks, []
+        for sink in sinks:
+            await sink.close()
+
+
+def from_worker(line: str) -> Optional[dict]:
+    """The event of an EVENT_PREFIX line of a worker's stdout, if it is one."""
+    start = line.find(EVENT_PREFIX)
+    if start < 0:
+        return None
+    try:
+        return json.loads(line[start + len(EVENT_PREFIX):])
+    except ValueError:
+        return None
+
+
+def republish(event: dict, **fields) -> None:
+    """Publish a worker event with the runner's job, test case and attempt."""
+    event = dict(event)
+    bus.publish(event.pop("type"), **{**event, **fields})
+
+
+def forward_spans() -> None:
+    """In a worker: print stage spans and tool call spans as events for the runner."""
+
+    def forward(phase: str, span: tracing.Span) -> None:
+        if span.kind == "stage":
+            event = {"type": f"stage.{'started' if phase == 'start' else 'finished'}", "stage": span.name}
+        elif span.kind == "tool" and phase == "end":
+            event = {"type": "tool.called", "tool": span.name, "agent": span.attrs.get("agent")}
+        else:
+            return
+        if phase == "end":
+            record = span.record()["data"]
+            event.update(
+                duration_ms=record["duration_ms"], outcome=record["outcome"], error=record["error"],
+                cached=span.attrs.get("cached"),
+            )
+        print(EVENT_PREFIX + json.dumps({key: value for key, value in event.items() if value is not None}), flush=True)
+
+    tracing.add_listener(forward)
+
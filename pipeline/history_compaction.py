@@ -0,0 +1,253 @@
+"""
+Compaction of agent conversation histories in long tool loops.
+
+Every browser action returns the page (a snapshot, a snapshot delta, an HTML
+outline or an HTML dump), and every file read returns the whole file.
+fast-agent keeps all of them in the history it re-sends with each request, so
+the requests late in a 40-iteration loop carry dozens of stale pages. Before
+each LLM request this module rewrites the history in place:
+
+- tool results that show a page are kept in full from the `keep_pages`-th
+  most recent full page on (snapshot deltas build on the full page before
+  them); older ones become a one-line summary with the page URL and title and
+  the elements whose refs the agent used afterwards,
+- other tool results (file reads, listings, ...) are kept in full for the
+  last `keep_results` results; older ones longer than MIN_COMPACT_CHARS are cut
+  to their first lines,
+- when the request is still larger than the agent's token budget, both
+  windows shrink until it fits or only the latest page and result remain.
+
+The rewrite changes the provider's own message objects, so fast-agent's
+stored history shrinks as well and later requests start from the compacted
+version. The OpenAI-compatible, Anthropic and Gemini message layouts are
+supported.
+
+Environment:
+    HISTORY_COMPACTION      set to off to send histories unchanged
+    HISTORY_KEEP_PAGES      full page states to keep (default 2)
+    HISTORY_KEEP_RESULTS    other tool results to keep (default 6)
+    HISTORY_BUDGET_TOKENS   request budget per agent (default 40000)
+    HISTORY_BUDGETS         JSON budgets per agent, e.g. {"Planner": 30000}
+"""
+import functools
+import json
+import os
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+from pipeline import agent_hooks
+from pipeline.tracing import payload_bytes
+
+COMPACTED_MARK = "[compacted "
+MIN_COMPACT_CHARS = 1200
+KEPT_CHARS = 300
+MAX_USED_ELEMENTS = 10
+REF_ARGUMENTS = ("ref", "startRef", "endRef")
+
+SNAPSHOT_RE = re.compile(r"- Page Snapshot")
+OUTLINE_RE = re.compile(r"^- Page Outline:", re.MULTILINE)
+DELTA_RE = re.compile(r"- Page Snapshot delta")
+HTML_RE = re.compile(r"<(html|body|head)\b", re.IGNORECASE)
+PAGE_URL_RE = re.compile(r"^- Page URL: (.*)$", re.MULTILINE)
+PAGE_TITLE_RE = re.compile(r"^- Page Title: (.*)$", re.MULTILINE)
+REF_RE = re.compile(r"\[ref=([^\]]+)\]")
+
+
+@dataclass
+class Settings:
+    keep_pages: int
+    keep_results: int
+    budget_tokens: int
+
+    @classmethod
+    def for_agent(cls, agent: Optional[str]) -> "Settings":
+        budgets = json.loads(os.getenv("HISTORY_BUDGETS") or "{}")
+        return cls(
+            keep_pages=max(1, int(os.getenv("HISTORY_KEEP_PAGES", "2"))),
+            keep_results=max(1, int(os.getenv("HISTORY_KEEP_RESULTS", "6"))),
+            budget_tokens=int(budgets.get(agent) or os.getenv("HISTORY_BUDGET_TOKENS", "40000")),
+        )
+
+
+@dataclass
+class ToolCall:
+    name: str
+    arguments: dict
+
+
+@dataclass
+class ToolResult:
+    name: str
+    text: str
+    write: Callable[[str], None]
+
+    def replace(self, text: str) -> None:
+        self.write(text)
+        self.text = text
+
+    @property
+    def compacted(self) -> bool:
+        return self.text.startswith(COMPACTED_MARK)
+
+    @property
+    def full_page(self) -> bool:
+        return (
+            bool(SNAPSHOT_RE.search(self.text) and not DELTA_RE.search(self.text))
+            or bool(OUTLINE_RE.search(self.text))
+            or bool(HTML_RE.search(self.text))
+        )
+
+    @property
+    def page(self) -> bool:
+        return self.full_page or bool(DELTA_RE.search(self.text) or PAGE_URL_RE.search(self.text))
+
+
+def enabled() -> bool:
+    return os.getenv("HISTORY_COMPACTION", "on").lower() not in ("0", "false", "off", "no")
+
+
+def _field(item: Any, name: str) -> Any:
+    return item.get(name) if isinstance(item, dict) else getattr(item, name, None)
+
+
+def _text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    return "\n".join(_field(block, "text") or "" for block in content or [] if _field(block, "type") == "text")
+
+
+def _arguments(value: Any) -> dict:
+    if isinstance(value, str):
+        try:
+            value = json.loads(value or "{}")
+        except ValueError:
+            return {}
+    return value if isinstance(value, dict) else {}
+
+
+def message_events(messages: List[Any]) -> list:
+    """Tool calls and results of an OpenAI-compatible or Anthropic message list, in order."""
+    events, names = [], {}
+    for message in messages:
+        role, content = _field(message, "role"), _field(message, "content")
+        for tool_call in _field(message, "tool_calls") or []:
+            function = _field(tool_call, "function")
+            names[_field(tool_call, "id")] = _field(function, "name")
+            events.append(ToolCall(_field(function, "name"), _arguments(_field(function, "arguments"))))
+        if role == "tool" and isinstance(message, dict):
+            events.append(ToolResult(
+                names.get(message.get("tool_call_id"), "tool"),
+                _text(content),
+                functools.partial(message.__setitem__, "content"),
+            ))
+        if isinstance(content, list):
+            for block in content:
+                if _field(block, "type") == "tool_use":
+                    names[_field(block, "id")] = _field(block, "name")
+                    events.append(ToolCall(_field(block, "name"), _arguments(_field(block, "input"))))
+                elif _field(block, "type") == "tool_result" and isinstance(block, dict):
+                    events.append(ToolResult(
+                        names.get(block.get("tool_use_id"), "tool"),
+                        _text(block.get("content")),
+                        lambda text, block=block: block.__setitem__("content", [{"type": "text", "text": text}]),
+                    ))
+    return events
+
+
+def content_events(contents: List[Any]) -> list:
+    """Function calls and responses of a Gemini contents list, in order."""
+    events = []
+    for content in contents or []:
+        for part in _field(content, "parts") or []:
+            call, response = getattr(part, "function_call", None), getattr(part, "function_response", None)
+            if call is not None:
+                events.append(ToolCall(call.name, dict(call.args or {})))
+            if response is not None:
+                data = response.response or {}
+                text = data.get("result") if isinstance(data.get("result"), str) else json.dumps(data, default=str)
+                events.append(ToolResult(
+                    response.name or "tool",
+                    text,
+                    lambda text, response=response: setattr(response, "response", {"result": text}),
+                ))
+    return events
+
+
+def summarize(result: ToolResult, used_refs: set) -> str:
+    header = f"{COMPACTED_MARK}{result.name} result, {len(result.text)} chars]"
+    if not result.page:
+        return f"{header} {result.text[:KEPT_CHARS].rstrip()} …"
+    url, title = PAGE_URL_RE.search(result.text), PAGE_TITLE_RE.search(result.text)
+    summary = header
+    if url:
+        summary += f" Page URL: {url.group(1).strip()}"
+    if title:
+        summary += f" | Page Title: {title.group(1).strip()}"
+    used = [
+        line.strip()
+        for line in result.text.splitlines()
+        if (ref := REF_RE.search(line)) and ref.group(1) in used_refs
+    ][:MAX_USED_ELEMENTS]
+    if used:
+        summary += "\nElements used afterwards (refs may be outdated):\n" + "\n".join(used)
+    return summary
+
+
+def compact(events: list, keep_pages: int, keep_results: int) -> int:
+    """
+    Replace stale tool results of `events` with summaries.
+
+    Returns:
+        int: Characters removed.
+    """
+    results = [event for event in events if isinstance(event, ToolResult)]
+    full_pages = [i for i, result in enumerate(results) if result.full_page]
+    page_cutoff = full_pages[-keep_pages] if len(full_pages) >= keep_pages else 0
+    result_cutoff = len(results) - keep_results
+
+    used_refs, later_refs = set(), {}
+    for event in reversed(events):
+        if isinstance(event, ToolCall):
+            used_refs.update(str(event.arguments[name]) for name in REF_ARGUMENTS if event.arguments.get(name))
+        else:
+            later_refs[id(event)] = set(used_refs)
+
+    removed = 0
+    for i, result in enumerate(results):
+        if result.compacted or i == len(results) - 1:
+            continue
+        if result.page:
+            stale = i < page_cutoff
+        else:
+            stale = i < result_cutoff and len(result.text) > MIN_COMPACT_CHARS
+        if stale:
+            before = len(result.text)
+            result.replace(summarize(result, later_refs[id(result)]))
+            removed += before - len(result.text)
+    return removed
+
+
+def compact_request(events: list, payload: Callable[[], Any], agent: Optional[str]) -> int:
+    """Compact with the agent's settings, shrinking the windows while the request exceeds its budget."""
+    settings = Settings.for_agent(agent)
+    keep_pages, keep_results = settings.keep_pages, settings.keep_results
+    removed = compact(events, keep_pages, keep_results)
+    while payload_bytes(payload()) // 4 > settings.budget_tokens and (keep_pages > 1 or keep_results > 1):
+        keep_pages, keep_results = max(1, keep_pages - 1), max(1, keep_results // 2)
+        removed += compact(events, keep_pages, keep_results)
+    return removed
+
+
+def _compact_request(call: agent_hooks.LLMRequest) -> None:
+    messages = call.messages
+    if not isinstance(messages, list):
+        return
+    events = content_events(messages) if call.api == "google" else message_events(messages)
+    compact_request(events, lambda: messages, call.agent_name)
+
+
+def install() -> None:
+    """Compact histories before every LLM request of this process. Calling it again is a no-op."""
+    if enabled():
+        agent_hooks.register("history_compaction", "llm", agent_hooks.COMPACTION, before=_compact_request)
@@ -0,0 +1,467 @@
+"""
+Compact outline of a page's HTML for the LLM.
+
+`playwright_get_visible_html` returns the whole (cleaned) document, most of
+which is layout markup the agent never acts on. This module streams the HTML
+through a parser that keeps only the element skeleton and emits one line per
+interactive element (links, buttons, form fields, elements with a widget
+role or click handler) and per element that carries its own text, grouped
+under the forms, dialogs and landmarks they belong to:
+
+    - Page Outline: 12 interactive and 30 text elements (HTML 48211 chars)
+    - Page URL: https://shop.example.com/login
+    form "Login" -> #login-form
+      input[text] "Username" -> [data-test="username"] | #user-name | input[name="user-name"]
+      button "Login" -> [data-test="login-button"] | #login-button
+    h3 "Epic sadface: Username is required" -> [data-test="error"]
+
+Each element carries up to three candidate selectors, best first, following
+the project's selector strategy: a test attribute (`data-test`, `data-testid`,
+...), a unique id, a combination of stable attributes, and a chain from the
+nearest ancestor that has one of those. Every candidate matches exactly one
+element of the parsed document.
+
+Outlines are cached in TEMP_DATA_PATH/outlines by URL and a hash of the HTML,
+so fetching an unchanged page again costs no parsing; the least recently used
+ones are evicted once they take more than OUTLINE_CACHE_MAX_MB (default 50).
+
+    python -m pipeline.html_outline page.html [--url URL]
+"""
+import argparse
+import bisect
+import hashlib
+import itertools
+import os
+import re
+import sys
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pipeline.checkpoints import CheckpointCache
+from pipeline.paths import temp_data_dir
+
+OUTLINE_VERSION = 1
+DEFAULT_MAX_BYTES = int(float(os.getenv("OUTLINE_CACHE_MAX_MB", "50")) * 1024 * 1024)
+CHUNK_CHARS = 64 * 1024
+MAX_ENTRIES = 400
+MAX_SELECTORS = 3
+MAX_NAME_CHARS = 80
+MAX_OPTIONS = 8
+
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr",
+}
+# Raw text (script, style) or inert content (template) that holds no elements of the page
+SKIPPED_CONTENT_TAGS = {"script", "style", "noscript", "template", "svg", "math"}
+TEST_ATTRIBUTES = (
+    "data-test", "data-testid", "data-test-id", "data-cy", "data-qa", "data-selenium", "selenium-id", "test-id",
+    "data-automation-id",
+)
+STABLE_ATTRIBUTES = ("name", "type", "placeholder", "aria-label", "role", "title", "alt", "for", "href", "value")
+INTERACTIVE_TAGS = {"a", "button", "input", "select", "textarea", "summary", "option"}
+INTERACTIVE_ROLES = {
+    "button", "link", "checkbox", "radio", "switch", "tab", "menuitem", "menuitemcheckbox", "menuitemradio",
+    "option", "combobox", "textbox", "searchbox", "slider", "spinbutton", "treeitem", "gridcell",
+}
+GROUP_TAGS = {"form", "nav", "header", "footer", "main", "aside", "dialog", "fieldset", "table"}
+GROUP_ROLES = {"dialog", "alertdialog", "navigation", "form", "tabpanel", "menu", "listbox", "search", "main"}
+# Tags that make a selector on their own when the page has only one of them
+UNIQUE_TAGS = GROUP_TAGS | {"body", "h1", "h2", "h3", "h4", "h5", "h6"}
+
+IDENTIFIER_RE = re.compile(r"^[A-Za-z_][\w-]*$")
+# Ids and classes that frameworks generate per build or per render
+GENERATED_RE = re.compile(r"\d{3,}|^:|^(ember|react-|radix-|mui-|css-|sc-|jsx-)|[0-9a-f]{6,}", re.IGNORECASE)
+HIDDEN_STYLE_RE = re.compile(r"display\s*:\s*none|visibility\s*:\s*hidden", re.IGNORECASE)
+
+
+def css_string(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ") + '"'
+
+
+def short(text: str, limit: int = MAX_NAME_CHARS) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1].rstrip() + "…"
+
+
+class Element:
+    __slots__ = ("index", "end", "tag", "attrs", "parent", "children", "text", "name", "hidden", "interactive", "group")
+
+    def __init__(self, index: int, tag: str, attrs: Dict[str, str], parent: Optional["Element"]):
+        self.index = index
+        self.end = index  # index of the last descendant
+        self.tag = tag
+        self.attrs = attrs
+        self.parent = parent
+        self.children: List["Element"] = []
+        self.text: List[str] = []  # own text
+        self.name: List[str] = []  # text of the element and its descendants, for interactive elements
+        self.hidden = bool(parent and parent.hidden) or (
+            "hidden" in attrs
+            or attrs.get("aria-hidden") == "true"
+            or (tag == "input" and attrs.get("type", "").lower() == "hidden")
+            or bool(HIDDEN_STYLE_RE.search(attrs.get("style", "")))
+        )
+        role = attrs.get("role", "")
+        self.interactive = (
+            (tag in INTERACTIVE_TAGS and (tag != "a" or "href" in attrs))
+            or role in INTERACTIVE_ROLES
+            or "onclick" in attrs
+            or attrs.get("contenteditable", "false") != "false"
+        )
+        self.group = tag in GROUP_TAGS or role in GROUP_ROLES
+
+    def ancestors(self) -> Iterable["Element"]:
+        node = self.parent
+        while node is not None:
+            yield node
+            node = node.parent
+
+    def classes(self) -> List[str]:
+        return [name for name in self.attrs.get("class", "").split() if IDENTIFIER_RE.match(name) and not GENERATED_RE.search(name)]
+
+
+class OutlineParser(HTMLParser):
+    """
+    Streaming parser: `feed()` the HTML in chunks, then `outline()`. Only the
+    element skeleton is kept, never the markup itself.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Element(0, "#document", {}, None)
+        self.stack: List[Element] = [self.root]
+        self.elements: List[Element] = []
+        self.by_attribute: Dict[Tuple[str, str], List[Element]] = {}
+        self.by_tag: Dict[str, List[Element]] = {}
+        self.matches: Dict[tuple, List[Element]] = {}
+        self.skipping: Optional[str] = None
+        self.skip_depth = 0
+        self.in_title = False
+        self.title: List[str] = []
+        self.html_chars = 0
+
+    def feed(self, data: str) -> None:
+        self.html_chars += len(data)
+        super().feed(data)
+
+    def handle_starttag(self, tag, attrs):
+        if self.skipping:
+            self.skip_depth += tag == self.skipping
+            return
+        if tag == "title":
+            self.in_title = True
+            return
+        if tag in SKIPPED_CONTENT_TAGS:
+            self.skipping, self.skip_depth = tag, 1
+            return
+        parent = self.stack[-1]
+        element = Element(len(self.elements) + 1, tag, {key: value or "" for key, value in attrs}, parent)
+        parent.children.append(element)
+        self.elements.append(element)
+        self.by_tag.setdefault(tag, []).append(element)
+        for key, value in element.attrs.items():
+            if key == "class":
+                for name in value.split():
+                    self.by_attribute.setdefault(("class", name), []).append(element)
+            else:
+                self.by_attribute.setdefault((key, value), []).append(element)
+        if tag == "img" and element.attrs.get("alt"):
+            self.add_name(element.attrs["alt"])
+        if tag not in VOID_TAGS:
+            self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in SKIPPED_CONTENT_TAGS or tag == "title":
+            return
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and not self.skipping and self.stack[-1].tag == tag:
+            self.pop(len(self.stack) - 1)
+
+    def handle_endtag(self, tag):
+        if self.skipping:
+            if tag == self.skipping:
+                self.skip_depth -= 1
+                self.skipping = self.skipping if self.skip_depth else None
+            return
+        if tag == "title":
+            self.in_title = False
+            return
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tag == tag:
+                self.pop(i)
+                break
+
+    def pop(self, depth: int) -> None:
+        for element in self.stack[depth:]:
+            element.end = len(self.elements)
+        del self.stack[depth:]
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.title.append(data)
+            return
+        if self.skipping or not data.strip():
+            return
+        self.stack[-1].text.append(data)
+        self.add_name(data)
+
+    def add_name(self, text: str) -> None:
+        for element in reversed(self.stack):
+            if element.interactive:
+                element.name.append(text)
+                break
+
+    # Selectors
+
+    def matching(self, tag: Optional[str], pairs: Iterable[Tuple[str, str]]) -> List[Element]:
+        """Elements with `tag` (any when None) and all attribute `pairs`, in document order."""
+        key = (tag, tuple(pairs))
+        if key not in self.matches:
+            found = [self.by_attribute.get(pair, []) for pair in key[1]]
+            if tag is not None:
+                found.append(self.by_tag.get(tag, []))
+            found.sort(key=len)
+            others = [set(map(id, elements)) for elements in found[1:]]
+            self.matches[key] = [element for element in found[0] if all(id(element) in ids for ids in others)] if found else []
+        return self.matches[key]
+
+    def count(self, tag: Optional[str], pairs: Iterable[Tuple[str, str]], within: Optional[Element] = None) -> int:
+        elements = self.matching(tag, pairs)
+        if within is None:
+            return len(elements)
+        indexes = [element.index for element in elements]
+        return bisect.bisect_right(indexes, within.end) - bisect.bisect_right(indexes, within.index)
+
+    def attribute_pairs(self, element: Element) -> List[Tuple[str, str]]:
+        pairs = []
+        for name in STABLE_ATTRIBUTES:
+            value = element.attrs.get(name)
+            if not value:
+                continue
+            if name == "href" and (len(value) > 80 or value.startswith(("javascript:", "#"))):
+                continue
+            if name == "value" and element.attrs.get("type", "").lower() not in ("submit", "button", "radio", "checkbox"):
+                continue
+            pairs.append((name, value))
+        pairs.extend(("class", name) for name in element.classes())
+        return pairs
+
+    @staticmethod
+    def render(tag: str, pairs: Iterable[Tuple[str, str]]) -> str:
+        selector = tag
+        for name, value in pairs:
+            selector += f".{value}" if name == "class" else f"[{name}={css_string(value)}]"
+        return selector
+
+    def anchored(self, element: Element) -> List[str]:
+        """Selectors from the element's own attributes: test attributes, id, attribute combinations."""
+        selectors = []
+        for name in TEST_ATTRIBUTES:
+            value = element.attrs.get(name)
+            if not value:
+                continue
+            if self.count(None, [(name, value)]) == 1:
+                selectors.append(f"[{name}={css_string(value)}]")
+            elif self.count(element.tag, [(name, value)]) == 1:
+                selectors.append(f"{element.tag}[{name}={css_string(value)}]")
+        element_id = element.attrs.get("id")
+        if element_id and not GENERATED_RE.search(element_id) and self.count(None, [("id", element_id)]) == 1:
+            selectors.append(f"#{element_id}" if IDENTIFIER_RE.match(element_id) else f"[id={css_string(element_id)}]")
+        if element.tag in UNIQUE_TAGS and self.count(element.tag, []) == 1:
+            selectors.append(element.tag)
+        pairs = self.attribute_pairs(element)
+        for size in (1, 2, 3):
+            found = [combo for combo in itertools.combinations(pairs, size) if self.count(element.tag, combo) == 1]
+            if found:
+                selectors.append(self.render(element.tag, found[0]))
+                break
+        return selectors
+
+    def step(self, element: Element) -> str:
+        siblings = [child for child in element.parent.children if child.tag == element.tag] if element.parent else []
+        if len(siblings) > 1:
+            return f"{element.tag}:nth-of-type({siblings.index(element) + 1})"
+        return element.tag
+
+    def fragment(self, element: Element, container: Element) -> Optional[str]:
+        """Shortest tag-and-attributes selector that matches only `element` below `container`."""
+        pairs = self.attribute_pairs(element)
+        for size in (0, 1, 2):
+            for combo in itertools.combinations(pairs, size):
+                if self.count(element.tag, combo, within=container) == 1:
+                    return self.render(element.tag, combo)
+        return None
+
+    def chain(self, element: Element, anchors: Dict[int, List[str]]) -> str:
+        """A selector from the nearest ancestor with an anchored selector (or the document) down to `element`."""
+        path = []  # ancestors below the anchor, nearest first
+        anchor, base = self.root, None
+        for ancestor in element.ancestors():
+            if ancestor is self.root:
+                break
+            if ancestor.index not in anchors:
+                anchors[ancestor.index] = self.anchored(ancestor)
+            if anchors[ancestor.index]:
+                anchor, base = ancestor, anchors[ancestor.index][0]
+                break
+            path.append(ancestor)
+        path.reverse()
+
+        steps = [self.step(node) for node in path]
+        best = " > ".join(([base] if base else []) + steps + [self.step(element)])
+        # Shorter: child steps down to a container in which the element's own attributes are unique
+        for depth, container in enumerate([anchor] + path):
+            if container is self.root:
+                continue
+            fragment = self.fragment(element, container)
+            if fragment:
+                selector = " > ".join(([base] if base else []) + steps[:depth]) + " " + fragment
+                if len(selector) < len(best):
+                    best = selector
+        return best
+
+    def selectors(self, element: Element, anchors: Dict[int, List[str]]) -> List[str]:
+        if element.index not in anchors:
+            anchors[element.index] = self.anchored(element)
+        # The parent chain is the last resort, for elements without a selector of their own
+        selectors = list(anchors[element.index]) or [self.chain(element, anchors)]
+        return list(dict.fromkeys(selectors))[:MAX_SELECTORS]
+
+    # Outline
+
+    def describe(self, element: Element) -> str:
+        attrs, tag = element.attrs, element.tag
+        kind = tag
+        if tag == "input":
+            kind = f"input[{attrs.get('type', 'text').lower()}]"
+        elif attrs.get("role") and attrs["role"] != tag:
+            kind = f"{tag}[role={attrs['role']}]"
+        name = " ".join(element.name if element.interactive else element.text)
+        if not name.strip():
+            name = attrs.get("aria-label") or attrs.get("placeholder") or attrs.get("title") or attrs.get("alt") or ""
+        line = kind + (f' "{short(name)}"' if name.strip() else "")
+        if tag == "input" and attrs.get("value") and attrs.get("type", "text").lower() not in ("password",):
+            line += f" value={css_string(short(attrs['value'], 40))}"
+        if tag == "a" and attrs.get("href") and not attrs["href"].startswith(("javascript:", "#")):
+            line += f" href={short(attrs['href'], 60)}"
+        if tag == "select":
+            options = [short(" ".join(option.name), 30) for option in self.by_tag.get("option", []) if self.inside(option, element)]
+            if options:
+                more = f" +{len(options) - MAX_OPTIONS}" if len(options) > MAX_OPTIONS else ""
+                line += " options: " + " | ".join(options[:MAX_OPTIONS]) + more
+        for flag in ("checked", "selected", "disabled", "required", "readonly"):
+            if flag in attrs:
+                line += f" {flag}"
+        return line
+
+    @staticmethod
+    def inside(element: Element, ancestor: Element) -> bool:
+        return ancestor.index < element.index <= ancestor.end
+
+    def entries(self) -> Tuple[List[Element], int, int]:
+        """Elements of the outline in document order, and the interactive and text counts."""
+        entries, interactive, text = [], 0, 0
+
+        def visit(element: Element, in_interactive: bool) -> None:
+            nonlocal interactive, text
+            if element.hidden:
+                return
+            if element.interactive and not (element.tag == "option" and element.parent and element.parent.tag in ("select", "optgroup", "datalist")):
+                entries.append(element)
+                interactive += 1
+            elif not in_interactive and element.tag != "option" and len("".join(element.text).strip()) >= 2:
+                entries.append(element)
+                text += 1
+            for child in element.children:
+                visit(child, in_interactive or element.interactive)
+
+        for child in self.root.children:
+            visit(child, False)
+        return entries, interactive, text
+
+    def outline(self, url: Optional[str] = None, scope: Optional[str] = None) -> str:
+        self.close()
+        self.pop(0)
+        entries, interactive, text = self.entries()
+        lines = [
+            f"- Page Outline: {interactive} interactive and {text} text elements (HTML {self.html_chars} chars)",
+        ]
+        if url:
+            lines.append(f"- Page URL: {url}")
+        if self.title and "".join(self.title).strip():
+            lines.append(f"- Page Title: {short(''.join(self.title))}")
+        if scope:
+            lines.append(f"- Scope: {scope}")
+        lines.append("Selectors are listed best first and each matches one element of the page.")
+
+        anchors: Dict[int, List[str]] = {}
+
+        def candidates(element: Element) -> List[str]:
+            # Selectors of a section are only unique within it, so they are prefixed with its selector
+            return [f"{scope} {selector}" if scope else selector for selector in self.selectors(element, anchors)]
+
+        shown_groups: Dict[int, int] = {}  # group element index -> depth
+        for element in entries[:MAX_ENTRIES]:
+            groups = [ancestor for ancestor in element.ancestors() if ancestor.group][::-1]
+            for depth, group in enumerate(groups):
+                if group.index not in shown_groups:
+                    shown_groups[group.index] = depth
+                    label = group.attrs.get("aria-label") or group.attrs.get("name") or ""
+                    line = group.tag + (f' "{short(label)}"' if label else "")
+                    selectors = candidates(group)
+                    lines.append("  " * depth + line + (" -> " + " | ".join(selectors) if selectors else ""))
+            selectors = candidates(element)
+            lines.append("  " * len(groups) + self.describe(element) + " -> " + " | ".join(selectors))
+        if len(entries) > MAX_ENTRIES:
+            lines.append(f"… {len(entries) - MAX_ENTRIES} more elements; fetch a section with `selector` to see them.")
+        if not entries:
+            lines.append("(no visible interactive or text elements)")
+        return "\n".join(lines)
+
+
+def outline_key(url: Optional[str], scope: Optional[str], dom_hash: str) -> str:
+    payload = f"{OUTLINE_VERSION}\n{url or ''}\n{scope or ''}\n{dom_hash}"
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class OutlineCache:
+    def __init__(self, root: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.store = CheckpointCache(root or str(temp_data_dir("outlines")), max_bytes)
+
+    def outline(self, html: str, url: Optional[str] = None, scope: Optional[str] = None) -> str:
+        """The outline of `html`, from the cache when this URL had the same HTML before."""
+        dom_hash = hashlib.sha256(html.encode("utf-8", errors="replace")).hexdigest()
+        key = outline_key(url, scope, dom_hash)
+        entry = self.store.get(key)
+        if entry is not None:
+            return entry["outline"]
+        outline = page_outline(html, url, scope)
+        self.store.put(key, {"url": url, "scope": scope, "outline": outline})
+        return outline
+
+
+def page_outline(html: str, url: Optional[str] = None, scope: Optional[str] = None) -> str:
+    parser = OutlineParser()
+    for start in range(0, len(html), CHUNK_CHARS):
+        parser.feed(html[start:start + CHUNK_CHARS])
+    return parser.outline(url, scope)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print the outline of an HTML page.")
+    parser.add_argument("path", nargs="?", help="HTML file; stdin when omitted.")
+    parser.add_argument("--url")
+    args = parser.parse_args(argv)
+
+    outline_parser = OutlineParser()
+    with open(args.path, "r", encoding="utf-8", errors="replace") if args.path else sys.stdin as f:
+        for chunk in iter(lambda: f.read(CHUNK_CHARS), ""):
+            outline_parser.feed(chunk)
+    outline = outline_parser.outline(args.url)
+    print(outline)
+    print(f"\n{outline_parser.html_chars} chars of HTML -> {len(outline)} chars of outline", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""
+Parser and section index for manual test case files.
+
+`<test_type>_test_cases.md` comes in two formats: ManualTestAgent's
+`### ID: <id>` heading template with `**Title:**`, `**Preconditions:**`,
+`**Steps:**` and `**Expected Result:**` fields, and the orchestrator's
+Markdown table with an `| ID | Title | Preconditions | Steps | ... |` header.
+Both are parsed into `ManualCase` records. The index of a file (test case
+ID -> byte offset, length and fields) is cached under TEMP_DATA_PATH/cases
+and reused for as long as the file hash is unchanged, so agents receive only
+their own test case instead of reading the whole file.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from pipeline.paths import temp_data_dir
+
+INDEX_VERSION = 2
+
+HEADING_RE = re.compile(r"^(#+)\s*ID:\s*\**\s*\[?([^\]\s*]+)\]?\**\s*$")
+ANY_HEADING_RE = re.compile(r"^(#+)\s")
+FIELD_RE = re.compile(r"^\s*(?:[-*]\s+)?\*\*([A-Za-z ()/]+?):?\*\*:?\s*(.*)$")
+SEPARATOR_RE = re.compile(r"^\|?[\s:|-]+\|?$")
+STEP_RE = re.compile(r"(?:^|\n)\s*(?:\d+[.)]|[-*])\s+")
+URL_RE = re.compile(r"https?://[^\s`'\"<>)\]|]+[^\s`'\"<>)\]|.,;:]")
+RULE_RE = re.compile(r"^([-*_])\1{2,}$")
+BR_RE = re.compile(r"<br\s*/?>", re.IGNORECASE)
+
+# Heading fields and table columns -> ManualCase attribute
+FIELD_NAMES = {
+    "title": "title",
+    "preconditions": "preconditions",
+    "precondition": "preconditions",
+    "starting url": "starting_url",
+    "start url": "starting_url",
+    "initial url": "starting_url",
+    "url": "starting_url",
+    "steps": "steps",
+    "test steps": "steps",
+    "expected result": "expected_result",
+    "expected results": "expected_result",
+    "expected outcome": "expected_result",
+    "dependencies": "test_data",
+    "test data": "test_data",
+}
+
+
+@dataclass
+class ManualCase:
+    id: str
+    title: str = ""
+    preconditions: str = ""
+    starting_url: str = ""
+    steps: List[str] = field(default_factory=list)
+    expected_result: str = ""
+    test_data: str = ""
+    format: str = "heading"
+    # Position of the case in the file, in bytes
+    offset: int = 0
+    length: int = 0
+
+    def fields(self) -> dict:
+        """The test case content without its position in the file."""
+        data = asdict(self)
+        for key in ("format", "offset", "length"):
+            data.pop(key)
+        return data
+
+    def as_message(self) -> str:
+        """Compact Markdown rendering handed to agents instead of the whole file."""
+        lines = [f"### ID: {self.id}", f"**Title:** {self.title}"]
+        if self.preconditions:
+            lines.append(f"**Preconditions:** {self.preconditions}")
+        if self.starting_url:
+            lines.append(f"**Starting URL:** {self.starting_url}")
+        lines.append("**Steps:**")
+        lines.extend(f"{number}. {step}" for number, step in enumerate(self.steps, 1))
+        lines.append(f"**Expected Result:** {self.expected_result}")
+        if self.test_data:
+            lines.append(f"**Test Data:** {self.test_data}")
+        return "\n".join(lines)
+
+
+def _clean(value: str) -> str:
+    return BR_RE.sub("\n", value).strip().strip("[]").strip()
+
+
+def split_steps(value: str) -> List[str]:
+    """Numbered or bulleted steps; observations stay attached to their step."""
+    value = _clean(value)
+    if not value:
+        return []
+    parts = [part.strip() for part in STEP_RE.split("\n" + value) if part.strip()]
+    steps: List[str] = []
+    for part in parts:
+        # `- **Observation**: ...` belongs to the preceding action
+        if steps and re.match(r"\**observation", part, re.IGNORECASE):
+            steps[-1] += f" | {part}"
+        else:
+            steps.append(" ".join(part.split()))
+    return steps
+
+
+def _finish(case: ManualCase, raw_fields: Dict[str, str]) -> ManualCase:
+    for name, value in raw_fields.items():
+        attribute = FIELD_NAMES.get(name.strip().lower())
+        if attribute == "steps":
+            case.steps = split_steps(value)
+        elif attribute == "starting_url":
+            found = URL_RE.search(value)
+            case.starting_url = found.group(0) if found else _clean(value)
+        elif attribute:
+            setattr(case, attribute, " ".join(_clean(value).split()))
+    if not case.starting_url:
+        for text in (case.preconditions, *case.steps):
+            found = URL_RE.search(text)
+            if found:
+                case.starting_url = found.group(0)
+                break
+    return case
+
+
+def _table_cells(line: str) -> List[str]:
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|"):
+        line = line[:-1]
+    return [cell.strip() for cell in re.split(r"(?<!\\)\|", line)]
+
+
+def parse_cases(text: str) -> List[ManualCase]:
+    """All test cases of a manual test case file, in file order."""
+    lines = text.splitlines(keepends=True)
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line.encode("utf-8")))
+
+    cases: List[ManualCase] = []
+    section: Optional[dict] = None
+    columns: Optional[List[str]] = None
+    in_fence = False
+
+    def close_section(end_line: int):
+        nonlocal section
+        if section:
+            case = ManualCase(
+                id=section["id"],
+                format="heading",
+                offset=offsets[section["start"]],
+                length=offsets[end_line] - offsets[section["start"]],
+            )
+            cases.append(_finish(case, section["fields"]))
+        section = None
+
+    for number, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+
+        heading = HEADING_RE.match(stripped)
+        if heading:
+            close_section(number)
+            section = {"id": heading.group(2), "level": len(heading.group(1)), "start": number,
+                       "fields": {}, "current": None}
+            continue
+        other_heading = ANY_HEADING_RE.match(stripped)
+        if section and other_heading and len(other_heading.group(1)) <= section["level"]:
+            close_section(number)
+
+        if stripped.startswith("|"):
+            cells = _table_cells(stripped)
+            if cells and cells[0].strip("* ").lower() == "id":
+                # A table ends the heading case before it
+                close_section(number)
+                columns = [cell.strip("* ") for cell in cells]
+            elif columns and not SEPARATOR_RE.match(stripped):
+                case_id = cells[0].strip("*[] `")
+                if case_id:
+                    case = ManualCase(
+                        id=case_id,
+                        format="table",
+                        offset=offsets[number],
+                        length=offsets[number + 1] - offsets[number],
+                    )
+                    cases.append(_finish(case, dict(zip(columns[1:], cells[1:]))))
+            continue
+        columns = None
+
+        if section:
+            if RULE_RE.match(stripped):
+                section["current"] = None
+                continue
+            field_match = FIELD_RE.match(line)
+            if field_match and field_match.group(1).strip().lower() in FIELD_NAMES:
+                section["current"] = field_match.group(1).strip()
+                section["fields"][section["current"]] = field_match.group(2)
+            elif section["current"]:
+                section["fields"][section["current"]] += "\n" + line.rstrip("\n")
+
+    close_section(len(lines))
+    return cases
+
+
+def manual_case_path(story_id: str, test_type: str) -> str:
+    folder = os.getenv("MANUAL_TEST_CASE_FOLDER_PATH") or ""
+    return os.path.join(folder, story_id, f"{test_type}_test_cases.md")
+
+
+class ManualCaseIndex:
+    """Test case ID -> byte offset, length and fields, cached by file hash."""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or str(temp_data_dir("cases"))
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _cache_path(self, path: str) -> str:
+        digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"cases_{digest}.json")
+
+    def index(self, path: str) -> Dict[str, dict]:
+        """
+        Index of one manual test case file.
+
+        Returns:
+            Dict[str, dict]: Test case ID -> ManualCase fields (including
+            `offset` and `length`). Empty when the file does not exist.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return {}
+        file_hash = hashlib.sha256(data).hexdigest()
+
+        cache_path = self._cache_path(path)
+        try:
+            with open(cache_path, "r") as f:
+                cached = json.load(f)
+            if cached.get("version") == INDEX_VERSION and cached.get("sha256") == file_hash:
+                return cached["cases"]
+        except (OSError, ValueError):
+            pass
+
+        cases = {}
+        for case in parse_cases(data.decode("utf-8", errors="replace")):
+            # The first definition wins, like a reader scanning the file
+            cases.setdefault(case.id, asdict(case))
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"version": INDEX_VERSION, "sha256": file_hash, "cases": cases}, f)
+        os.replace(tmp_path, cache_path)
+        return cases
+
+    def get(self, path: str, test_case_id: str) -> Optional[ManualCase]:
+        entry = self.index(path).get(test_case_id)
+        return ManualCase(**entry) if entry else None
+
+    def raw_section(self, path: str, test_case_id: str) -> Optional[str]:
+        """The original Markdown of one test case, read by seeking to its offset."""
+        entry = self.index(path).get(test_case_id)
+        if entry is None:
+            return None
+        with open(path, "rb") as f:
+            f.seek(entry["offset"])
+            return f.read(entry["length"]).decode("utf-8", errors="replace").strip()
+
+
+def load_case(story_id: str, test_type: str, test_case_id: str) -> Optional[ManualCase]:
+    return ManualCaseIndex().get(manual_case_path(story_id, test_type), test_case_id)
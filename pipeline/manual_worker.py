@@ -0,0 +1,120 @@
+"""
+Generate the manual test cases of one story with ManualTestAgent in its own process.
+
+The job is read as JSON from stdin:
+
+    {"url": "https://www.bing.com", "user_story": "As a user I can search ...",
+     "story_id": "bing_search", "attempt": 1, "token_budget": 200000}
+
+`story_id` is optional; without it the agent names the folder itself and the
+name is taken from its final message. The job only passes when both
+smoke_test_cases.md and regression_test_cases.md were (re)written during this
+run. The outcome is printed as one JSON line prefixed with RESULT_PREFIX, like
+pipeline/case_worker.py does, and so are its progress events. Model routing,
+metering and budgets work as in the case worker (pipeline/model_router.py,
+pipeline/metering.py); an attempt that runs out of budget reports the test
+case files it already `written`.
+"""
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from typing import Optional
+
+import config_loader  # noqa: F401  (loads .env for standalone runs)
+from agents import registry
+from pipeline import completion_cache, events, history_compaction, metering, model_router, rate_limiter, tracing
+from pipeline.case_worker import RESULT_PREFIX, last_line
+from pipeline.manual_cases import ManualCaseIndex, manual_case_path
+
+TEST_TYPES = ("smoke", "regression")
+FOLDER_RE = re.compile(r"saved in folder:\s*`([^`]+)`")
+
+
+def folder_from_reply(reply: str) -> Optional[str]:
+    match = FOLDER_RE.search(reply or "")
+    return os.path.basename(match.group(1).rstrip("/")) if match else None
+
+
+def written_since(path: str, started_at: float) -> bool:
+    try:
+        return os.path.getmtime(path) >= started_at and os.path.getsize(path) > 0
+    except OSError:
+        return False
+
+
+async def run_manual(job: dict) -> dict:
+    started_at = time.time()
+    budget = metering.Budget.from_job(job)
+    fast = registry.register("ManualTestAgent")
+    model_router.install(escalate=job.get("attempt", 1) > 1)
+    meter = metering.install(budget)
+    history_compaction.install()
+
+    def finish(result: dict) -> dict:
+        usage = meter.to_dict()
+        name = f"{result.get('story_id') or job.get('story_id') or job['url']}/manual_cases"
+        metering.write_usage("attempt", name, usage, attempt=job.get("attempt", 1), status=result["status"])
+        return {**result, "usage": usage}
+
+    message = f"URL: {job['url']}\nuser_story: {job['user_story']}"
+    if job.get("story_id"):
+        message += f"\nstory_id: {job['story_id']}"
+
+    async with fast.run() as app:
+        with tracing.span("stage", "ManualTestAgent"):
+            try:
+                reply = await app["ManualTestAgent"].send(message)
+            except metering.BudgetExceeded as exc:
+                written = [
+                    t for t in TEST_TYPES
+                    if job.get("story_id") and written_since(manual_case_path(job["story_id"], t), started_at)
+                ]
+                return finish({"status": "failed", "stage": "budget", "error": str(exc), "written": written})
+
+    story_id = job.get("story_id") or folder_from_reply(reply)
+    if not story_id:
+        return finish(
+            {"status": "failed", "stage": "ManualTestAgent", "error": last_line(reply, "no folder reported")}
+        )
+    missing = [t for t in TEST_TYPES if not written_since(manual_case_path(story_id, t), started_at)]
+    if missing:
+        return finish({
+            "status": "failed",
+            "stage": "ManualTestAgent",
+            "story_id": story_id,
+            "error": f"{', '.join(missing)} test cases not written: {last_line(reply, 'no reply')}",
+        })
+
+    index = ManualCaseIndex()
+    return finish({
+        "status": "passed",
+        "story_id": story_id,
+        "case_ids": {t: list(index.index(manual_case_path(story_id, t))) for t in TEST_TYPES},
+        "duration_s": round(time.time() - started_at, 2),
+    })
+
+
+def main():
+    job = json.loads(sys.stdin.read())
+    events.forward_spans()
+    rate_limiter.install()
+    completion_cache.install(refresh=job.get("attempt", 1) > 1)
+    tracing.instrument()
+    with tracing.span(
+        "case", "manual_cases", test_id=f"{job.get('story_id') or job['url']}/manual_cases"
+    ) as case_span:
+        try:
+            result = asyncio.run(run_manual(job))
+        except (Exception, SystemExit) as exc:  # fast-agent exits on config errors
+            result = {"status": "failed", "stage": "worker", "error": f"{type(exc).__name__}: {exc}"}
+        if result["status"] != "passed":
+            case_span.fail(f"{result['stage']}: {result['error']}")
+    print(RESULT_PREFIX + json.dumps(result), flush=True)
+    sys.exit(0 if result["status"] == "passed" else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Warm, supervised MCP servers shared by every TestPilot session.
+
+Without the supervisor each fast-agent run starts `npx @playwright/mcp` and
+`npx @modelcontextprotocol/server-filesystem` from scratch. The supervisor
+keeps pinned, locally installed copies running behind SSE endpoints instead,
+health-checks them and restarts them when they die. While it runs,
+`config_loader.load_and_create_config` points the `playwright` and
+`filesystem` servers at these endpoints, so sessions connect in milliseconds
+and nothing is resolved from the network.
+
+Usage:
+    python -m pipeline.mcp_supervisor install   # once, needs network
+    python -m pipeline.mcp_supervisor start     # foreground; Ctrl+C to stop
+    python -m pipeline.mcp_supervisor status
+    python -m pipeline.mcp_supervisor stop
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from pipeline.paths import ROOT_DIR, temp_data_dir
+
+PINNED_PACKAGES = {
+    "@playwright/mcp": os.getenv("PLAYWRIGHT_MCP_VERSION", "0.0.29"),
+    "@modelcontextprotocol/server-filesystem": os.getenv("FILESYSTEM_MCP_VERSION", "2025.3.28"),
+}
+
+BASE_PORT = int(os.getenv("MCP_SUPERVISOR_PORT", "8931"))
+HEALTH_INTERVAL = 10
+STARTUP_TIMEOUT = 60
+MAX_BACKOFF = 60
+
+
+def install_dir() -> str:
+    return str(temp_data_dir("mcp"))
+
+
+def state_path() -> str:
+    return os.path.join(install_dir(), "supervisor.json")
+
+
+def local_bin(name: str) -> str:
+    return os.path.join(install_dir(), "node_modules", ".bin", name)
+
+
+@dataclass
+class Daemon:
+    name: str
+    command: List[str]
+    port: int
+    # Proxies answer GET /health; the Playwright server only gets a TCP check
+    health_path: Optional[str] = None
+    # Name under mcp.servers in config.yaml that should use this daemon
+    serves: Optional[str] = None
+    process: Optional[asyncio.subprocess.Process] = None
+    restarts: int = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/sse"
+
+
+def build_daemons() -> List[Daemon]:
+    python = sys.executable
+    folders = [
+        path
+        for path in (os.getenv("MANUAL_TEST_CASE_FOLDER_PATH"), os.getenv("PLAYWRIGHT_PROJECT_PATH"))
+        if path
+    ]
+    playwright_upstream = Daemon(
+        name="playwright-mcp",
+        command=[local_bin("mcp-server-playwright"), "--isolated", "--port", str(BASE_PORT)],
+        port=BASE_PORT,
+    )
+    return [
+        playwright_upstream,
+        Daemon(
+            name="playwright",
+            command=[
+                python, "-m", "mcp_servers.tool_proxy", "--name", "playwright",
+                "--port", str(BASE_PORT + 1), "--snapshot-delta", "--auth-state", "--paged-results",
+                "--upstream-url", playwright_upstream.url,
+            ],
+            port=BASE_PORT + 1,
+            health_path="/health",
+            serves="playwright",
+        ),
+        Daemon(
+            name="filesystem",
+            command=[
+                python, "-m", "mcp_servers.tool_proxy", "--name", "filesystem",
+                "--port", str(BASE_PORT + 2), "--paged-results",
+                "--", local_bin("mcp-server-filesystem"), *folders,
+            ],
+            port=BASE_PORT + 2,
+            health_path="/health",
+            serves="filesystem",
+        ),
+    ]
+
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except (OSError, TypeError):
+        return False
+    return True
+
+
+def read_state() -> Optional[dict]:
+    try:
+        with open(state_path(), "r") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if pid_alive(state.get("pid")) else None
+
+
+def running_servers() -> Dict[str, dict]:
+    """
+    Server overrides for the rendered fast-agent config.
+
+    Returns:
+        Dict[str, dict]: `mcp.servers` entries pointing at supervised SSE
+        endpoints, or an empty dict when no supervisor is running (or
+        MCP_SUPERVISOR=off).
+    """
+    if os.getenv("MCP_SUPERVISOR", "").lower() == "off":
+        return {}
+    state = read_state()
+    if not state:
+        return {}
+    return {
+        name: {"transport": "sse", "url": url}
+        for name, url in state.get("servers", {}).items()
+    }
+
+
+def write_state(daemons: List[Daemon]) -> None:
+    state = {
+        "pid": os.getpid(),
+        "started_at": time.time(),
+        "servers": {d.serves: d.url for d in daemons if d.serves},
+        "pinned": PINNED_PACKAGES,
+    }
+    tmp_path = state_path() + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, state_path())
+
+
+async def healthy(daemon: Daemon) -> bool:
+    if daemon.process is None or daemon.process.returncode is not None:
+        return False
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection("127.0.0.1", daemon.port), timeout=2
+        )
+    except (OSError, asyncio.TimeoutError):
+        return False
+    try:
+        if not daemon.health_path:
+            return True
+        writer.write(f"GET {daemon.health_path} HTTP/1.0\r\nHost: 127.0.0.1\r\n\r\n".encode())
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout=2)
+        return b" 200 " in status_line
+    except (OSError, asyncio.TimeoutError):
+        return False
+    finally:
+        writer.close()
+
+
+async def start(daemon: Daemon) -> None:
+    log = open(os.path.join(install_dir(), f"{daemon.name}.log"), "ab")
+    daemon.process = await asyncio.create_subprocess_exec(
+        *daemon.command, cwd=str(ROOT_DIR), stdout=log, stderr=log
+    )
+    log.close()
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if await healthy(daemon):
+            print(f"✅ {daemon.name} ready on {daemon.url}", flush=True)
+            return
+        if daemon.process.returncode is not None:
+            break
+        await asyncio.sleep(0.5)
+    print(f"❌ {daemon.name} failed to start (see {daemon.name}.log)", flush=True)
+
+
+async def stop(daemon: Daemon) -> None:
+    if daemon.process and daemon.process.returncode is None:
+        daemon.process.terminate()
+        try:
+            await asyncio.wait_for(daemon.process.wait(), timeout=10)
+        except asyncio.TimeoutError:
+            daemon.process.kill()
+
+
+async def supervise(daemons: List[Daemon]) -> None:
+    for daemon in daemons:
+        await start(daemon)
+    write_state(daemons)
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    try:
+        while not stopping.is_set():
+            try:
+                await asyncio.wait_for(stopping.wait(), timeout=HEALTH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            if stopping.is_set():
+                break
+            for daemon in daemons:
+                if await healthy(daemon):
+                    daemon.restarts = 0
+                    continue
+                backoff = min(2 ** daemon.restarts, MAX_BACKOFF)
+                print(f"⚠ {daemon.name} is unhealthy, restarting in {backoff}s", flush=True)
+                await stop(daemon)
+                await asyncio.sleep(backoff)
+                daemon.restarts += 1
+                await start(daemon)
+    finally:
+        for daemon in reversed(daemons):
+            await stop(daemon)
+        if os.path.exists(state_path()):
+            os.remove(state_path())
+
+
+def install() -> int:
+    """Install the pinned MCP packages and the Chromium build Playwright MCP uses."""
+    packages = [f"{name}@{version}" for name, version in PINNED_PACKAGES.items()]
+    subprocess.run(["npm", "install", "--prefix", install_dir(), *packages], check=True)
+    subprocess.run([local_bin("playwright"), "install", "chromium"], check=False)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep warm MCP servers running for TestPilot sessions.")
+    parser.add_argument("command", choices=["install", "start", "status", "stop"])
+    args = parser.parse_args(argv)
+
+    import config_loader  # noqa: F401  (loads .env for the server folders)
+
+    if args.command == "install":
+        return install()
+
+    state = read_state()
+    if args.command == "status":
+        print(json.dumps(state, indent=2) if state else "MCP supervisor is not running.")
+        return 0 if state else 1
+    if args.command == "stop":
+        if state:
+            os.kill(state["pid"], signal.SIGTERM)
+        return 0
+
+    if state:
+        print(f"MCP supervisor already running (pid {state['pid']}).")
+        return 1
+    missing = [d.command[0] for d in build_daemons() if not os.path.exists(d.command[0])]
+    if missing:
+        print(f"Missing {', '.join(missing)}. Run `python -m pipeline.mcp_supervisor install` first.")
+        return 1
+    asyncio.run(supervise(build_daemons()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""
+Token and tool payload metering with budgets, per agent, job attempt and story.
+
+`install()` counts, for every agent of the worker process, the input and
+output tokens of its LLM requests and the bytes its MCP tool calls send and
+receive. Completions replayed by pipeline/completion_cache.py cost nothing.
+
+Budgets are checked before each LLM request; once one is spent the request is
+not sent and BudgetExceeded is raised, so the agent stops before its next turn
+instead of running into `max_iterations`. The workers turn it into a failed
+attempt with stage `budget` and a partial result: the stages that finished
+are checkpointed, so a retry starts from the stage that ran out. Per attempt:
+
+- `tokens`: all agents together (`token_budget`, TOKEN_BUDGET),
+- `latency_s`: seconds since the attempt started (`latency_budget_s`, LATENCY_BUDGET_S),
+- `agent_tokens`: per agent (AGENT_TOKEN_BUDGETS as JSON, e.g. {"PlaywrightWriterAgent": 150000}),
+- `tool_bytes`: tool result bytes read by all agents (TOOL_BYTES_BUDGET).
+
+A StoryBudget is shared by the attempts of all test cases of a story in the
+bulk and headless runners (`--story-token-budget`, STORY_TOKEN_BUDGET): every
+attempt gets at most the tokens the story has left, and no attempt starts once
+they are spent.
+
+The totals of each attempt and story are appended to the run log
+(fastagent.jsonl) as `testpilot.usage` records.
+"""
+import datetime
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Optional
+
+from pipeline import agent_hooks, completion_cache, tracing
+
+USAGE_NAMESPACE = "testpilot.usage"
+
+_meter: Optional["Meter"] = None
+
+
+class BudgetExceeded(RuntimeError):
+    pass
+
+
+def _number(value, cast):
+    return cast(value) if value not in (None, "") else None
+
+
+@dataclass
+class Budget:
+    tokens: Optional[int] = None
+    latency_s: Optional[float] = None
+    agent_tokens: Dict[str, int] = field(default_factory=dict)
+    tool_bytes: Optional[int] = None
+    started: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def from_job(cls, job: dict) -> "Budget":
+        agent_tokens = json.loads(os.getenv("AGENT_TOKEN_BUDGETS") or "{}")
+        return cls(
+            tokens=_number(job.get("token_budget") or os.getenv("TOKEN_BUDGET"), int),
+            latency_s=_number(job.get("latency_budget_s") or os.getenv("LATENCY_BUDGET_S"), float),
+            agent_tokens={agent: int(tokens) for agent, tokens in agent_tokens.items()},
+            tool_bytes=_number(os.getenv("TOOL_BYTES_BUDGET"), int),
+        )
+
+
+@dataclass
+class Usage:
+    tokens_in: int = 0
+    tokens_out: int = 0
+    requests: int = 0
+    tool_calls: int = 0
+    tool_bytes_in: int = 0
+    tool_bytes_out: int = 0
+
+    @property
+    def tokens(self) -> int:
+        return self.tokens_in + self.tokens_out
+
+    def add(self, other: "Usage") -> None:
+        for name, value in asdict(other).items():
+            setattr(self, name, getattr(self, name) + value)
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> "Usage":
+        return cls(**{name: (data or {}).get(name, 0) for name in cls.__dataclass_fields__})
+
+
+class Meter:
+    def __init__(self, budget: Optional[Budget] = None):
+        self.budget = budget or Budget()
+        self.agents: Dict[str, Usage] = {}
+
+    def usage(self, agent: Optional[str]) -> Usage:
+        return self.agents.setdefault(agent or "unknown", Usage())
+
+    @property
+    def total(self) -> Usage:
+        total = Usage()
+        for usage in self.agents.values():
+            total.add(usage)
+        return total
+
+    def check(self, agent: Optional[str]) -> None:
+        """Raise BudgetExceeded when the next LLM request of `agent` would go over a budget."""
+        budget, total = self.budget, self.total
+        if budget.tokens is not None and total.tokens >= budget.tokens:
+            raise BudgetExceeded(f"token budget of {budget.tokens} spent ({total.tokens} tokens used)")
+        limit = budget.agent_tokens.get(agent)
+        if limit is not None and self.usage(agent).tokens >= limit:
+            raise BudgetExceeded(f"{agent} token budget of {limit} spent ({self.usage(agent).tokens} tokens used)")
+        if budget.tool_bytes is not None and total.tool_bytes_out >= budget.tool_bytes:
+            raise BudgetExceeded(
+                f"tool payload budget of {budget.tool_bytes} bytes spent ({total.tool_bytes_out} bytes read)"
+            )
+        elapsed = time.monotonic() - budget.started
+        if budget.latency_s is not None and elapsed >= budget.latency_s:
+            raise BudgetExceeded(f"latency budget of {budget.latency_s:.0f}s spent ({elapsed:.0f}s elapsed)")
+
+    def record_request(self, agent: Optional[str], usage) -> None:
+        entry = self.usage(agent)
+        entry.requests += 1
+        if not completion_cache.replayed():
+            tokens_in, tokens_out = tracing.usage_tokens(usage)
+            entry.tokens_in += tokens_in
+            entry.tokens_out += tokens_out
+
+    def record_tool(self, agent: Optional[str], arguments, content) -> None:
+        entry = self.usage(agent)
+        entry.tool_calls += 1
+        entry.tool_bytes_in += tracing.payload_bytes(arguments)
+        entry.tool_bytes_out += tracing.payload_bytes(content)
+
+    def to_dict(self) -> dict:
+        return {**asdict(self.total), "agents": {agent: asdict(usage) for agent, usage in self.agents.items()}}
+
+
+class StoryBudget:
+    """Tokens shared by all attempts of one story's test cases, in the runner process."""
+
+    def __init__(self, tokens: Optional[int] = None):
+        self.tokens = tokens
+        self.used = Usage()
+
+    @classmethod
+    def from_value(cls, tokens: Optional[int] = None) -> "StoryBudget":
+        return cls(_number(tokens or os.getenv("STORY_TOKEN_BUDGET"), int))
+
+    @property
+    def remaining(self) -> Optional[int]:
+        return None if self.tokens is None else max(0, self.tokens - self.used.tokens)
+
+    @property
+    def spent(self) -> bool:
+        return self.remaining == 0
+
+    def attempt_budget(self, token_budget: Optional[int]) -> Optional[int]:
+        """Token budget of the next attempt: its own, capped at what the story has left."""
+        if self.remaining is None:
+            return token_budget
+        return self.remaining if token_budget is None else min(token_budget, self.remaining)
+
+    def charge(self, usage: Optional[dict]) -> None:
+        self.used.add(Usage.from_dict(usage))
+
+    def exceeded_error(self) -> str:
+        return f"story token budget of {self.tokens} spent ({self.used.tokens} tokens used)"
+
+
+def write_usage(scope: str, name: str, usage: dict, **data) -> None:
+    """Append the totals of an attempt (`scope` "attempt") or story ("story") to the run log."""
+    if not tracing.enabled():
+        return
+    tracing.write_record({
+        "level": "INFO",
+        "timestamp": datetime.datetime.now().isoformat(),
+        "namespace": USAGE_NAMESPACE,
+        "message": f"usage {scope} {name}",
+        "data": {"scope": scope, "name": name, **data, **usage},
+    })
+
+
+def install(budget: Optional[Budget] = None) -> Meter:
+    """
+    Meter the LLM requests and tool calls of this process. Calling it again
+    only replaces the budget; the counts are kept.
+    """
+    global _meter
+    if _meter is not None:
+        _meter.budget = budget or Budget()
+        return _meter
+    _meter = meter = Meter(budget)
+
+    def record_request(call: agent_hooks.LLMRequest) -> None:
+        if call.error is None:
+            meter.record_request(call.agent_name, call.usage)
+
+    agent_hooks.register(
+        "metering",
+        "llm",
+        agent_hooks.METERING,
+        before=lambda call: meter.check(call.agent_name),
+        after=record_request,
+    )
+    agent_hooks.register(
+        "metering",
+        "tool",
+        agent_hooks.METERING,
+        after=lambda call: meter.record_tool(call.agent, call.arguments, call.result.content),
+    )
+    return meter
@@ -0,0 +1,151 @@
+"""
+Per-phase model routing for agent runs.
+
+Every LLM request of an agent is sorted into a phase by the tool calls the
+agent made just before it:
+
+- `design`: the first request of an invocation, where the agent plans its work,
+- `explore`: after browser steps, file reads and lookups, i.e. the
+  snapshot / click / read loops that make up most turns,
+- `write`: after writing files or recording plans, and text-only turns.
+
+Each phase maps to a tier: `small` (MODEL_TIER_SMALL), `large`
+(MODEL_TIER_LARGE) or `agent`, the model the agent is configured with. By
+default only exploration moves to the small model, so test design and code
+keep their model. A turn that follows a failed tool call, and every turn of
+an escalated run (the bulk runner's retry attempts), use the large tier.
+
+Tiers are fast-agent model strings. A request is only re-routed when the
+tier's provider is the agent's provider, because the model is swapped on the
+provider call itself.
+
+Environment:
+    MODEL_ROUTING       set to off to keep every agent on its own model
+    MODEL_TIER_SMALL    default google.gemini-2.0-flash
+    MODEL_TIER_LARGE    default google.gemini-2.5-pro-preview-06-05
+    MODEL_ROUTES        JSON overrides, e.g. {"Planner": {"design": "large"}}
+"""
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from pipeline import agent_hooks
+
+DEFAULT_ROUTE = {"design": "agent", "explore": "small", "write": "agent"}
+ROUTES: Dict[str, Dict[str, str]] = {
+    "ManualTestAgent": dict(DEFAULT_ROUTE),
+    "Planner": dict(DEFAULT_ROUTE),
+    "PlaywrightWriterAgent": dict(DEFAULT_ROUTE),
+}
+WRITE_TOOL_RE = re.compile(r"(write_file|edit_file|create_directory|move_file|record_\w+|generate_playwright_test)$")
+
+_router: Optional["Router"] = None
+
+
+@dataclass
+class Invocation:
+    """Routing state of one agent invocation (one `generate` call)."""
+
+    agent: str
+    provider: Optional[str]
+    requests: int = 0
+    tools: List[str] = field(default_factory=list)
+    tool_failed: bool = False
+
+    def phase(self) -> str:
+        if self.requests == 0:
+            return "design"
+        if not self.tools or any(WRITE_TOOL_RE.search(name) for name in self.tools):
+            return "write"
+        return "explore"
+
+
+def enabled() -> bool:
+    return os.getenv("MODEL_ROUTING", "on").lower() not in ("0", "false", "off", "no")
+
+
+def routes() -> Dict[str, Dict[str, str]]:
+    merged = {agent: dict(route) for agent, route in ROUTES.items()}
+    overrides = json.loads(os.getenv("MODEL_ROUTES") or "{}")
+    for agent, route in overrides.items():
+        merged.setdefault(agent, dict(DEFAULT_ROUTE)).update(route)
+    return merged
+
+
+class Router:
+    def __init__(self, escalate: bool = False):
+        from mcp_agent.llm.model_factory import ModelFactory
+
+        self.escalate = escalate
+        self.routes = routes()
+        self.tiers = {}
+        for tier, default in (("small", "google.gemini-2.0-flash"), ("large", "google.gemini-2.5-pro-preview-06-05")):
+            parsed = ModelFactory.parse_model_string(os.getenv(f"MODEL_TIER_{tier.upper()}") or default)
+            self.tiers[tier] = (parsed.provider.value if parsed.provider else None, parsed.model_name)
+        self._warned = set()
+
+    def route(self, model: str, invocation: Optional[Invocation]) -> str:
+        """Model for the next request of `invocation`; `model` is the one it would use."""
+        if invocation is None:
+            return model
+        phase = invocation.phase()
+        tier = self.routes.get(invocation.agent, DEFAULT_ROUTE).get(phase, "agent")
+        if self.escalate or invocation.tool_failed:
+            tier = "large"
+        invocation.requests += 1
+        invocation.tools, invocation.tool_failed = [], False
+        if tier not in self.tiers:
+            return model
+        provider, routed = self.tiers[tier]
+        if provider != invocation.provider:
+            if tier not in self._warned:
+                self._warned.add(tier)
+                print(
+                    f"Model routing: {tier} tier is a {provider} model, "
+                    f"{invocation.agent} uses {invocation.provider}; keeping {model}",
+                    file=sys.stderr,
+                )
+            return model
+        return routed
+
+
+def invocation(call: Optional[agent_hooks.AgentCall]) -> Optional[Invocation]:
+    """Routing state of an agent invocation, created at its first request."""
+    if call is None:
+        return None
+    return call.state.setdefault("model_router", Invocation(call.name, call.provider))
+
+
+def _observe_tool(call: agent_hooks.ToolRequest) -> None:
+    current = invocation(agent_hooks.current())
+    if current is not None:
+        current.tools.append(call.name)
+        current.tool_failed = current.tool_failed or bool(call.result.isError)
+
+
+def install(escalate: bool = False) -> Optional[Router]:
+    """
+    Route the LLM requests of this process. Calling it again only replaces the
+    escalation.
+
+    Returns:
+        Optional[Router]: The active router; None when MODEL_ROUTING is off.
+    """
+    global _router
+    if not enabled():
+        return None
+    if _router is not None:
+        _router.escalate = escalate
+        return _router
+    _router = router = Router(escalate)
+
+    def route(call: agent_hooks.LLMRequest) -> None:
+        if call.model is not None:
+            call.model = router.route(call.model, invocation(call.agent))
+
+    agent_hooks.register("model_router", "llm", agent_hooks.ROUTING, before=route)
+    agent_hooks.register("model_router", "tool", agent_hooks.ROUTING, after=_observe_tool)
+    return router
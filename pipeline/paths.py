@@ -0,0 +1,23 @@
+import os
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+def temp_data_dir(*parts: str) -> Path:
+    """
+    Return a directory under TEMP_DATA_PATH, creating it if needed.
+
+    Falls back to `.testpilot/` in the project root when TEMP_DATA_PATH
+    is not set.
+
+    Args:
+        *parts (str): Sub-directories below the temp data root.
+
+    Returns:
+        Path: Path object pointing to the directory.
+    """
+    base = Path(os.getenv("TEMP_DATA_PATH") or ROOT_DIR / ".testpilot")
+    path = base.joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
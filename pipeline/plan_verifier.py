@@ -0,0 +1,577 @@
+"""
+Selector verification of Planner plans, without the LLM.
+
+After the Planner writes `<test_case_id>_plan.json`, the verifier opens the
+plan's start URL once in a fresh browser of the `playwright` MCP server and
+replays the setup steps and steps in order. Every selector (of actions and
+assertions) must match exactly one element, which must be visible; actions
+are then performed so that later steps see the page they expect, and text
+and URL assertions are compared with the page. Each selector check is a
+single `browser_run_code` call, so a plan is verified in seconds. Playwright
+MCP versions without that tool (such as the one the supervisor pins) get the
+same checks as page scripts through `browser_evaluate`, which can only check
+CSS and XPath selectors: a plan with Playwright locators (`page.getByRole(...)`)
+is then skipped as a whole, with the reason in the report, before a page is
+opened.
+
+The start URL is opened with `browser_navigate`, so the tool proxy loads the
+saved login of the site (mcp_servers/auth_state.py) for plans that start
+signed in (`requiresLogin` without setup steps), like the Planner's browser
+did. When no saved login could be restored for such a plan, verification is
+skipped instead of failing every step behind the login. Other plans start
+signed out.
+
+A verification is checkpointed for PLAN_VERIFY_TTL_H hours; after that an
+unchanged plan is checked against the live site again.
+
+The per-step report is written next to the plan as
+`<test_case_id>_verification.json`. When steps fail, the case worker sends
+only those steps back to the Planner (`VerificationReport.feedback()`) and
+verifies the repaired plan again, instead of finding out after the writer
+ran and the generated spec failed.
+
+Environment:
+    PLAN_VERIFICATION       set to off to skip the stage
+    PLAN_VERIFY_REPAIRS     Planner repair rounds for failing steps (default 1)
+    PLAN_VERIFY_TIMEOUT_MS  wait per selector and action (default 5000)
+    PLAN_VERIFY_TTL_H       hours a passed verification is reused (default 24)
+
+    python -m pipeline.plan_verifier <plan.json>
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+import yaml
+
+from pipeline.auth_state import RESTORED_NOTE
+from pipeline.template_codegen import ACTIONS, SELECTOR_RE, balanced, step_value
+
+VERIFIER_VERSION = 2
+RUN_CODE_TOOL = "browser_run_code"
+EVALUATE_TOOL = "browser_evaluate"
+NAVIGATE_TOOL = "browser_navigate"
+PLAN_TIMEOUT_S = 300
+
+OK_STATUSES = ("ok", "skipped")
+FAILURE_DETAILS = {
+    "missing": "matches no element",
+    "ambiguous": "matches {count} elements",
+    "hidden": "matches one element, but it is not visible",
+    "action_failed": "the action failed",
+    "text_mismatch": "the element does not contain the expected text",
+    "url_mismatch": "the page URL does not match",
+    "invalid": "is not a Playwright locator or selector",
+    "error": "could not be checked",
+}
+
+# Locator expression -> code run by browser_run_code; returns count, visibility, text and URL
+CHECK_CODE = """async (page) => {
+  const timeout = %(timeout)d;
+  const result = {};
+  try {
+    const locator = %(locator)s;
+    if (locator) {
+      await locator.first().waitFor({ state: 'attached', timeout }).catch(() => {});
+      result.count = await locator.count();
+      if (result.count === 1) {
+        result.visible = await locator.isVisible();
+        if (%(read_text)s) result.text = (await locator.innerText({ timeout })).slice(0, 500);
+        if (result.visible) {
+          %(action)s
+          await page.waitForLoadState('domcontentloaded', { timeout }).catch(() => {});
+        }
+      }
+    }
+  } catch (error) {
+    result.error = String(error).split('\\n')[0].slice(0, 300);
+  }
+  result.url = page.url();
+  return result;
+}"""
+ACTION_CODE = {
+    "click": "await locator.click({ timeout }); result.done = true;",
+    "fill": "await locator.fill(%(value)s, { timeout }); result.done = true;",
+    "check": "await locator.check({ timeout }); result.done = true;",
+    "selectOption": "await locator.selectOption(%(value)s, { timeout }); result.done = true;",
+}
+
+# The same check as a page script for browser_evaluate; %(find)s returns the matching elements or null
+EVALUATE_CODE = """async () => {
+  const timeout = %(timeout)d;
+  const result = {};
+  const find = () => %(find)s;
+  try {
+    let elements = find();
+    const started = Date.now();
+    while (elements && !elements.length && Date.now() - started < timeout) {
+      await new Promise((resolve) => setTimeout(resolve, 100));
+      elements = find();
+    }
+    if (elements) {
+      result.count = elements.length;
+      if (result.count === 1) {
+        const element = elements[0];
+        const box = element.getBoundingClientRect();
+        const style = getComputedStyle(element);
+        result.visible = box.width > 0 && box.height > 0 && style.visibility !== 'hidden';
+        if (%(read_text)s) result.text = (element.innerText || element.textContent || '').slice(0, 500);
+        if (result.visible) {
+          %(action)s
+        }
+      }
+    }
+  } catch (error) {
+    result.error = String(error).split('\\n')[0].slice(0, 300);
+  }
+  result.url = location.href;
+  return result;
+}"""
+# Sets the value through the element's own setter, so frameworks that track inputs see the change
+SET_VALUE = "Object.getOwnPropertyDescriptor(Object.getPrototypeOf(element), 'value').set.call(element, %(value)s);"
+EVALUATE_ACTION_CODE = {
+    "click": "element.click(); result.done = true;",
+    "fill": (
+        "element.focus(); " + SET_VALUE + " element.dispatchEvent(new Event('input', { bubbles: true }));"
+        " element.dispatchEvent(new Event('change', { bubbles: true })); result.done = true;"
+    ),
+    "check": "if (!element.checked) element.click(); result.done = true;",
+    "selectOption": (
+        "const option = Array.from(element.options || []).find("
+        "(item) => item.value === %(value)s || item.label.trim() === %(value)s);"
+        " if (option) { element.value = option.value; element.dispatchEvent(new Event('change', { bubbles: true }));"
+        " result.done = true; } else { result.error = 'no such option'; }"
+    ),
+}
+XPATH_QUERY = (
+    "((found) => Array.from({ length: found.snapshotLength }, (_, index) => found.snapshotItem(index)))"
+    "(document.evaluate(%s, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null))"
+)
+LOCATOR_CALL_RE = re.compile(r"""^(?:this\.)?page\.locator\(\s*(['"`])(.*)\1\s*\)$""", re.DOTALL)
+# Selector syntax only Playwright understands
+PLAYWRIGHT_ONLY_RE = re.compile(
+    r">>|:has-text\(|:text(?:-is|-matches)?\(|:visible|:nth-match\(|^(?:text|role|id|data-testid|internal:\w+)="
+)
+# The page navigated while a page script ran
+CONTEXT_LOST_RE = re.compile(r"context was destroyed", re.IGNORECASE)
+
+
+def enabled() -> bool:
+    return os.getenv("PLAN_VERIFICATION", "on").lower() not in ("0", "false", "off", "no")
+
+
+def js_string(value: str) -> str:
+    return json.dumps(str(value))
+
+
+def locator_expression(selector: str) -> Optional[str]:
+    """
+    JS expression for a plan selector: Playwright locators (`page.getByRole(...)`)
+    as they are, plain CSS / XPath / text selectors through `page.locator()`.
+    """
+    selector = " ".join(selector.strip().split())
+    if SELECTOR_RE.match(selector):
+        return re.sub(r"^this\.", "", selector) if balanced(selector) else None
+    if selector.startswith(("page.", "this.")) or not selector:
+        return None
+    return f"page.locator({js_string(selector)})"
+
+
+def dom_query(selector: str) -> Optional[str]:
+    """
+    Page script expression for the elements a CSS or XPath selector matches;
+    None for Playwright locators and selector syntax a page cannot evaluate.
+    """
+    selector = " ".join(selector.strip().split())
+    match = LOCATOR_CALL_RE.match(selector)
+    if match:
+        selector = match.group(2)
+    elif selector.startswith(("page.", "this.")):
+        return None
+    if selector.startswith("xpath="):
+        return XPATH_QUERY % js_string(selector[len("xpath="):])
+    if selector.startswith(("//", "(//")):
+        return XPATH_QUERY % js_string(selector)
+    if not selector or PLAYWRIGHT_ONLY_RE.search(selector):
+        return None
+    return f"Array.from(document.querySelectorAll({js_string(selector)}))"
+
+
+def ttl_s() -> float:
+    return float(os.getenv("PLAN_VERIFY_TTL_H", "24")) * 3600
+
+
+def fresh(output: dict) -> bool:
+    """Whether a checkpointed verification is recent enough to reuse."""
+    return time.time() - float(output.get("verified_at") or 0) < ttl_s()
+
+
+def url_matches(expected: str, actual: str) -> bool:
+    expected = expected.strip()
+    if expected.startswith("/") and expected.endswith("/") and len(expected) > 2:
+        try:
+            return re.search(expected[1:-1], actual) is not None
+        except re.error:
+            pass
+    return expected.rstrip("/") in actual or actual.rstrip("/") == expected.rstrip("/")
+
+
+@dataclass
+class StepCheck:
+    number: int
+    part: str  # "action" or "assertion <n>"
+    description: str
+    action: str
+    selector: Optional[str]
+    status: str = "ok"
+    detail: str = ""
+    count: Optional[int] = None
+    url: Optional[str] = None
+    # Set when an earlier step could not be replayed, so this one may fail as a consequence
+    after_failure: Optional[int] = None
+
+    @property
+    def failed(self) -> bool:
+        return self.status not in OK_STATUSES
+
+
+@dataclass
+class VerificationReport:
+    plan_path: str
+    start_url: Optional[str]
+    status: str = "passed"  # passed, failed or skipped
+    reason: str = ""
+    checks: List[StepCheck] = field(default_factory=list)
+
+    @property
+    def failing(self) -> List[StepCheck]:
+        return [check for check in self.checks if check.failed]
+
+    def to_dict(self) -> dict:
+        return {
+            "version": VERIFIER_VERSION,
+            "plan_path": self.plan_path,
+            "start_url": self.start_url,
+            "status": self.status,
+            "reason": self.reason,
+            "failing": len(self.failing),
+            "checks": [asdict(check) for check in self.checks],
+        }
+
+    def write(self) -> str:
+        path = re.sub(r"_plan\.json$", "", self.plan_path) + "_verification.json"
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    def summary(self) -> str:
+        if self.status == "skipped":
+            return f"verification skipped: {self.reason}"
+        failing = self.failing
+        if not failing:
+            return f"{len(self.checks)} checks passed"
+        first = failing[0]
+        return f"{len(failing)} of {len(self.checks)} checks failed, first: step {first.number} {first.detail}"
+
+    def feedback(self) -> str:
+        """Message for the Planner with the failing steps only."""
+        lines = [
+            f"plan_verification: the plan {self.plan_path} was replayed in a fresh browser from {self.start_url}.",
+            "These steps failed:",
+        ]
+        for check in self.failing:
+            line = f"- step {check.number} {check.part} ({check.description or check.action})"
+            if check.selector:
+                line += f", selector {check.selector}"
+            line += f": {check.detail}"
+            if check.url and check.status != "url_mismatch":
+                line += f" (page: {check.url})"
+            if check.after_failure:
+                line += f"; may follow from step {check.after_failure}"
+            lines.append(line)
+        lines.append(
+            "All other steps passed; keep them unchanged. Open the pages of the failing steps, find a selector"
+            " that matches exactly one visible element (or the correct expected value), update only these"
+            f" steps and write the plan to {self.plan_path} again."
+        )
+        return "\n".join(lines)
+
+
+def plan_items(plan: dict):
+    """(step number, part, item) for every action and assertion, numbered like template_codegen."""
+    number = 0
+    for section in ("setupSteps", "steps"):
+        for step in plan.get(section) or []:
+            number += 1
+            if not isinstance(step, dict):
+                continue
+            yield number, "action", step
+            for index, assertion in enumerate(step.get("assertions") or [], start=1):
+                if isinstance(assertion, dict):
+                    yield number, f"assertion {index}", assertion
+
+
+def page_script_unsupported(plan: dict) -> List[str]:
+    """Selectors of a plan that can only be checked through browser_run_code."""
+    selectors = []
+    for _, _, item in plan_items(plan):
+        action = ACTIONS.get(re.sub(r"[^a-z]", "", str(item.get("action") or item.get("type") or "").lower()))
+        selector = item.get("selector")
+        if action in ("navigate", "url") or not isinstance(selector, str) or not selector.strip():
+            continue
+        if locator_expression(selector) is not None and dom_query(selector) is None:
+            selectors.append(selector)
+    return selectors
+
+
+def run_code_result(result) -> dict:
+    """The JSON object browser_run_code or browser_evaluate reports in its `Result` section."""
+    text = "\n".join(getattr(item, "text", "") for item in result.content)
+    start = max(text.find("Result"), 0)
+    for opener in ("{", '"'):
+        index = text.find(opener, start)
+        while index >= 0:
+            try:
+                value, _ = json.JSONDecoder().raw_decode(text[index:])
+                # Older versions report the result as a JSON string
+                value = json.loads(value) if isinstance(value, str) else value
+            except ValueError:
+                index = text.find(opener, index + 1) if opener == "{" else -1
+                continue
+            if isinstance(value, dict):
+                return value
+            break
+    return {"error": text.strip()[:300] or "no result"}
+
+
+def step_check(number: int, part: str, item: dict) -> StepCheck:
+    raw_action = str(item.get("action") or item.get("type") or "")
+    selector = item.get("selector") if isinstance(item.get("selector"), str) else None
+    return StepCheck(number, part, item.get("description") or "", raw_action, selector)
+
+
+def result_text(result) -> str:
+    return "\n".join(getattr(item, "text", "") for item in result.content)
+
+
+class PlanVerifier:
+    def __init__(self, session, timeout_ms: Optional[int] = None):
+        self.session = session
+        self.timeout_ms = timeout_ms or int(os.getenv("PLAN_VERIFY_TIMEOUT_MS", "5000"))
+        # browser_run_code (Playwright API) or browser_evaluate (page scripts)
+        self.tool = RUN_CODE_TOOL
+
+    async def run(self, code: str) -> dict:
+        arguments = {"code": code} if self.tool == RUN_CODE_TOOL else {"function": code}
+        result = await self.session.call_tool(self.tool, arguments)
+        value = run_code_result(result)
+        if self.tool == EVALUATE_TOOL and CONTEXT_LOST_RE.search(str(value.get("error", ""))):
+            # A click navigated while the script ran; check again on the new page
+            await asyncio.sleep(0.5)
+            result = await self.session.call_tool(self.tool, arguments)
+            value = run_code_result(result)
+        if result.isError and "error" not in value:
+            value["error"] = f"{self.tool} failed"
+        return value
+
+    async def navigate(self, url: str, **arguments) -> dict:
+        """Open `url` with browser_navigate; returns the page URL, or the error, and the tool's text."""
+        result = await self.session.call_tool(NAVIGATE_TOOL, {"url": url, **arguments})
+        text = result_text(result)
+        if result.isError:
+            return {"error": text.strip()[:300] or f"{NAVIGATE_TOOL} failed", "text": text}
+        return {**await self.run(self.code(None)), "text": text}
+
+    def code(self, locator: Optional[str], action: str = "", read_text: bool = False) -> str:
+        if self.tool == EVALUATE_TOOL:
+            return EVALUATE_CODE % {
+                "timeout": self.timeout_ms,
+                "find": locator or "null",
+                "action": action,
+                "read_text": "true" if read_text else "false",
+            }
+        return CHECK_CODE % {
+            "timeout": self.timeout_ms,
+            "locator": locator or "null",
+            "action": action,
+            "read_text": "true" if read_text else "false",
+        }
+
+    async def verify(self, plan: dict, plan_path: str) -> VerificationReport:
+        start_url = plan.get("startUrl")
+        report = VerificationReport(plan_path, start_url)
+        tools = {tool.name: tool for tool in (await self.session.list_tools()).tools}
+        if RUN_CODE_TOOL not in tools:
+            if EVALUATE_TOOL not in tools:
+                report.status = "skipped"
+                report.reason = f"the Playwright MCP server has neither {RUN_CODE_TOOL} nor {EVALUATE_TOOL}"
+                return report
+            unsupported = page_script_unsupported(plan)
+            if unsupported:
+                # Checking only the CSS selectors would pass a plan whose steps mostly went unchecked
+                report.status = "skipped"
+                report.reason = (
+                    f"{len(unsupported)} selectors are Playwright locators (e.g. {unsupported[0]}), which need"
+                    f" {RUN_CODE_TOOL}; the Playwright MCP server only has {EVALUATE_TOOL}"
+                )
+                return report
+            self.tool = EVALUATE_TOOL
+
+        if start_url:
+            signed_in = (plan.get("preconditions") or {}).get("requiresLogin") and not plan.get("setupSteps")
+            arguments = {}
+            navigate_tool = tools.get(NAVIGATE_TOOL)
+            if navigate_tool and "fresh_session" in (navigate_tool.inputSchema or {}).get("properties", {}):
+                # Plans with login steps replay them, so only signed-in plans get the saved login
+                arguments["fresh_session"] = not signed_in
+            opened = await self.navigate(start_url, **arguments)
+            if opened.get("error"):
+                report.status, report.reason = "skipped", f"could not open {start_url}: {opened['error']}"
+                return report
+            if signed_in and RESTORED_NOTE not in opened["text"]:
+                report.status = "skipped"
+                report.reason = f"the plan starts signed in, but no saved login for {start_url} could be restored"
+                return report
+
+        blocked_by = None
+        for number, part, item in plan_items(plan):
+            check = await self.check(number, part, item)
+            if check.failed and blocked_by:
+                check.after_failure = blocked_by
+            if check.failed and part == "action" and not blocked_by:
+                blocked_by = number
+            report.checks.append(check)
+        report.status = "failed" if report.failing else "passed"
+        return report
+
+    async def check(self, number: int, part: str, item: dict) -> StepCheck:
+        check = step_check(number, part, item)
+        raw_action, selector = check.action, check.selector
+        action = ACTIONS.get(re.sub(r"[^a-z]", "", raw_action.lower()))
+
+        if action == "navigate":
+            url = step_value(item, "url", "value")
+            if not url:
+                check.status, check.detail = "skipped", "navigate step without a URL"
+                return check
+            value = await self.navigate(url)
+            check.url = value.get("url")
+            if value.get("error"):
+                check.status, check.detail = "error", f"navigation failed: {value['error']}"
+            return check
+
+        if action == "url":
+            expected = step_value(item, "expected", "value", "url")
+            value = await self.run(self.code(None))
+            check.url = value.get("url")
+            if expected and check.url and not url_matches(expected, check.url):
+                check.status, check.detail = "url_mismatch", f"expected URL {expected!r}, page is at {check.url}"
+            return check
+
+        if not selector:
+            check.status, check.detail = "skipped", "no selector to verify"
+            return check
+        locator = locator_expression(selector)
+        if locator is None:
+            check.status, check.detail = "invalid", FAILURE_DETAILS["invalid"]
+            return check
+        action_code = ACTION_CODE
+        if self.tool == EVALUATE_TOOL:
+            # verify() skips plans with selectors that have no page script equivalent
+            locator, action_code = dom_query(selector), EVALUATE_ACTION_CODE
+
+        code = ""
+        if action in action_code:
+            value = step_value(item, "value", "text", "option")
+            code = action_code[action] % {"value": js_string(value if value is not None else "")}
+        expected_text = step_value(item, "expected", "value", "text") if action == "text" else None
+        value = await self.run(self.code(locator, action=code, read_text=expected_text is not None))
+        check.count, check.url = value.get("count"), value.get("url")
+
+        if value.get("error") and check.count is None:
+            check.status, check.detail = "error", f"{FAILURE_DETAILS['error']}: {value['error']}"
+        elif not check.count:
+            check.status, check.detail = "missing", FAILURE_DETAILS["missing"]
+        elif check.count > 1:
+            check.status, check.detail = "ambiguous", FAILURE_DETAILS["ambiguous"].format(count=check.count)
+        elif not value.get("visible"):
+            check.status, check.detail = "hidden", FAILURE_DETAILS["hidden"]
+        elif code and not value.get("done"):
+            check.status, check.detail = "action_failed", f"{FAILURE_DETAILS['action_failed']}: {value.get('error')}"
+        elif expected_text is not None and expected_text.strip().lower() not in (value.get("text") or "").lower():
+            check.status = "text_mismatch"
+            check.detail = f"expected text {expected_text!r}, element shows {(value.get('text') or '')[:120]!r}"
+        elif action is None and raw_action:
+            check.detail = f"selector verified; '{raw_action}' was not replayed"
+        return check
+
+
+@contextlib.asynccontextmanager
+async def browser_session(config_file: Optional[str] = None):
+    """An MCP client session with the `playwright` server of the rendered fast-agent config."""
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.sse import sse_client
+    from mcp.client.stdio import stdio_client
+
+    if config_file is None:
+        from config_loader import config_path
+
+        config_file = config_path()
+    with open(config_file, "r") as f:
+        server = yaml.safe_load(f)["mcp"]["servers"]["playwright"]
+
+    async with contextlib.AsyncExitStack() as stack:
+        if server.get("url"):
+            read, write = await stack.enter_async_context(sse_client(server["url"]))
+        else:
+            params = StdioServerParameters(
+                command=server["command"],
+                args=[str(arg) for arg in server.get("args", [])],
+                env={**os.environ, **{key: str(value) for key, value in (server.get("env") or {}).items()}},
+                cwd=server.get("cwd"),
+            )
+            read, write = await stack.enter_async_context(stdio_client(params))
+        session = await stack.enter_async_context(ClientSession(read, write))
+        await session.initialize()
+        yield session
+
+
+async def verify_plan(plan_path: str) -> VerificationReport:
+    """Verify the plan at `plan_path` in a fresh browser and write its report next to it."""
+    with open(plan_path, "r") as f:
+        plan = json.load(f)
+    try:
+        async with browser_session() as session:
+            report = await asyncio.wait_for(PlanVerifier(session).verify(plan, plan_path), PLAN_TIMEOUT_S)
+            with contextlib.suppress(Exception):
+                await session.call_tool("browser_close", {})
+    except Exception as exc:  # the browser server is unavailable; the plan stays unverified
+        report = VerificationReport(plan_path, plan.get("startUrl"), "skipped", f"{type(exc).__name__}: {exc}")
+    report.write()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a plan.json in a browser and check every selector.")
+    parser.add_argument("plan_path")
+    args = parser.parse_args(argv)
+
+    import config_loader  # noqa: F401  (loads .env)
+
+    report = asyncio.run(verify_plan(args.plan_path))
+    for check in report.checks:
+        mark = "✅" if not check.failed else "❌"
+        print(f"{mark} step {check.number} {check.part}: {check.selector or check.action}  {check.detail}".rstrip())
+    print(report.summary())
+    return 0 if report.status != "failed" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
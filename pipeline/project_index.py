@@ -0,0 +1,347 @@
+"""
+Incremental index of the Playwright project at PLAYWRIGHT_PROJECT_PATH.
+
+Instead of letting PlaywrightWriterAgent list and read every file under
+`pages/`, `tests/`, `utils/`, `fixtures/` and `data/` for each test case, the
+project is parsed here once: page object classes with their base class,
+readonly locators and method signatures, exported utilities, fixtures, test
+titles, data file shapes and the `baseURL` from `playwright.config.ts`. The
+index is persisted under TEMP_DATA_PATH/index and only files whose mtime
+changed are parsed again.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+from typing import Dict, List, Optional
+
+from pipeline.paths import temp_data_dir
+
+INDEX_VERSION = 1
+SCANNED_DIRS = {
+    "pages": "page",
+    "tests": "test",
+    "utils": "util",
+    "fixtures": "fixture",
+    "data": "data",
+}
+CONFIG_FILES = ("playwright.config.ts", "playwright.config.js")
+SOURCE_EXTENSIONS = (".ts", ".js")
+SKIPPED_DIRS = {"node_modules", ".git", "test-results", "playwright-report"}
+
+CLASS_RE = re.compile(r"(?:export\s+)?(?:default\s+)?class\s+(\w+)(?:\s+extends\s+([\w.]+))?[^{]*\{")
+METHOD_RE = re.compile(
+    r"^[ \t]*(?:(?:public|private|protected|static|readonly)\s+)*(async\s+)?(\w+)\s*\(([^)]*)\)\s*(?::\s*([^{;]+?))?\s*\{",
+    re.MULTILINE,
+)
+READONLY_LOCATOR_RE = re.compile(r"readonly\s+(\w+)\s*:\s*Locator")
+LOCATOR_ASSIGN_RE = re.compile(r"this\.(\w+)\s*=\s*((?:this\.)?page\.(?:getBy\w+|locator)\([^;]*)\s*;")
+FUNCTION_RE = re.compile(
+    r"export\s+(?:async\s+)?function\s+(\w+)\s*\(([^)]*)\)|export\s+const\s+(\w+)\s*=\s*(?:async\s*)?\(([^)]*)\)\s*(?::[^=]+)?=>"
+)
+FIXTURE_EXTEND_RE = re.compile(r"\.extend\s*(?:<[^>]*>)?\s*\(\s*\{")
+FIXTURE_NAME_RE = re.compile(r"^\s*(\w+)\s*:\s*async\s*\(", re.MULTILINE)
+TEST_TITLE_RE = re.compile(r"\btest(?:\.describe)?(?:\.only|\.skip)?\s*\(\s*(['\"`])(.+?)\1")
+DESCRIBE_RE = re.compile(r"\btest\.describe(?:\.only|\.skip)?\s*\(\s*(['\"`])(.+?)\1")
+IMPORT_RE = re.compile(r"import\s+(?:[^'\"]+)\s+from\s+['\"]([^'\"]+)['\"]")
+BASE_URL_RE = re.compile(r"baseURL\s*:\s*([^,\n]+)")
+KEYWORDS = {"if", "for", "while", "switch", "catch", "function", "return", "constructor"}
+
+
+def mask_source(text: str) -> str:
+    """
+    Blank out comments and string contents while keeping offsets intact, so
+    braces can be counted and regexes cannot match inside literals.
+    """
+    out = list(text)
+    i, length = 0, len(text)
+    while i < length:
+        char = text[i]
+        if text.startswith("//", i):
+            end = text.find("\n", i)
+            end = length if end == -1 else end
+            out[i:end] = " " * (end - i)
+            i = end
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            end = length if end == -1 else end + 2
+            out[i:end] = [c if c == "\n" else " " for c in text[i:end]]
+            i = end
+        elif char in "'\"`":
+            j = i + 1
+            while j < length and text[j] != char:
+                j += 2 if text[j] == "\\" else 1
+            out[i + 1:j] = [c if c == "\n" else " " for c in text[i + 1:j]]
+            i = j + 1
+        else:
+            i += 1
+    return "".join(out)
+
+
+def block_end(masked: str, open_brace: int) -> int:
+    """Index just past the brace matching the one at `open_brace`."""
+    depth = 0
+    for i in range(open_brace, len(masked)):
+        if masked[i] == "{":
+            depth += 1
+        elif masked[i] == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return len(masked)
+
+
+def top_level(masked_body: str, position: int) -> bool:
+    """True when `position` is directly inside the class body (depth 1)."""
+    return masked_body.count("{", 0, position) - masked_body.count("}", 0, position) == 1
+
+
+def parse_classes(text: str, masked: str) -> List[dict]:
+    classes = []
+    for match in CLASS_RE.finditer(masked):
+        start = match.end() - 1
+        end = block_end(masked, start)
+        body, masked_body = text[start:end], masked[start:end]
+
+        methods = []
+        for method in METHOD_RE.finditer(masked_body):
+            name = method.group(2)
+            if name in KEYWORDS or not top_level(masked_body, method.start(2)):
+                continue
+            params = body[method.start(3):method.end(3)].strip()
+            returns = body[method.start(4):method.end(4)].strip() if method.group(4) else None
+            signature = f"{'async ' if method.group(1) else ''}{name}({params})"
+            methods.append(signature + (f": {returns}" if returns else ""))
+
+        locators = {name: None for name in READONLY_LOCATOR_RE.findall(masked_body)}
+        for assign in LOCATOR_ASSIGN_RE.finditer(masked_body):
+            locators[assign.group(1)] = " ".join(body[assign.start(2):assign.end(2)].split())
+
+        classes.append(
+            {
+                "name": match.group(1),
+                "extends": match.group(2),
+                "locators": locators,
+                "methods": methods,
+            }
+        )
+    return classes
+
+
+def parse_functions(text: str, masked: str) -> List[str]:
+    functions = []
+    for match in FUNCTION_RE.finditer(masked):
+        name_group, params_group = (1, 2) if match.group(1) else (3, 4)
+        params = text[match.start(params_group):match.end(params_group)].strip()
+        functions.append(f"{match.group(name_group)}({params})")
+    return functions
+
+
+def parse_fixtures(text: str, masked: str) -> List[str]:
+    fixtures = []
+    for match in FIXTURE_EXTEND_RE.finditer(masked):
+        start = match.end() - 1
+        body = masked[start:block_end(masked, start)]
+        fixtures.extend(
+            name.group(1)
+            for name in FIXTURE_NAME_RE.finditer(body)
+            if body.count("{", 0, name.start()) - body.count("}", 0, name.start()) == 1
+        )
+    return fixtures
+
+
+def json_shape(value, depth: int = 0, max_depth: int = 3):
+    """Keys and value types of a data file, without the (possibly large) values."""
+    if isinstance(value, dict):
+        if depth >= max_depth:
+            return "{...}"
+        return {key: json_shape(item, depth + 1, max_depth) for key, item in value.items()}
+    if isinstance(value, list):
+        return [json_shape(value[0], depth + 1, max_depth)] if value else []
+    return type(value).__name__
+
+
+def parse_file(path: str, kind: str) -> dict:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        text = f.read()
+
+    if kind == "data":
+        if not path.endswith(".json"):
+            return {}
+        try:
+            return {"shape": json_shape(json.loads(text))}
+        except ValueError:
+            return {"error": "invalid JSON"}
+
+    masked = mask_source(text)
+    entry = {"imports": [i for i in IMPORT_RE.findall(text) if i.startswith(".")]}
+    classes = parse_classes(text, masked)
+    if classes:
+        entry["classes"] = classes
+    functions = parse_functions(text, masked)
+    if functions:
+        entry["functions"] = functions
+    fixtures = parse_fixtures(text, masked)
+    if fixtures:
+        entry["fixtures"] = fixtures
+    if kind == "test":
+        entry["describes"] = [m.group(2) for m in DESCRIBE_RE.finditer(text)]
+        entry["tests"] = [
+            m.group(2) for m in TEST_TITLE_RE.finditer(text) if m.group(2) not in entry["describes"]
+        ]
+        entry["uses_before_each"] = "beforeEach" in masked
+    return entry
+
+
+def parse_base_url(text: str) -> Optional[str]:
+    match = BASE_URL_RE.search(mask_source(text))
+    if not match:
+        return None
+    return text[match.start(1):match.end(1)].strip()
+
+
+class ProjectIndex:
+    def __init__(self, project_path: Optional[str] = None, index_path: Optional[str] = None):
+        self.project_path = os.path.abspath(project_path or os.getenv("PLAYWRIGHT_PROJECT_PATH") or ".")
+        digest = hashlib.sha1(self.project_path.encode()).hexdigest()[:12]
+        self.index_path = index_path or str(temp_data_dir("index") / f"project_{digest}.json")
+        self.data = self._load()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.index_path, "r") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION and data.get("project") == self.project_path:
+                return data
+        except (OSError, ValueError):
+            pass
+        return {"version": INDEX_VERSION, "project": self.project_path, "base_url": None, "files": {}}
+
+    def _save(self) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.index_path)), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.data, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _project_files(self) -> Dict[str, str]:
+        """Relative path -> kind for every file the index covers."""
+        files = {}
+        for name in CONFIG_FILES:
+            if os.path.isfile(os.path.join(self.project_path, name)):
+                files[name] = "config"
+        for folder, kind in SCANNED_DIRS.items():
+            root = os.path.join(self.project_path, folder)
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = [d for d in dirnames if d not in SKIPPED_DIRS]
+                for filename in filenames:
+                    if kind == "data" and not filename.endswith(".json"):
+                        continue
+                    if kind != "data" and not filename.endswith(SOURCE_EXTENSIONS):
+                        continue
+                    full_path = os.path.join(dirpath, filename)
+                    files[os.path.relpath(full_path, self.project_path)] = kind
+        return files
+
+    def refresh(self) -> int:
+        """
+        Re-parse files that are new or changed since the last refresh.
+
+        Returns:
+            int: Number of files that were (re)parsed or dropped.
+        """
+        changed = 0
+        current = self._project_files()
+        indexed = self.data["files"]
+
+        for rel_path in list(indexed):
+            if rel_path not in current:
+                del indexed[rel_path]
+                changed += 1
+
+        for rel_path, kind in current.items():
+            full_path = os.path.join(self.project_path, rel_path)
+            try:
+                mtime = os.path.getmtime(full_path)
+            except OSError:
+                continue
+            if rel_path in indexed and indexed[rel_path]["mtime"] == mtime:
+                continue
+            if kind == "config":
+                with open(full_path, "r", encoding="utf-8", errors="replace") as f:
+                    entry = {"base_url": parse_base_url(f.read())}
+            else:
+                entry = parse_file(full_path, kind)
+            indexed[rel_path] = {"kind": kind, "mtime": mtime, **entry}
+            changed += 1
+
+        self.data["base_url"] = next(
+            (entry.get("base_url") for entry in indexed.values() if entry["kind"] == "config"),
+            None,
+        )
+        if changed:
+            self._save()
+        return changed
+
+    def files(self, kind: str):
+        return {path: entry for path, entry in sorted(self.data["files"].items()) if entry["kind"] == kind}
+
+    def page_objects(self) -> Dict[str, dict]:
+        """Class name -> class info (plus its file) for every class under pages/."""
+        classes = {}
+        for path, entry in self.files("page").items():
+            for cls in entry.get("classes", []):
+                classes[cls["name"]] = {**cls, "file": path}
+        return classes
+
+    def summary(self) -> str:
+        """Compact overview of every reusable asset in the project."""
+        lines = [f"Project: {self.project_path}", f"baseURL: {self.data['base_url'] or 'NOT SET'}", ""]
+
+        lines.append("Page objects:")
+        for name, cls in self.page_objects().items():
+            base = f" extends {cls['extends']}" if cls["extends"] else ""
+            methods = ", ".join(m.split("(")[0].replace("async ", "") for m in cls["methods"])
+            lines.append(f"- {name}{base} ({cls['file']}): locators [{', '.join(cls['locators'])}]; methods [{methods}]")
+
+        for kind, title in (("util", "Utilities"), ("fixture", "Fixtures")):
+            lines.append(f"\n{title}:")
+            for path, entry in self.files(kind).items():
+                names = entry.get("functions", []) + entry.get("fixtures", [])
+                lines.append(f"- {path}: {', '.join(names) or '(no exports found)'}")
+
+        lines.append("\nData files:")
+        for path, entry in self.files("data").items():
+            shape = entry.get("shape")
+            keys = ", ".join(shape) if isinstance(shape, dict) else json.dumps(shape)
+            lines.append(f"- {path}: {keys}")
+
+        lines.append("\nTests:")
+        for path, entry in self.files("test").items():
+            before_each = " (beforeEach)" if entry.get("uses_before_each") else ""
+            lines.append(f"- {path}{before_each}: {'; '.join(entry.get('describes', []) + entry.get('tests', []))}")
+        return "\n".join(lines)
+
+    def search(self, query: str) -> List[str]:
+        """Case-insensitive match on class, method, locator, function, fixture, data key and test names."""
+        query = query.lower()
+        hits = []
+        for name, cls in self.page_objects().items():
+            if query in name.lower():
+                hits.append(f"class {name} ({cls['file']})")
+            hits.extend(
+                f"{name}.{locator} = {selector or 'Locator'} ({cls['file']})"
+                for locator, selector in cls["locators"].items()
+                if query in locator.lower() or (selector and query in selector.lower())
+            )
+            hits.extend(f"{name}.{method} ({cls['file']})" for method in cls["methods"] if query in method.lower())
+        for path, entry in sorted(self.data["files"].items()):
+            for name in entry.get("functions", []) + entry.get("fixtures", []):
+                if query in name.lower():
+                    hits.append(f"{name} ({path})")
+            for title in entry.get("tests", []):
+                if query in title.lower():
+                    hits.append(f"test '{title}' ({path})")
+            if entry["kind"] == "data" and query in json.dumps(entry.get("shape", "")).lower():
+                hits.append(f"data {path}: {json.dumps(entry['shape'])}")
+        return hits
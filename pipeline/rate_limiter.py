@@ -0,0 +1,360 @@
+"""
+Shared rate limiting and adaptive concurrency for LLM provider requests.
+
+Every LLM request of the process waits for a slot of its provider/model
+(e.g. `google/gemini-2.0-flash`) before it is sent:
+
+- a token bucket refills at the provider's requests per minute (`rpm`),
+- a concurrency limit caps the requests in flight,
+- after a 429 (or another rate limit error) all requests to that provider
+  pause for the Retry-After time, or an exponential backoff without one.
+
+Both limits adapt AIMD-style: a 429 halves the request rate and the
+concurrency limit; each successful request adds one request per minute (up to
+`rpm`) and 1/limit to the concurrency limit (up to `max_concurrency`), unless
+its latency is more than LATENCY_FACTOR times the recent average, a sign of
+requests queueing at the provider, which shrinks the limit by 10%. A rate
+limited request is retried here, behind the pause, instead of by each agent
+on its own. The OpenAI and Anthropic clients fast-agent creates for a request
+get `max_retries=0`, so the SDK does not retry a 429 before the limiter sees
+it; server errors, timeouts and lost connections, which the SDK would retry,
+are retried here with an exponential backoff through a new slot. The native
+Google client does not retry by default.
+
+The state of each provider/model is a small JSON file under
+TEMP_DATA_PATH/rate_limits, locked with flock, so all worker processes of a
+bulk or headless run share one bucket, one pause and one concurrency limit.
+Within a process, waiting requests are served round-robin across agents, so a
+busy agent cannot starve the others.
+
+Environment:
+    RATE_LIMITING       set to off to send requests unthrottled
+    RATE_LIMITS         JSON limits per provider or provider/model, e.g.
+                        {"google": {"rpm": 60}, "anthropic": {"rpm": 50, "concurrency": 2}}
+    RATE_LIMIT_SHARED   set to off to keep the state per process
+    RATE_LIMIT_RETRIES  retries of a rate limited or failed request (default 4)
+"""
+import asyncio
+import collections
+import contextlib
+import json
+import os
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from pipeline import agent_hooks
+from pipeline.paths import temp_data_dir
+
+try:
+    import fcntl
+except ImportError:  # Windows: state stays per process
+    fcntl = None
+
+DEFAULT_LIMITS = {"rpm": None, "concurrency": 4, "max_concurrency": 16}
+LATENCY_FACTOR = 3.0
+# Weight of the latest request in the latency average
+LATENCY_ALPHA = 0.2
+MIN_RPM = 1.0
+MAX_BACKOFF_S = 60.0
+# Longest sleep before the shared state is looked at again
+POLL_S = 0.25
+
+RATE_LIMIT_RE = re.compile(r"\b429\b|rate.?limit|resource.?exhausted|too many requests", re.IGNORECASE)
+# Errors the OpenAI and Anthropic SDKs would have retried themselves
+TRANSIENT_STATUSES = (408, 409)
+TRANSIENT_ERRORS = ("APIConnectionError", "APITimeoutError")
+TRANSIENT_BACKOFF_S = 0.5
+
+_limiters: Dict[str, "Limiter"] = {}
+
+
+def enabled() -> bool:
+    return os.getenv("RATE_LIMITING", "on").lower() not in ("0", "false", "off", "no")
+
+
+def shared() -> bool:
+    return fcntl is not None and os.getenv("RATE_LIMIT_SHARED", "on").lower() not in ("0", "false", "off", "no")
+
+
+def limits_for(key: str) -> dict:
+    configured = json.loads(os.getenv("RATE_LIMITS") or "{}")
+    provider = key.split("/", 1)[0]
+    return {**DEFAULT_LIMITS, **configured.get(provider, {}), **configured.get(key, {})}
+
+
+def _status(error: BaseException):
+    response = getattr(error, "response", None)
+    return getattr(error, "status_code", None) or getattr(error, "code", None) or getattr(response, "status_code", None)
+
+
+def rate_limit_of(error: Optional[BaseException]) -> Tuple[bool, Optional[float]]:
+    """Whether a provider error is a rate limit, and its Retry-After in seconds."""
+    if error is None:
+        return False, None
+    response = getattr(error, "response", None)
+    status = _status(error)
+    if status != 429 and not RATE_LIMIT_RE.search(str(error)):
+        return False, None
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return True, float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return True, None
+
+
+def transient(error: Optional[BaseException]) -> bool:
+    """Whether a provider error is worth sending again: a server error, a timeout or a lost connection."""
+    if not isinstance(error, Exception):
+        return False
+    status = _status(error)
+    if isinstance(status, int) and (status >= 500 or status in TRANSIENT_STATUSES):
+        return True
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(error).__mro__)
+
+
+def without_sdk_retries(task) -> None:
+    """
+    Turn off the SDK's own retries for `task`, a method of the OpenAI or
+    Anthropic client that fast-agent creates for each request.
+    """
+    client = getattr(getattr(task, "__self__", None), "_client", None)
+    if isinstance(getattr(client, "max_retries", None), int):
+        client.max_retries = 0
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class FairQueue:
+    """Lets one waiting request at a time through, taking turns between agents."""
+
+    def __init__(self):
+        self.waiting: Dict[str, collections.deque] = {}
+        self.order: collections.deque = collections.deque()
+        self.busy = False
+
+    async def turn(self, agent: str) -> None:
+        if not self.busy:
+            self.busy = True
+            return
+        future = asyncio.get_running_loop().create_future()
+        if agent not in self.waiting:
+            self.waiting[agent] = collections.deque()
+            self.order.append(agent)
+        self.waiting[agent].append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Cancelled after its turn came: pass the turn on
+            if future.done() and not future.cancelled():
+                self.next()
+            raise
+
+    def next(self) -> None:
+        while self.order:
+            agent = self.order.popleft()
+            queue = self.waiting[agent]
+            future = queue.popleft()
+            if queue:
+                self.order.append(agent)
+            else:
+                del self.waiting[agent]
+            if not future.done():
+                future.set_result(None)
+                return
+        self.busy = False
+
+
+@dataclass
+class Slot:
+    started: float
+
+
+class Limiter:
+    """Token bucket, pause and AIMD concurrency limit of one provider/model."""
+
+    def __init__(self, key: str, limits: Optional[dict] = None, state_dir: Optional[str] = None):
+        self.key = key
+        self.limits = limits or limits_for(key)
+        self.queue = FairQueue()
+        self.memory: dict = {}
+        self.path = None
+        if shared():
+            state_dir = state_dir or str(temp_data_dir("rate_limits"))
+            os.makedirs(state_dir, exist_ok=True)
+            self.path = os.path.join(state_dir, re.sub(r"[^\w.-]+", "_", key) + ".json")
+
+    def fresh_state(self) -> dict:
+        return {
+            "rate": self.limits["rpm"],
+            "tokens": float(self.limits["rpm"] or 0),
+            "updated": time.time(),
+            "limit": float(self.limits["concurrency"]),
+            "leases": {},
+            "pause_until": 0.0,
+            "failures": 0,
+            "latency_s": None,
+        }
+
+    def load(self, text: str) -> dict:
+        try:
+            state = {**self.fresh_state(), **json.loads(text or "{}")}
+        except ValueError:
+            return self.fresh_state()
+        # The configured limits may have changed since the state was written
+        rpm = self.limits["rpm"]
+        state["rate"] = min(state["rate"] or rpm, rpm) if rpm else None
+        state["limit"] = min(state["limit"], float(self.limits["max_concurrency"]))
+        return state
+
+    @contextlib.contextmanager
+    def state(self):
+        """The provider's state, locked across processes while the block runs."""
+        if self.path is None:
+            self.memory = self.memory or self.fresh_state()
+            yield self.memory
+            return
+        with open(self.path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                state = self.load(f.read())
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def try_acquire(self) -> float:
+        """Take a slot and return 0, or return the seconds to wait before trying again."""
+        now = time.time()
+        with self.state() as state:
+            leases = {pid: count for pid, count in state["leases"].items() if _alive(int(pid))}
+            state["leases"] = leases
+            if now < state["pause_until"]:
+                return state["pause_until"] - now
+            if sum(leases.values()) >= max(1, int(state["limit"])):
+                return POLL_S
+            if state["rate"]:
+                per_second = state["rate"] / 60
+                state["tokens"] = min(state["rate"], state["tokens"] + (now - state["updated"]) * per_second)
+                state["updated"] = now
+                if state["tokens"] < 1:
+                    return (1 - state["tokens"]) / per_second
+                state["tokens"] -= 1
+            pid = str(os.getpid())
+            leases[pid] = leases.get(pid, 0) + 1
+            return 0.0
+
+    async def acquire(self, agent: Optional[str]) -> Slot:
+        await self.queue.turn(agent or "unknown")
+        try:
+            while True:
+                wait = self.try_acquire()
+                if wait <= 0:
+                    return Slot(time.monotonic())
+                await asyncio.sleep(min(wait, POLL_S) * random.uniform(0.8, 1.2))
+        finally:
+            self.queue.next()
+
+    def release(self, slot: Slot, outcome: str = "ok", retry_after: Optional[float] = None) -> None:
+        """
+        Give a slot back and adapt the limits.
+
+        Args:
+            outcome (str): `ok`, `limited` for a rate limit error, or `error`
+                for other failures and cancellations, which leave the limits as they are.
+        """
+        latency = time.monotonic() - slot.started
+        with self.state() as state:
+            pid = str(os.getpid())
+            if state["leases"].get(pid, 0) > 1:
+                state["leases"][pid] -= 1
+            else:
+                state["leases"].pop(pid, None)
+            if outcome == "error":
+                return
+            if outcome == "limited":
+                state["failures"] += 1
+                backoff = retry_after if retry_after is not None else min(MAX_BACKOFF_S, 2 ** state["failures"])
+                state["pause_until"] = max(state["pause_until"], time.time() + backoff)
+                state["limit"] = max(1.0, state["limit"] / 2)
+                if state["rate"]:
+                    state["rate"] = max(MIN_RPM, state["rate"] / 2)
+                    state["tokens"] = min(state["tokens"], 0.0)
+                return
+            state["failures"] = 0
+            average = state["latency_s"]
+            state["latency_s"] = latency if average is None else (1 - LATENCY_ALPHA) * average + LATENCY_ALPHA * latency
+            if average is not None and latency > LATENCY_FACTOR * average:
+                state["limit"] = max(1.0, state["limit"] * 0.9)
+            else:
+                state["limit"] = min(float(self.limits["max_concurrency"]), state["limit"] + 1 / state["limit"])
+            if state["rate"] and self.limits["rpm"]:
+                state["rate"] = min(float(self.limits["rpm"]), state["rate"] + 1)
+
+
+def limiter(provider: Optional[str], model: Optional[str]) -> Limiter:
+    key = f"{provider or 'generic'}/{model or 'default'}"
+    if key not in _limiters:
+        _limiters[key] = Limiter(key)
+    return _limiters[key]
+
+
+async def limited(provider: Optional[str], model: Optional[str], send, error_of):
+    """
+    Send a request through the provider's limiter, retrying it after rate
+    limits (behind the provider's pause) and transient errors (after a backoff).
+
+    Args:
+        send: Coroutine function sending the request once.
+        error_of: Returns the provider error of a `send` result, or None.
+    """
+    current = limiter(provider, model)
+    retries = int(os.getenv("RATE_LIMIT_RETRIES", "4"))
+    for attempt in range(retries + 1):
+        agent = agent_hooks.current()
+        slot = await current.acquire(agent.name if agent else None)
+        try:
+            result = await send()
+        except BaseException as exc:
+            error, result = exc, None
+        else:
+            error = error_of(result)
+        is_limited, retry_after = rate_limit_of(error) if isinstance(error, Exception) else (False, None)
+        current.release(slot, "limited" if is_limited else "error" if error else "ok", retry_after)
+        retry = attempt < retries and (is_limited or transient(error))
+        if not retry:
+            if result is None and error is not None:
+                raise error
+            return result
+        if not is_limited:
+            await asyncio.sleep(min(MAX_BACKOFF_S, TRANSIENT_BACKOFF_S * 2 ** attempt) * random.uniform(0.8, 1.2))
+
+
+async def _limit_request(call: agent_hooks.LLMRequest, proceed) -> None:
+    without_sdk_retries(call.task)
+
+    async def send() -> agent_hooks.LLMRequest:
+        await proceed()
+        return call
+
+    await limited(call.provider, call.model, send, lambda sent: sent.error)
+
+
+def install() -> None:
+    """Throttle the LLM requests of this process. Calling it again is a no-op."""
+    if enabled():
+        agent_hooks.register("rate_limiter", "llm", agent_hooks.RATE_LIMIT, around=_limit_request)
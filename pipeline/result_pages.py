@@ -0,0 +1,97 @@
+"""
+Paged tool results: a size cap per result, the rest on disk under a handle.
+
+A file read of a big spec, the HTML of a heavy page or a full snapshot goes
+into the agent's conversation whole, and every later request re-sends it.
+`page()` cuts a result to the first RESULT_PAGE_CHARS characters (at a line
+break where there is one nearby) and stores the full text in
+TEMP_DATA_PATH/tool_results under a handle derived from its content. The page
+ends with a note telling the agent how to fetch the next page:
+
+    [truncated: characters 0-12000 of 48211 shown. Call read_more(handle="3f2a9c0d1e4b5a67", offset=12000) for more]
+
+Results are stored once per content, so reading the same file twice shares a
+handle. The least recently used results are evicted once they take more than
+RESULT_PAGES_MAX_MB (default 100).
+
+Environment:
+    RESULT_PAGE_CHARS     characters per page (default 12000)
+    RESULT_PAGE_BUDGETS   JSON characters per tool, e.g. {"read_file": 20000}
+"""
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from pipeline.checkpoints import CheckpointCache
+from pipeline.paths import temp_data_dir
+
+DEFAULT_MAX_BYTES = int(float(os.getenv("RESULT_PAGES_MAX_MB", "100")) * 1024 * 1024)
+DEFAULT_PAGE_CHARS = 12000
+# A page may end this much earlier to end at a line break
+LINE_SLACK = 0.2
+TRUNCATED_MARK = "[truncated: "
+
+
+def page_chars(tool: Optional[str] = None) -> int:
+    budgets = json.loads(os.getenv("RESULT_PAGE_BUDGETS") or "{}")
+    return max(1, int(budgets.get(tool) or os.getenv("RESULT_PAGE_CHARS") or DEFAULT_PAGE_CHARS))
+
+
+def page_end(text: str, offset: int, limit: int) -> int:
+    end = offset + limit
+    if end >= len(text):
+        return len(text)
+    newline = text.rfind("\n", offset, end)
+    return newline + 1 if newline >= end - limit * LINE_SLACK else end
+
+
+@dataclass
+class Page:
+    text: str
+    offset: int
+    end: int
+    total: int
+    handle: Optional[str] = None
+
+    @property
+    def complete(self) -> bool:
+        return self.offset == 0 and self.end == self.total
+
+    def render(self) -> str:
+        if self.complete:
+            return self.text
+        shown = f"characters {self.offset}-{self.end} of {self.total} shown"
+        if self.end < self.total:
+            note = f"{shown}. Call read_more(handle=\"{self.handle}\", offset={self.end}) for more"
+        else:
+            note = f"{shown}, end of result"
+        separator = "\n" if self.text.endswith("\n") else "\n\n"
+        return f"{self.text}{separator}{TRUNCATED_MARK}{note}]"
+
+
+class ResultPages:
+    def __init__(self, root: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.store = CheckpointCache(root or str(temp_data_dir("tool_results")), max_bytes)
+
+    def page(self, text: str, tool: Optional[str] = None, limit: Optional[int] = None) -> Page:
+        """The first page of a tool result; the full text is stored when it does not fit."""
+        limit = limit or page_chars(tool)
+        if len(text) <= limit:
+            return Page(text, 0, len(text), len(text))
+        handle = hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest()[:16]
+        if self.store.get(handle) is None:
+            self.store.put(handle, {"tool": tool, "text": text})
+        end = page_end(text, 0, limit)
+        return Page(text[:end], 0, end, len(text), handle)
+
+    def read_more(self, handle: str, offset: int = 0, limit: Optional[int] = None) -> Optional[Page]:
+        """The page of a stored result starting at `offset`, or None for an unknown handle."""
+        entry = self.store.get(handle)
+        if entry is None:
+            return None
+        text = entry["text"]
+        offset = min(max(0, offset), len(text))
+        end = page_end(text, offset, min(limit or page_chars(entry["tool"]), page_chars(entry["tool"])))
+        return Page(text[offset:end], offset, end, len(text), handle)
@@ -0,0 +1,205 @@
+"""
+Persistent registry of selectors learned from Planner runs.
+
+Selectors are keyed by origin, a normalized URL path pattern (`/orders/123`
+becomes `/orders/:id`) and the element's role, accessible name and test
+attribute, as far as they can be read from the selector. Every plan written
+by the Planner is ingested, and the Planner queries the registry before
+exploring a page, so login fields, navigation and other shared elements are
+discovered once per story instead of once per test case. The store is a
+SQLite database under TEMP_DATA_PATH/registry, shared by parallel workers.
+"""
+import re
+import sqlite3
+import time
+from typing import Iterable, List, Optional
+from urllib.parse import urlparse
+
+from pipeline.paths import temp_data_dir
+
+ID_SEGMENT_RE = re.compile(r"^(\d+|[0-9a-f]{8}-[0-9a-f-]{27,}|[0-9a-f]{16,})$", re.IGNORECASE)
+ROLE_RE = re.compile(r"getByRole\(\s*['\"](\w+)['\"](?:\s*,\s*\{[^}]*?name\s*:\s*(['\"])(.+?)\2)?")
+NAME_RE = re.compile(r"getBy(?:Text|Label|Placeholder|AltText|Title)\(\s*(['\"])(.+?)\1")
+TEST_ID_RE = re.compile(r"getByTestId\(\s*(['\"])(.+?)\1")
+TEST_ATTR_RE = re.compile(r"\[(data-[\w-]*(?:test|qa|cy)[\w-]*|selenium-id)\s*=\s*['\"]?([^'\"\]]+)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS selectors (
+    origin TEXT NOT NULL,
+    path_pattern TEXT NOT NULL,
+    selector TEXT NOT NULL,
+    role TEXT,
+    name TEXT,
+    test_attr TEXT,
+    action TEXT,
+    description TEXT,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    last_verified REAL NOT NULL,
+    PRIMARY KEY (origin, path_pattern, selector)
+);
+CREATE INDEX IF NOT EXISTS selectors_page ON selectors (origin, path_pattern);
+"""
+
+
+def split_url(url: str):
+    """Origin and normalized path pattern of a URL."""
+    parsed = urlparse(url or "")
+    origin = f"{parsed.scheme}://{parsed.netloc}" if parsed.netloc else ""
+    segments = [":id" if ID_SEGMENT_RE.match(s) else s for s in parsed.path.split("/") if s]
+    return origin, "/" + "/".join(segments)
+
+
+def describe_selector(selector: str) -> dict:
+    """Role, accessible name and test attribute that a selector targets, when visible in it."""
+    info = {"role": None, "name": None, "test_attr": None}
+    role = ROLE_RE.search(selector)
+    if role:
+        info["role"], info["name"] = role.group(1), role.group(3)
+    name = NAME_RE.search(selector)
+    if name and not info["name"]:
+        info["name"] = name.group(2)
+    test_id = TEST_ID_RE.search(selector)
+    test_attr = TEST_ATTR_RE.search(selector)
+    if test_id:
+        info["test_attr"] = test_id.group(2)
+    elif test_attr:
+        info["test_attr"] = test_attr.group(2)
+    return info
+
+
+class SelectorRegistry:
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or str(temp_data_dir("registry") / "selectors.sqlite3")
+        self.connection = sqlite3.connect(self.db_path, timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def record(
+        self,
+        url: str,
+        selector: str,
+        action: Optional[str] = None,
+        description: Optional[str] = None,
+        role: Optional[str] = None,
+        name: Optional[str] = None,
+    ) -> None:
+        """Insert a selector, or mark an existing one as verified now."""
+        if not selector:
+            return
+        origin, path_pattern = split_url(url)
+        info = describe_selector(selector)
+        now = time.time()
+        with self.connection:
+            self.connection.execute(
+                """
+                INSERT INTO selectors
+                    (origin, path_pattern, selector, role, name, test_attr, action, description, created_at, last_verified)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (origin, path_pattern, selector) DO UPDATE SET
+                    last_verified = excluded.last_verified,
+                    action = COALESCE(excluded.action, action),
+                    description = COALESCE(excluded.description, description)
+                """,
+                (
+                    origin,
+                    path_pattern,
+                    selector,
+                    role or info["role"],
+                    name or info["name"],
+                    info["test_attr"],
+                    action,
+                    description,
+                    now,
+                    now,
+                ),
+            )
+
+    def lookup(
+        self,
+        url: str,
+        role: Optional[str] = None,
+        name: Optional[str] = None,
+        limit: int = 30,
+    ) -> List[dict]:
+        """
+        Known selectors for a page, most used first.
+
+        Selectors recorded on the same path pattern come first, followed by
+        selectors seen elsewhere on the same origin (headers, navigation).
+        Every returned selector has its hit count incremented.
+        """
+        origin, path_pattern = split_url(url)
+        query = "SELECT rowid, * FROM selectors WHERE origin = ?"
+        params: list = [origin]
+        if role:
+            query += " AND role = ?"
+            params.append(role)
+        if name:
+            query += " AND (name LIKE ? OR description LIKE ? OR test_attr LIKE ?)"
+            params.extend([f"%{name}%"] * 3)
+        query += " ORDER BY (path_pattern = ?) DESC, hits DESC, last_verified DESC LIMIT ?"
+        params.extend([path_pattern, limit])
+
+        rows = [dict(row) for row in self.connection.execute(query, params)]
+        if rows:
+            with self.connection:
+                self.connection.executemany(
+                    "UPDATE selectors SET hits = hits + 1 WHERE rowid = ?",
+                    [(row["rowid"],) for row in rows],
+                )
+        for row in rows:
+            row.pop("rowid")
+        return rows
+
+    def ingest_plan(self, plan: dict) -> int:
+        """
+        Record every selector of a Planner plan.json.
+
+        Returns:
+            int: Number of steps with a selector.
+        """
+        start_url = plan.get("startUrl") or ""
+        count = 0
+        for step in _plan_steps(plan):
+            selector = step.get("selector")
+            if not isinstance(selector, str):
+                continue
+            url = step.get("url") or step.get("urlBefore") or step.get("url_before") or start_url
+            self.record(url, selector, action=step.get("action"), description=step.get("description"))
+            count += 1
+        return count
+
+
+def _plan_steps(plan: dict) -> Iterable[dict]:
+    for key in ("setupSteps", "steps"):
+        for step in plan.get(key) or []:
+            if isinstance(step, dict):
+                yield step
+                for assertion in step.get("assertions") or []:
+                    if isinstance(assertion, dict):
+                        yield assertion
+
+
+def format_rows(rows: List[dict]) -> str:
+    lines = []
+    for row in rows:
+        target = " ".join(
+            part
+            for part in (
+                row["role"] or "",
+                f'"{row["name"]}"' if row["name"] else "",
+                f"[{row['test_attr']}]" if row["test_attr"] else "",
+            )
+            if part
+        )
+        verified = time.strftime("%Y-%m-%d", time.localtime(row["last_verified"]))
+        lines.append(
+            f"- {row['selector']}  ({target or 'element'}; {row['action'] or 'seen'} on {row['path_pattern']}; "
+            f"{row['description'] or 'no description'}; verified {verified}; used {row['hits']}x)"
+        )
+    return "\n".join(lines)
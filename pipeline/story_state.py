@@ -0,0 +1,196 @@
+"""
+Per-test-case content hashes of a story, for change-aware regeneration.
+
+After a test case is converted, the hashes of its manual test case, its plan
+and its generated files (the spec and the test data file) are recorded in
+TEMP_DATA_PATH/stories/<story_id>/<test_type>.json. A later run compares the
+manual test case file against them:
+
+- new:       in the file but never converted,
+- changed:   the manual test case was edited, or its plan or spec is gone,
+- removed:   converted before but no longer in the file,
+- unchanged: everything else; these are not scheduled at all.
+
+Removed test cases have their spec, data file, plan and verification report
+deleted. Files edited by hand since they were generated are kept and reported
+instead. Page objects are shared by the whole story and are never removed.
+"""
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from pipeline.manual_cases import ManualCase, ManualCaseIndex, manual_case_path
+from pipeline.paths import temp_data_dir
+
+STATE_VERSION = 1
+
+
+def content_hash(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+
+def file_hash(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+@dataclass
+class Changes:
+    new: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    # Test case ID -> why it is scheduled again
+    reasons: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def scheduled(self) -> List[str]:
+        return self.new + self.changed
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.new)} new, {len(self.changed)} changed, {len(self.removed)} removed, "
+            f"{len(self.unchanged)} unchanged"
+        )
+
+
+class StoryState:
+    """Recorded hashes of one story's test cases of one test type."""
+
+    def __init__(self, story_id: str, test_type: str, state_dir: Optional[str] = None):
+        self.story_id = story_id
+        self.test_type = test_type
+        self.manual_path = manual_case_path(story_id, test_type)
+        self.project_path = os.getenv("PLAYWRIGHT_PROJECT_PATH") or ""
+        state_dir = state_dir or str(temp_data_dir("stories", story_id))
+        os.makedirs(state_dir, exist_ok=True)
+        self.path = os.path.join(state_dir, f"{test_type}.json")
+
+    def load(self) -> Dict[str, dict]:
+        try:
+            with open(self.path, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return state.get("cases", {}) if state.get("version") == STATE_VERSION else {}
+
+    def save(self, cases: Dict[str, dict]) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"version": STATE_VERSION, "cases": cases}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def manual_cases(self) -> Dict[str, str]:
+        """Test case ID -> hash of its content, in file order."""
+        if not os.path.exists(self.manual_path):
+            raise FileNotFoundError(f"manual test case file not found: {self.manual_path}")
+        return {
+            test_id: content_hash(ManualCase(**entry).fields())
+            for test_id, entry in ManualCaseIndex().index(self.manual_path).items()
+        }
+
+    def plan_path(self, test_id: str) -> str:
+        # Same place as pipeline/case_worker.py writes it
+        return os.path.join(os.path.dirname(self.manual_path), f"{test_id}_plan.json")
+
+    def generated_files(self, test_id: str) -> List[str]:
+        """The spec and test data file of a test case, relative to the Playwright project."""
+        specs = glob.glob(
+            os.path.join(self.project_path, "tests", self.story_id, "**", f"{test_id}-*.spec.ts"), recursive=True
+        )
+        data = os.path.join(self.project_path, "data", self.story_id, f"{test_id}.json")
+        files = sorted(specs) + ([data] if os.path.exists(data) else [])
+        return [os.path.relpath(path, self.project_path or ".") for path in files]
+
+    def record(self, test_id: str) -> None:
+        """Store the current hashes of a test case that was just converted."""
+        cases = self.load()
+        current = self.manual_cases().get(test_id)
+        if current is None:
+            return
+        cases[test_id] = {
+            "case": current,
+            "plan": file_hash(self.plan_path(test_id)),
+            "files": {
+                rel_path: file_hash(os.path.join(self.project_path, rel_path))
+                for rel_path in self.generated_files(test_id)
+            },
+            "recorded_at": time.time(),
+        }
+        self.save(cases)
+
+    def changes(self, test_ids: Optional[List[str]] = None) -> Changes:
+        """
+        Compare the manual test case file with the recorded hashes.
+
+        Args:
+            test_ids (Optional[List[str]]): Only consider these test IDs; all by default.
+        """
+        current, recorded = self.manual_cases(), self.load()
+        if test_ids:
+            current = {test_id: current[test_id] for test_id in test_ids if test_id in current}
+        changes = Changes()
+        for test_id, case_hash in current.items():
+            entry = recorded.get(test_id)
+            if entry is None:
+                changes.new.append(test_id)
+                changes.reasons[test_id] = "new test case"
+                continue
+            reason = None
+            if entry["case"] != case_hash:
+                reason = "manual test case edited"
+            elif not os.path.exists(self.plan_path(test_id)):
+                reason = "plan missing"
+            elif not any(rel_path.endswith(".spec.ts") for rel_path in entry["files"]):
+                reason = "no spec recorded"
+            else:
+                missing = [
+                    rel_path for rel_path in entry["files"]
+                    if not os.path.exists(os.path.join(self.project_path, rel_path))
+                ]
+                reason = f"{missing[0]} missing" if missing else None
+            if reason:
+                changes.changed.append(test_id)
+                changes.reasons[test_id] = reason
+            else:
+                changes.unchanged.append(test_id)
+        if not test_ids:
+            changes.removed = [test_id for test_id in recorded if test_id not in current]
+        return changes
+
+    def remove(self, test_ids: List[str]) -> Dict[str, List[str]]:
+        """
+        Delete the generated files of removed test cases and forget them.
+
+        Returns:
+            Dict[str, List[str]]: `deleted` paths and `kept` paths that were
+            edited by hand after they were generated.
+        """
+        cases = self.load()
+        outcome = {"deleted": [], "kept": []}
+        for test_id in test_ids:
+            entry = cases.pop(test_id, None)
+            if entry is None:
+                continue
+            paths = {os.path.join(self.project_path, rel_path): digest for rel_path, digest in entry["files"].items()}
+            paths[self.plan_path(test_id)] = entry["plan"]
+            # Written by pipeline/plan_verifier.py, never edited by hand
+            paths[os.path.join(os.path.dirname(self.manual_path), f"{test_id}_verification.json")] = None
+            for path, digest in paths.items():
+                if not os.path.exists(path):
+                    continue
+                if digest is not None and file_hash(path) != digest:
+                    outcome["kept"].append(path)
+                    continue
+                os.remove(path)
+                outcome["deleted"].append(path)
+        self.save(cases)
+        return outcome
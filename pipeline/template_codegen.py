@@ -0,0 +1,499 @@
+"""
+Deterministic Playwright code generation for simple Planner plans.
+
+Plans that only navigate, click, fill, check, select and assert text,
+visibility or URLs on resolved selectors do not need PlaywrightWriterAgent.
+They are turned into files that follow the layout from the writer prompt:
+
+    tests/<story_id>/<smoke|regression>/<TEST_ID>-<title>.spec.ts
+    pages/<story_id>/<StoryName>Page.ts      (readonly locators + action methods)
+    data/<story_id>/<TEST_ID>.json           (every test value, nothing hardcoded)
+
+Selectors that already exist as readonly locators on a project page object
+(e.g. `LoginPage.usernameInput`) are reused instead of being declared again.
+Steps that cannot be mapped are reported in `CodegenResult.unmapped`. The
+case worker then hands the plan to the LLM writer, together with the code
+lines of the steps that were mapped.
+
+All test cases of a story share its page object. `generate_and_write()`
+holds a per-story lock across processes, re-indexes the project and renders
+the page object from what is on disk at that moment, so concurrent workers
+add their locators to it instead of overwriting each other's.
+
+Usage:
+    python -m pipeline.template_codegen <plan.json> <smoke|regression> [--dry-run]
+"""
+import argparse
+import contextlib
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from pipeline.paths import temp_data_dir
+from pipeline.project_index import ProjectIndex
+from pipeline.selector_registry import describe_selector
+
+try:
+    import fcntl
+except ImportError:  # Windows: page object writes are not serialized
+    fcntl = None
+
+TEMPLATE_VERSION = 1
+GENERATED_MARKER = "// Generated by TestPilot template codegen from Planner plans."
+
+SELECTOR_RE = re.compile(
+    r"^(?:this\.)?page\.(?:getBy(?:Role|Text|Label|Placeholder|AltText|Title|TestId)|locator)\(.*\)$",
+    re.DOTALL,
+)
+URL_RE = re.compile(r"https?://[^\s'\"`]+")
+
+# Normalized plan action -> generator action
+ACTIONS = {
+    "navigate": "navigate", "goto": "navigate", "open": "navigate", "visit": "navigate",
+    "click": "click", "tap": "click",
+    "fill": "fill", "type": "fill", "enter": "fill", "input": "fill", "entertext": "fill",
+    "check": "check",
+    "select": "selectOption", "selectoption": "selectOption",
+    "asserttext": "text", "expecttext": "text", "verifytext": "text", "text": "text",
+    "tohavetext": "text", "tocontaintext": "text", "containstext": "text",
+    "assertvisible": "visible", "expectvisible": "visible", "verifyvisible": "visible",
+    "visible": "visible", "tobevisible": "visible", "isvisible": "visible",
+    "asserturl": "url", "expecturl": "url", "verifyurl": "url", "url": "url", "tohaveurl": "url",
+}
+# Generator action -> page object method prefix (and whether it takes a value)
+METHODS = {
+    "click": ("click", False),
+    "fill": ("fill", True),
+    "check": ("check", False),
+    "selectOption": ("select", True),
+}
+ROLE_SUFFIXES = {
+    "button": "Button", "link": "Link", "textbox": "Input", "searchbox": "Input",
+    "checkbox": "Checkbox", "radio": "Radio", "combobox": "Select", "heading": "Heading",
+    "tab": "Tab", "menuitem": "MenuItem", "option": "Option", "img": "Image",
+}
+ACTION_SUFFIXES = {"fill": "Input", "selectOption": "Select", "check": "Checkbox"}
+LOCATOR_ARG_RE = re.compile(r"locator\(\s*(['\"`])(.+?)\1")
+
+
+def ts_string(value: str) -> str:
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "\\'").replace("\n", "\\n") + "'"
+
+
+def words(text: str) -> List[str]:
+    return re.findall(r"[A-Za-z][a-z]*|[A-Z]+(?![a-z])|\d+", text or "")
+
+
+def camel(text: str) -> str:
+    parts = [w.lower() for w in words(text)][:6]
+    if not parts:
+        return ""
+    return parts[0] + "".join(p.capitalize() for p in parts[1:])
+
+
+def pascal(text: str) -> str:
+    return "".join(w.capitalize() for w in words(text))
+
+
+def kebab(text: str) -> str:
+    return "-".join(w.lower() for w in words(text)[:8])
+
+
+def normalize_selector(selector: str) -> str:
+    """Comparable form of a selector: no `this.`, no whitespace, single quotes."""
+    selector = re.sub(r"^this\.", "", selector.strip())
+    return re.sub(r"\s+", "", selector).replace('"', "'")
+
+
+def balanced(selector: str) -> bool:
+    depth, quote = 0, None
+    for i, char in enumerate(selector):
+        if quote:
+            if char == quote and selector[i - 1] != "\\":
+                quote = None
+        elif char in "'\"`":
+            quote = char
+        elif char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth -= 1
+            if depth < 0:
+                return False
+        elif char == ";":
+            return False
+    return depth == 0 and quote is None
+
+
+def base_url_origin(expression: Optional[str]) -> str:
+    found = URL_RE.search(expression or "")
+    if not found:
+        return ""
+    parsed = urlparse(found.group(0))
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+def step_value(step: dict, *keys: str) -> Optional[str]:
+    for key in keys:
+        value = step.get(key)
+        if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            return str(value)
+    return None
+
+
+@dataclass
+class Locator:
+    name: str
+    selector: str
+    # Owner variable in the spec and class that declares the locator
+    owner: str
+    class_name: str
+    actions: List[str] = field(default_factory=list)
+
+
+@dataclass
+class CodegenResult:
+    files: Dict[str, str] = field(default_factory=dict)
+    # (step number, description, reason) for every step that needs the LLM writer
+    unmapped: List[Tuple[int, str, str]] = field(default_factory=list)
+    # (step number, description, generated code lines) for every mapped step
+    mapped: List[Tuple[int, str, List[str]]] = field(default_factory=list)
+    spec_path: Optional[str] = None
+    project_path: str = ""
+
+    @property
+    def complete(self) -> bool:
+        return not self.unmapped and bool(self.files)
+
+    def write(self) -> List[str]:
+        written = []
+        for rel_path, content in self.files.items():
+            full_path = os.path.join(self.project_path, rel_path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "w") as f:
+                f.write(content)
+            written.append(full_path)
+        return written
+
+    def handoff(self) -> str:
+        """Message section for PlaywrightWriterAgent when some steps could not be mapped."""
+        lines = ["template_codegen: these plan steps were already mapped deterministically; reuse their code:"]
+        for number, description, code in self.mapped:
+            lines.append(f"- step {number} ({description}): " + " ".join(code))
+        lines.append("Implement these steps yourself:")
+        for number, description, reason in self.unmapped:
+            lines.append(f"- step {number} ({description}): {reason}")
+        return "\n".join(lines)
+
+
+class TemplateCodegen:
+    def __init__(self, plan: dict, test_type: str, index: ProjectIndex):
+        self.plan = plan
+        self.test_type = test_type
+        self.index = index
+        self.story_id = plan.get("storyId") or "story"
+        self.test_case_id = plan.get("testCaseId") or "TEST"
+        self.class_name = f"{pascal(self.story_id)}Page"
+        self.po_path = os.path.join("pages", self.story_id, f"{self.class_name}.ts")
+        self.data_path = os.path.join("data", self.story_id, f"{self.test_case_id}.json")
+        self.spec_path = os.path.join(
+            "tests", self.story_id, test_type,
+            f"{self.test_case_id}-{kebab(plan.get('title', '')) or 'test'}.spec.ts",
+        )
+        self.own_var = camel(self.class_name)
+        self.base_origin = base_url_origin(index.data.get("base_url"))
+
+        self.existing: Dict[str, Locator] = {}
+        self.own: Dict[str, Locator] = {}
+        self.used_owners: Dict[str, Tuple[str, str]] = {}
+        self.data: Dict[str, str] = {}
+        self._load_page_objects()
+
+    def _load_page_objects(self):
+        for class_name, cls in self.index.page_objects().items():
+            own_file = cls["file"] == self.po_path
+            for name, selector in cls["locators"].items():
+                if not selector:
+                    continue
+                locator = Locator(name, selector, camel(class_name), class_name)
+                if own_file:
+                    locator.actions = [
+                        action
+                        for action, (prefix, _) in METHODS.items()
+                        if any(m.split("(")[0].replace("async ", "") == prefix + name[0].upper() + name[1:]
+                               for m in cls["methods"])
+                    ]
+                    self.own[normalize_selector(selector)] = locator
+                else:
+                    self.existing.setdefault(normalize_selector(selector), locator)
+
+    def _po_is_ours(self) -> bool:
+        full_path = os.path.join(self.index.project_path, self.po_path)
+        if not os.path.exists(full_path):
+            return True
+        with open(full_path, "r", encoding="utf-8", errors="replace") as f:
+            return f.readline().strip() == GENERATED_MARKER
+
+    def _unique(self, name: str, taken) -> str:
+        candidate, number = name, 2
+        while candidate in taken:
+            candidate, number = f"{name}{number}", number + 1
+        return candidate
+
+    def _data_key(self, name: str, value: str) -> str:
+        for key, existing in self.data.items():
+            if existing == value and key.startswith(name):
+                return key
+        key = self._unique(name, self.data)
+        self.data[key] = value
+        return key
+
+    def _locator(self, selector: str, action: str, description: str) -> Locator:
+        key = normalize_selector(selector)
+        locator = self.existing.get(key) or self.own.get(key)
+        if locator is None:
+            info = describe_selector(selector)
+            css = LOCATOR_ARG_RE.search(selector)
+            base = camel(info["name"] or info["test_attr"] or (css and css.group(2)) or description) or "element"
+            suffix = ROLE_SUFFIXES.get(info["role"] or "") or ACTION_SUFFIXES.get(action, "")
+            if base.lower().endswith(suffix.lower()):
+                suffix = ""
+            taken = {loc.name for loc in self.own.values()}
+            locator = Locator(self._unique(base + suffix, taken), selector, self.own_var, self.class_name)
+            self.own[key] = locator
+        if locator.owner == self.own_var and action in METHODS and action not in locator.actions:
+            locator.actions.append(action)
+        self.used_owners[locator.owner] = (locator.class_name, locator.owner)
+        return locator
+
+    def _goto(self, url: str) -> str:
+        parsed = urlparse(url)
+        if self.base_origin and f"{parsed.scheme}://{parsed.netloc}" == self.base_origin:
+            url = parsed.path or "/"
+            if parsed.query:
+                url += "?" + parsed.query
+        return f"await page.goto({ts_string(url)});"
+
+    def map_step(self, step: dict) -> Tuple[Optional[List[str]], str]:
+        """Code lines for one plan step, or None and the reason it cannot be mapped."""
+        raw_action = step.get("action") or step.get("type") or ""
+        action = ACTIONS.get(re.sub(r"[^a-z]", "", str(raw_action).lower()))
+        if action is None:
+            return None, f"unsupported action '{raw_action}'"
+        description = step.get("description") or ""
+
+        if action == "navigate":
+            url = step_value(step, "url", "value")
+            if not url:
+                return None, "navigate step without a URL"
+            return [self._goto(url)], ""
+
+        if action == "url":
+            expected = step_value(step, "expected", "value", "url")
+            if not expected:
+                return None, "URL assertion without an expected URL"
+            key = self._data_key("expectedUrl", expected)
+            return [f"await expect(page).toHaveURL(testData.{key});"], ""
+
+        selector = step.get("selector")
+        if not isinstance(selector, str) or not SELECTOR_RE.match(selector.strip()) or not balanced(selector):
+            return None, f"selector is not a resolved Playwright locator: {selector!r}"
+        selector = " ".join(selector.strip().split())
+
+        if action in ("fill", "selectOption"):
+            value = step_value(step, "value", "text", "option")
+            if value is None:
+                return None, f"{action} step without a value"
+        elif action == "text":
+            value = step_value(step, "expected", "value", "text")
+            if value is None:
+                return None, "text assertion without expected text"
+        else:
+            value = None
+
+        locator = self._locator(selector, action, description)
+        target = f"{locator.owner}.{locator.name}"
+        if action == "visible":
+            return [f"await expect({target}).toBeVisible();"], ""
+        if action == "text":
+            key = self._data_key(f"{locator.name}Text", value)
+            return [f"await expect({target}).toContainText(testData.{key});"], ""
+
+        prefix, takes_value = METHODS[action]
+        argument = f"testData.{self._data_key(locator.name, value)}" if takes_value else ""
+        if locator.owner == self.own_var:
+            method = prefix + locator.name[0].upper() + locator.name[1:]
+            return [f"await {locator.owner}.{method}({argument});"], ""
+        return [f"await {target}.{action}({argument});"], ""
+
+    def generate(self) -> CodegenResult:
+        result = CodegenResult(spec_path=self.spec_path, project_path=self.index.project_path)
+        if (self.plan.get("preconditions") or {}).get("requiresLogin") and not self.plan.get("setupSteps"):
+            result.unmapped.append((0, "login precondition", "requiresLogin without setupSteps"))
+
+        setup_lines, test_steps = [], []
+        number = 0
+        for section in ("setupSteps", "steps"):
+            for step in self.plan.get(section) or []:
+                number += 1
+                if not isinstance(step, dict):
+                    result.unmapped.append((number, str(step), "step is not an object"))
+                    continue
+                description = step.get("description") or str(step.get("action"))
+                code: List[str] = []
+                reason = ""
+                for item in [step, *(step.get("assertions") or [])]:
+                    lines, reason = self.map_step(item) if isinstance(item, dict) else (None, "bad assertion")
+                    if lines is None:
+                        break
+                    code.extend(lines)
+                if reason:
+                    result.unmapped.append((number, description, reason))
+                    continue
+                result.mapped.append((number, description, code))
+                if section == "setupSteps":
+                    setup_lines.extend(code)
+                else:
+                    test_steps.append((description, code))
+
+        if result.unmapped:
+            return result
+        if self.own and not self._po_is_ours():
+            result.unmapped.append((0, self.po_path, "page object exists and was not generated; needs a manual merge"))
+            return result
+
+        if self.own:
+            result.files[self.po_path] = self.render_page_object()
+        result.files[self.data_path] = json.dumps(self.data, indent=2) + "\n"
+        result.files[self.spec_path] = self.render_spec(setup_lines, test_steps)
+        return result
+
+    def _relative_import(self, from_file: str, to_file: str) -> str:
+        path = os.path.relpath(to_file, os.path.dirname(from_file)).replace(os.sep, "/")
+        return path if path.startswith(".") else "./" + path
+
+    def render_page_object(self) -> str:
+        base = self.index.page_objects().get("BasePage")
+        lines = [GENERATED_MARKER, "import { Page, Locator } from '@playwright/test';"]
+        if base:
+            base_import = self._relative_import(self.po_path, re.sub(r"\.ts$", "", base["file"]))
+            lines.append(f"import {{ BasePage }} from '{base_import}';")
+        lines.append("")
+        lines.append(f"export class {self.class_name}{' extends BasePage' if base else ''} {{")
+        locators = sorted(self.own.values(), key=lambda loc: loc.name)
+        lines.extend(f"  readonly {loc.name}: Locator;" for loc in locators)
+        if not base:
+            lines.append("  readonly page: Page;")
+        lines.append("")
+        lines.append("  constructor(page: Page) {")
+        lines.append("    super(page);" if base else "    this.page = page;")
+        for loc in locators:
+            selector = re.sub(r"^(?:this\.)?page\.", "page.", loc.selector)
+            lines.append(f"    this.{loc.name} = {selector};")
+        lines.append("  }")
+        for loc in locators:
+            for action in sorted(loc.actions):
+                prefix, takes_value = METHODS[action]
+                method = prefix + loc.name[0].upper() + loc.name[1:]
+                params, argument = ("value: string", "value") if takes_value else ("", "")
+                lines.append("")
+                lines.append(f"  async {method}({params}): Promise<void> {{")
+                lines.append(f"    await this.{loc.name}.{action}({argument});")
+                lines.append("  }")
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    def render_spec(self, setup_lines: List[str], test_steps: List[Tuple[str, List[str]]]) -> str:
+        owners = dict(sorted(self.used_owners.items()))
+        page_objects = self.index.page_objects()
+        lines = ["import { test, expect } from '@playwright/test';"]
+        for owner, (class_name, _) in owners.items():
+            file = self.po_path if owner == self.own_var else page_objects[class_name]["file"]
+            lines.append(f"import {{ {class_name} }} from '{self._relative_import(self.spec_path, re.sub(r'.ts$', '', file))}';")
+        lines.append(f"import * as testData from '{self._relative_import(self.spec_path, self.data_path)}';")
+        lines.append("")
+        lines.append(f"test.describe({ts_string(self.plan.get('title') or self.story_id)}, () => {{")
+        for owner, (class_name, _) in owners.items():
+            lines.append(f"  let {owner}: {class_name};")
+        lines.append("")
+        lines.append("  test.beforeEach(async ({ page }) => {")
+        for owner, (class_name, _) in owners.items():
+            lines.append(f"    {owner} = new {class_name}(page);")
+        start_url = self.plan.get("startUrl")
+        if start_url:
+            lines.append(f"    {self._goto(start_url)}")
+        lines.extend(f"    {line}" for line in setup_lines)
+        lines.append("  });")
+        lines.append("")
+        title = f"{self.test_case_id}: {self.plan.get('title') or ''}".rstrip(": ")
+        lines.append(f"  test({ts_string(title)}, async ({{ page }}) => {{")
+        for description, code in test_steps:
+            lines.append(f"    await test.step({ts_string(description)}, async () => {{")
+            lines.extend(f"      {line}" for line in code)
+            lines.append("    });")
+        lines.append("  });")
+        lines.append("});")
+        return "\n".join(lines) + "\n"
+
+
+def generate(plan: dict, test_type: str, project_path: Optional[str] = None) -> CodegenResult:
+    index = ProjectIndex(project_path)
+    index.refresh()
+    return TemplateCodegen(plan, test_type, index).generate()
+
+
+@contextlib.contextmanager
+def story_lock(story_id: str):
+    """Hold the lock on a story's generated page object across processes while the block runs."""
+    if fcntl is None:
+        yield
+        return
+    name = re.sub(r"[^A-Za-z0-9_.-]+", "_", story_id or "story")
+    with open(temp_data_dir("locks", "codegen") / f"{name}.lock", "a+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def generate_and_write(plan: dict, test_type: str, project_path: Optional[str] = None) -> CodegenResult:
+    """Generate under the story's lock and write the files when the plan was fully mapped."""
+    with story_lock(plan.get("storyId") or "story"):
+        result = generate(plan, test_type, project_path)
+        if result.complete:
+            result.write()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a Playwright spec from a simple plan.json without an LLM.")
+    parser.add_argument("plan_path")
+    parser.add_argument("test_type", choices=["smoke", "regression"])
+    parser.add_argument("--dry-run", action="store_true", help="Print the files instead of writing them.")
+    args = parser.parse_args(argv)
+
+    import config_loader  # noqa: F401  (loads .env for PLAYWRIGHT_PROJECT_PATH)
+
+    with open(args.plan_path, "r") as f:
+        plan = json.load(f)
+    if args.dry_run:
+        result = generate(plan, args.test_type)
+        if result.complete:
+            for rel_path, content in result.files.items():
+                print(f"--- {rel_path}\n{content}")
+    else:
+        result = generate_and_write(plan, args.test_type)
+        for rel_path in result.files if result.complete else []:
+            print(f"✅ {os.path.join(result.project_path, rel_path)}")
+    if not result.complete:
+        print(result.handoff())
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
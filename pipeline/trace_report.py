@@ -0,0 +1,270 @@
+"""
+Summarise the timing spans that pipeline/tracing.py appends to fastagent.jsonl.
+
+The log is streamed line by line; fast-agent's own events and broken lines
+are skipped. The report answers where a run spent its time:
+
+- a flame-style breakdown: span stacks (case > stage > agent > llm/tool)
+  merged over all test cases, with total and self time,
+- p50/p95/max latency, errors and result size per MCP tool,
+- latency and tokens of LLM calls per agent and model,
+- the slowest test cases.
+
+Usage:
+    python -m pipeline.trace_report [fastagent.jsonl ...] [--test-id bing_search/REG_001]
+                                    [--top 10] [--depth 5] [--folded] [--json]
+
+`--folded` prints the stacks in the folded format read by flamegraph.pl and
+speedscope instead of the text report.
+"""
+import argparse
+import json
+import math
+import sys
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from pipeline.tracing import SPAN_NAMESPACE, trace_path
+
+BAR_WIDTH = 30
+
+
+def read_spans(paths: Iterable[str]) -> Iterator[dict]:
+    for path in paths:
+        with (sys.stdin if path == "-" else open(path, "r", encoding="utf-8", errors="replace")) as f:
+            for line in f:
+                if SPAN_NAMESPACE not in line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("namespace") == SPAN_NAMESPACE and isinstance(entry.get("data"), dict):
+                    yield entry["data"]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an unsorted list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def frame(span: dict) -> str:
+    # Test cases are merged, so the breakdown covers the whole run
+    return "case" if span["kind"] == "case" else f"{span['kind']} {span['name']}"
+
+
+class TraceReport:
+    def __init__(self, spans: Iterable[dict], test_id: Optional[str] = None):
+        self.spans: Dict[str, dict] = {}
+        for span in spans:
+            if test_id and span.get("test_id") != test_id:
+                continue
+            self.spans[span["span_id"]] = span
+        self.children: Dict[Optional[str], List[dict]] = defaultdict(list)
+        for span in self.spans.values():
+            parent_id = span.get("parent_id") if span.get("parent_id") in self.spans else None
+            self.children[parent_id].append(span)
+
+    def ancestor(self, span: dict, kind: str) -> Optional[dict]:
+        while span is not None:
+            span = self.spans.get(span.get("parent_id"))
+            if span is not None and span["kind"] == kind:
+                return span
+        return None
+
+    def self_ms(self, span: dict) -> float:
+        # Children may overlap (concurrent tool calls), so never go below zero
+        children = sum(child["duration_ms"] for child in self.children[span["span_id"]])
+        return max(0.0, span["duration_ms"] - children)
+
+    def stacks(self) -> Dict[tuple, dict]:
+        """Merged span stacks with call count, total and self time in ms."""
+        merged: Dict[tuple, dict] = defaultdict(lambda: {"count": 0, "total_ms": 0.0, "self_ms": 0.0})
+
+        def walk(span: dict, prefix: tuple):
+            stack = prefix + (frame(span),)
+            node = merged[stack]
+            node["count"] += 1
+            node["total_ms"] += span["duration_ms"]
+            node["self_ms"] += self.self_ms(span)
+            for child in self.children[span["span_id"]]:
+                walk(child, stack)
+
+        for root in self.children[None]:
+            walk(root, ())
+        return merged
+
+    def tools(self) -> List[dict]:
+        by_tool: Dict[str, List[dict]] = defaultdict(list)
+        for span in self.spans.values():
+            if span["kind"] == "tool":
+                by_tool[span["name"]].append(span)
+        rows = []
+        for name, spans in by_tool.items():
+            durations = [span["duration_ms"] for span in spans]
+            rows.append({
+                "tool": name,
+                "calls": len(spans),
+                "errors": sum(span["outcome"] != "ok" for span in spans),
+                "p50_ms": percentile(durations, 0.5),
+                "p95_ms": percentile(durations, 0.95),
+                "max_ms": max(durations),
+                "total_ms": sum(durations),
+                "avg_bytes_out": sum(span["bytes_out"] for span in spans) // len(spans),
+            })
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def llm_calls(self) -> List[dict]:
+        by_agent: Dict[tuple, List[dict]] = defaultdict(list)
+        for span in self.spans.values():
+            if span["kind"] == "llm":
+                agent = self.ancestor(span, "agent")
+                by_agent[(agent["name"] if agent else "-", span["name"])].append(span)
+        rows = []
+        for (agent, model), spans in by_agent.items():
+            durations = [span["duration_ms"] for span in spans]
+            rows.append({
+                "agent": agent,
+                "model": model,
+                "calls": len(spans),
+                "errors": sum(span["outcome"] != "ok" for span in spans),
+                "p50_ms": percentile(durations, 0.5),
+                "p95_ms": percentile(durations, 0.95),
+                "total_ms": sum(durations),
+                "tokens_in": sum(span["tokens_in"] for span in spans),
+                "tokens_out": sum(span["tokens_out"] for span in spans),
+            })
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def slowest_cases(self, top: int) -> List[dict]:
+        rows = []
+        for span in self.spans.values():
+            if span["kind"] != "case":
+                continue
+            stages = [child for child in self.children[span["span_id"]] if child["kind"] in ("stage", "startup")]
+            slowest = max(stages, key=lambda child: child["duration_ms"], default=None)
+            rows.append({
+                "test_id": span.get("test_id") or span["name"],
+                "attempt": span.get("attrs", {}).get("attempt"),
+                "outcome": span["outcome"],
+                "duration_ms": span["duration_ms"],
+                "tokens_in": span["tokens_in"],
+                "tokens_out": span["tokens_out"],
+                "slowest_step": f"{slowest['name']} ({slowest['duration_ms'] / 1000:.1f}s)" if slowest else "",
+                "error": span.get("error"),
+            })
+        return sorted(rows, key=lambda row: row["duration_ms"], reverse=True)[:top]
+
+    def summary(self, top: int) -> dict:
+        return {
+            "spans": len(self.spans),
+            "stacks": [
+                {"stack": list(stack), **node} for stack, node in sorted(self.stacks().items())
+            ],
+            "tools": self.tools(),
+            "llm": self.llm_calls(),
+            "slowest_cases": self.slowest_cases(top),
+        }
+
+
+def format_table(headers: List[str], rows: List[List[str]]) -> str:
+    widths = [max(len(row[i]) for row in [headers] + rows) for i in range(len(headers))]
+    lines = [" | ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in [headers] + rows]
+    lines.insert(1, "-+-".join("-" * width for width in widths))
+    return "\n".join(lines)
+
+
+def seconds(ms: float) -> str:
+    return f"{ms / 1000:.2f}"
+
+
+def format_flame(stacks: Dict[tuple, dict], depth: int) -> str:
+    if not stacks:
+        return "(no spans)"
+    total = sum(node["total_ms"] for stack, node in stacks.items() if len(stack) == 1) or 1.0
+    lines = []
+
+    def walk(prefix: tuple):
+        children = [stack for stack in stacks if len(stack) == len(prefix) + 1 and stack[:-1] == prefix]
+        for stack in sorted(children, key=lambda s: stacks[s]["total_ms"], reverse=True):
+            node = stacks[stack]
+            share = node["total_ms"] / total
+            bar = "█" * max(1, round(share * BAR_WIDTH))
+            lines.append(
+                f"{bar.ljust(BAR_WIDTH)} {share:6.1%} {seconds(node['total_ms']):>9}s "
+                f"self {seconds(node['self_ms']):>8}s  x{node['count']:<5} {'  ' * len(prefix)}{stack[-1]}"
+            )
+            if len(stack) < depth:
+                walk(stack)
+
+    walk(())
+    return "\n".join(lines)
+
+
+def format_folded(stacks: Dict[tuple, dict]) -> str:
+    return "\n".join(
+        f"{';'.join(stack)} {round(node['self_ms'])}" for stack, node in sorted(stacks.items()) if node["self_ms"] >= 1
+    )
+
+
+def format_report(report: TraceReport, top: int, depth: int) -> str:
+    sections = [
+        f"Time breakdown ({len(report.spans)} spans)",
+        format_flame(report.stacks(), depth),
+        "\nMCP tools",
+        format_table(
+            ["Tool", "Calls", "Errors", "p50 (s)", "p95 (s)", "Max (s)", "Total (s)", "Avg bytes out"],
+            [
+                [row["tool"], str(row["calls"]), str(row["errors"]), seconds(row["p50_ms"]),
+                 seconds(row["p95_ms"]), seconds(row["max_ms"]), seconds(row["total_ms"]), str(row["avg_bytes_out"])]
+                for row in report.tools()
+            ],
+        ),
+        "\nLLM calls",
+        format_table(
+            ["Agent", "Model", "Calls", "Errors", "p50 (s)", "p95 (s)", "Total (s)", "Tokens in", "Tokens out"],
+            [
+                [row["agent"], row["model"], str(row["calls"]), str(row["errors"]), seconds(row["p50_ms"]),
+                 seconds(row["p95_ms"]), seconds(row["total_ms"]), str(row["tokens_in"]), str(row["tokens_out"])]
+                for row in report.llm_calls()
+            ],
+        ),
+        f"\nSlowest test cases (top {top})",
+        format_table(
+            ["Test ID", "Attempt", "Outcome", "Duration (s)", "Tokens in", "Tokens out", "Slowest step", "Error"],
+            [
+                [row["test_id"], str(row["attempt"] or ""), row["outcome"], seconds(row["duration_ms"]),
+                 str(row["tokens_in"]), str(row["tokens_out"]), row["slowest_step"], (row["error"] or "")[:80]]
+                for row in report.slowest_cases(top)
+            ],
+        ),
+    ]
+    return "\n".join(sections)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise TestPilot timing spans from fastagent.jsonl.")
+    parser.add_argument("paths", nargs="*", help="Log files, '-' for stdin (default: the project's fastagent.jsonl).")
+    parser.add_argument("--test-id", help="Only spans of this test case, e.g. bing_search/REG_001.")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest test cases to list.")
+    parser.add_argument("--depth", type=int, default=5, help="Stack depth of the time breakdown.")
+    parser.add_argument("--folded", action="store_true", help="Print folded stacks for flamegraph.pl/speedscope.")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON.")
+    args = parser.parse_args(argv)
+
+    report = TraceReport(read_spans(args.paths or [trace_path()]), test_id=args.test_id)
+    if args.folded:
+        print(format_folded(report.stacks()))
+    elif args.json:
+        print(json.dumps(report.summary(args.top), indent=2))
+    else:
+        print(format_report(report, args.top, args.depth))
+    return 0 if report.spans else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
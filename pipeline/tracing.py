@@ -0,0 +1,257 @@
+"""
+Timing spans for agent runs, appended to fastagent.jsonl.
+
+`instrument()` hooks fast-agent's entry points (pipeline/agent_hooks.py) so
+that every agent invocation, every LLM request and every MCP tool call becomes
+one span record. Pipeline code adds its own spans (test case, stage, MCP
+start-up) with `span()`. Spans nest through a context variable, so each record
+knows its parent and the test case it belongs to, also across asyncio tasks.
+
+Records use the line layout of fast-agent's file logger, with the namespace
+`testpilot.span`:
+
+    {"level": "INFO", "timestamp": "...", "namespace": "testpilot.span",
+     "message": "tool playwright-browser_click",
+     "data": {"span_id": "...", "parent_id": "...", "trace_id": "...", "kind": "tool",
+              "name": "playwright-browser_click", "test_id": "bing_search/REG_001",
+              "start": 1718000000.1, "end": 1718000001.3, "duration_ms": 1200.4,
+              "tokens_in": 0, "tokens_out": 0, "bytes_in": 84, "bytes_out": 2310,
+              "outcome": "ok", "error": null, "attrs": {"agent": "Planner"}}}
+
+Tokens of LLM spans are added to all their ancestors, so agent, stage and
+case spans carry the totals of their subtree. Listeners registered with
+`add_listener()` are told when spans start and end, also with spans switched
+off (pipeline/events.py turns them into progress events). Summarise a log with
+`python -m pipeline.trace_report`.
+
+Environment:
+    TESTPILOT_TRACE_PATH  log file to append to (default: the project's fastagent.jsonl)
+    TESTPILOT_TRACE       set to 0 to switch spans off
+"""
+import asyncio
+import contextlib
+import contextvars
+import datetime
+import functools
+import json
+import os
+import sys
+import time
+import uuid
+from typing import Any, Callable, List, Optional
+
+from logs_loader import ensure_logs_file
+from pipeline import agent_hooks, completion_cache
+
+SPAN_NAMESPACE = "testpilot.span"
+MAX_ERROR_CHARS = 300
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("testpilot_span", default=None)
+_process_trace_id = uuid.uuid4().hex
+_listeners: List[Callable[[str, "Span"], None]] = []
+
+
+def enabled() -> bool:
+    return os.getenv("TESTPILOT_TRACE", "1").lower() not in ("0", "false", "off", "no")
+
+
+@functools.lru_cache(maxsize=1)
+def trace_path() -> str:
+    return os.getenv("TESTPILOT_TRACE_PATH") or str(ensure_logs_file())
+
+
+def _jsonable(value: Any) -> Any:
+    dump = getattr(value, "model_dump", None)
+    if dump is not None:
+        return dump(mode="json", exclude_none=True)
+    return str(value)
+
+
+def payload_bytes(payload: Any) -> int:
+    """Size of a request or response as it would be sent as JSON."""
+    if payload is None:
+        return 0
+    if isinstance(payload, (str, bytes)):
+        return len(payload.encode() if isinstance(payload, str) else payload)
+    try:
+        return len(json.dumps(payload, default=_jsonable).encode())
+    except (TypeError, ValueError):
+        return len(str(payload).encode())
+
+
+def usage_tokens(usage: Any) -> tuple:
+    """(input, output) tokens from an OpenAI, Anthropic or Google usage object."""
+    if usage is None:
+        return 0, 0
+    for input_name, output_name in (
+        ("prompt_tokens", "completion_tokens"),
+        ("input_tokens", "output_tokens"),
+        ("prompt_token_count", "candidates_token_count"),
+    ):
+        if hasattr(usage, input_name):
+            return getattr(usage, input_name) or 0, getattr(usage, output_name, 0) or 0
+    return 0, 0
+
+
+def write_record(record: dict) -> None:
+    """Append one JSON line; a single O_APPEND write keeps lines whole across worker processes."""
+    line = (json.dumps(record, separators=(",", ":"), default=str) + "\n").encode()
+    try:
+        fd = os.open(trace_path(), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+    except OSError as exc:
+        print(f"Error writing span to {trace_path()}: {exc}", file=sys.stderr)
+
+
+class Span:
+    def __init__(self, kind: str, name: str, parent: Optional["Span"], test_id: Optional[str], attrs: dict):
+        self.kind = kind
+        self.name = name
+        self.parent = parent
+        self.span_id = uuid.uuid4().hex[:16]
+        self.trace_id = parent.trace_id if parent else _process_trace_id
+        self.test_id = test_id or (parent.test_id if parent else os.getenv("TESTPILOT_TEST_ID"))
+        self.attrs = attrs
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.outcome = "ok"
+        self.error: Optional[str] = None
+        self.start = time.time()
+        self._started = time.perf_counter()
+
+    def fail(self, error: Any, outcome: str = "error") -> None:
+        self.outcome = outcome
+        if isinstance(error, BaseException):
+            error = f"{type(error).__name__}: {error}"
+        self.error = str(error)[:MAX_ERROR_CHARS]
+
+    def add_tokens(self, tokens_in: int, tokens_out: int) -> None:
+        span = self
+        while span is not None:
+            span.tokens_in += tokens_in
+            span.tokens_out += tokens_out
+            span = span.parent
+
+    def record(self) -> dict:
+        duration = time.perf_counter() - self._started
+        return {
+            "level": "ERROR" if self.outcome == "error" else "INFO",
+            "timestamp": datetime.datetime.now().isoformat(),
+            "namespace": SPAN_NAMESPACE,
+            "message": f"{self.kind} {self.name}",
+            "data": {
+                "span_id": self.span_id,
+                "parent_id": self.parent.span_id if self.parent else None,
+                "trace_id": self.trace_id,
+                "kind": self.kind,
+                "name": self.name,
+                "test_id": self.test_id,
+                "start": round(self.start, 6),
+                "end": round(self.start + duration, 6),
+                "duration_ms": round(duration * 1000, 3),
+                "tokens_in": self.tokens_in,
+                "tokens_out": self.tokens_out,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "outcome": self.outcome,
+                "error": self.error,
+                "attrs": self.attrs,
+            },
+        }
+
+
+def add_listener(listener: Callable[[str, "Span"], None]) -> None:
+    """Call `listener("start" | "end", span)` for every span of this process."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def _notify(phase: str, current: "Span") -> None:
+    for listener in _listeners:
+        try:
+            listener(phase, current)
+        except Exception as exc:  # a listener must not break the traced code
+            print(f"Error in span listener: {exc}", file=sys.stderr)
+
+
+@contextlib.contextmanager
+def span(kind: str, name: str, test_id: Optional[str] = None, **attrs):
+    """
+    Time the enclosed block as a child of the current span.
+
+    Args:
+        kind (str): `case`, `stage`, `startup`, `agent`, `llm`, `tool`, ...
+        name (str): Agent, model, tool or stage name.
+        test_id (Optional[str]): Test case the span belongs to; inherited when omitted.
+        **attrs: Extra attributes stored with the record.
+
+    Yields:
+        Span: Set `bytes_in`/`bytes_out` or call `fail()` on it while the block runs.
+    """
+    current = Span(kind, name, _current_span.get(), test_id, attrs)
+    token = _current_span.set(current)
+    _notify("start", current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.fail(exc, "cancelled" if isinstance(exc, (asyncio.CancelledError, KeyboardInterrupt)) else "error")
+        raise
+    finally:
+        _current_span.reset(token)
+        if enabled():
+            write_record(current.record())
+        _notify("end", current)
+
+
+def _agent_model(agent) -> Optional[str]:
+    params = getattr(getattr(agent, "_llm", None), "default_request_params", None)
+    return getattr(params, "model", None)
+
+
+def _record_response(current: Span, response: Any, usage: Any) -> None:
+    current.bytes_out = payload_bytes(response)
+    # Completions replayed by pipeline/completion_cache.py cost no tokens
+    if completion_cache.replayed():
+        current.attrs["cached"] = True
+    else:
+        current.add_tokens(*usage_tokens(usage))
+
+
+async def _trace_agent(call: agent_hooks.AgentCall, proceed) -> None:
+    with span("agent", call.name, model=call.model) as current:
+        current.bytes_in = sum(payload_bytes(message.all_text()) for message in call.messages)
+        await proceed()
+        current.bytes_out = payload_bytes(call.response.all_text())
+
+
+async def _trace_llm(call: agent_hooks.LLMRequest, proceed) -> None:
+    with span("llm", str(call.model or "unknown")) as current:
+        current.bytes_in = payload_bytes(call.messages) + payload_bytes(call.tools)
+        await proceed()
+        if call.error is not None:
+            current.fail(call.error)
+        elif call.response is not None:
+            _record_response(current, call.response, call.usage)
+
+
+async def _trace_tool(call: agent_hooks.ToolRequest, proceed) -> None:
+    with span("tool", call.name, agent=call.agent) as current:
+        current.bytes_in = payload_bytes(call.arguments)
+        await proceed()
+        current.bytes_out = payload_bytes(call.result.content)
+        if call.result.isError:
+            current.fail(" ".join(getattr(part, "text", "") for part in call.result.content))
+
+
+def instrument() -> None:
+    """Record a span for every agent invocation, LLM request and MCP tool call. Calling it again is a no-op."""
+    if not enabled():
+        return
+    agent_hooks.register("tracing", "agent", agent_hooks.TRACING, around=_trace_agent)
+    agent_hooks.register("tracing", "llm", agent_hooks.TRACING, around=_trace_llm)
+    agent_hooks.register("tracing", "tool", agent_hooks.TRACING, around=_trace_tool)
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from pipeline import agent_hooks
+
+
+@pytest.fixture(autouse=True)
+def hooks(monkeypatch):
+    monkeypatch.setattr(agent_hooks, "_hooks", {point: [] for point in agent_hooks.POINTS})
+
+
+def complete(**kwargs):
+    return {"model": kwargs["model"]}
+
+
+def execute(task, **kwargs):
+    from mcp_agent.executor.executor import AsyncioExecutor
+
+    return asyncio.run(AsyncioExecutor().execute(task, **kwargs))
+
+
+def test_hooks_run_by_order_not_registration():
+    calls = []
+
+    async def around(call, proceed):
+        calls.append("around in")
+        await proceed()
+        calls.append("around out")
+
+    agent_hooks.register("inner", "llm", 50, around=around)
+    agent_hooks.register(
+        "outer", "llm", 10, before=lambda call: calls.append("before"), after=lambda call: calls.append("after")
+    )
+
+    execute(complete, model="m", messages=[])
+    assert calls == ["before", "around in", "around out", "after"]
+
+
+def test_before_hooks_change_the_request():
+    agent_hooks.register("routing", "llm", agent_hooks.ROUTING, before=lambda call: setattr(call, "model", "small"))
+
+    assert execute(complete, model="large", messages=[]) == [{"model": "small"}]
+
+
+def test_registering_a_name_again_replaces_its_hooks():
+    seen = []
+    agent_hooks.register("feature", "llm", 10, before=lambda call: seen.append(1))
+    agent_hooks.register("feature", "llm", 10, before=lambda call: seen.append(2))
+
+    execute(complete, model="m", messages=[])
+    assert seen == [2]
+
+
+def test_provider_errors_are_returned_and_seen_by_hooks():
+    errors = []
+
+    def fail(**kwargs):
+        raise RuntimeError("429 Too Many Requests")
+
+    agent_hooks.register("metering", "llm", agent_hooks.METERING, after=lambda call: errors.append(call.error))
+
+    results = execute(fail, model="m", messages=[])
+    assert isinstance(results[0], RuntimeError)
+    assert errors == [results[0]]
+
+
+def test_around_hooks_can_answer_without_sending():
+    sent = []
+
+    async def cached(call, proceed):
+        call.response = {"model": "cached"}
+
+    def send(**kwargs):
+        sent.append(kwargs)
+        return {}
+
+    agent_hooks.register("cache", "llm", agent_hooks.CACHE, around=cached)
+
+    assert execute(send, model="m", messages=[]) == [{"model": "cached"}]
+    assert sent == []
+
+
+def test_other_executor_tasks_are_not_hooked():
+    agent_hooks.register("feature", "llm", 10, before=lambda call: pytest.fail("hooked"))
+
+    assert execute(lambda: "done") == ["done"]
@@ -0,0 +1,70 @@
+import asyncio
+import os
+import time
+
+from pipeline.checkpoints import CheckpointCache, cached_stage
+
+
+def test_key_depends_on_stage_and_inputs_not_order():
+    key = CheckpointCache.key("Planner", {"case": "TC_1", "model": "m"})
+    assert key == CheckpointCache.key("Planner", {"model": "m", "case": "TC_1"})
+    assert key != CheckpointCache.key("Planner", {"case": "TC_2", "model": "m"})
+    assert key != CheckpointCache.key("PlaywrightWriterAgent", {"case": "TC_1", "model": "m"})
+
+
+def test_put_and_get(tmp_path):
+    cache = CheckpointCache(str(tmp_path))
+    assert cache.get("missing") is None
+    cache.put("a", {"plan": [1, 2]})
+    assert cache.get("a") == {"plan": [1, 2]}
+    assert not [name for name in os.listdir(str(tmp_path)) if name.endswith(".tmp")]
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = CheckpointCache(str(tmp_path))
+    with open(os.path.join(str(tmp_path), "bad.json"), "w") as f:
+        f.write("{not json")
+    assert cache.get("bad") is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = CheckpointCache(str(tmp_path), max_bytes=10 ** 9)
+    for number, key in enumerate(("old", "used", "new")):
+        cache.put(key, {"data": "x" * 100})
+        stamp = time.time() - 100 + number
+        os.utime(os.path.join(str(tmp_path), f"{key}.json"), (stamp, stamp))
+    cache.get("used")
+
+    cache.max_bytes = 250
+    cache.evict()
+    assert cache.get("old") is None
+    assert cache.get("used") is not None
+    assert cache.get("new") is not None
+
+
+def test_cached_stage_runs_once(tmp_path):
+    cache = CheckpointCache(str(tmp_path))
+    runs = []
+
+    async def run():
+        runs.append(1)
+        return {"spec": "ok"}
+
+    first = asyncio.run(cached_stage(cache, "Writer", {"case": 1}, run))
+    second = asyncio.run(cached_stage(cache, "Writer", {"case": 1}, run))
+    assert first == ({"spec": "ok"}, first[1], False)
+    assert second == ({"spec": "ok"}, first[1], True)
+    assert len(runs) == 1
+
+
+def test_cached_stage_reruns_invalid_or_failed_stages(tmp_path):
+    cache = CheckpointCache(str(tmp_path))
+    outputs = [None, {"spec": "first"}, {"spec": "second"}]
+
+    async def run():
+        return outputs.pop(0)
+
+    assert asyncio.run(cached_stage(cache, "Writer", {}, run))[0] is None
+    assert asyncio.run(cached_stage(cache, "Writer", {}, run))[0] == {"spec": "first"}
+    value, _, hit = asyncio.run(cached_stage(cache, "Writer", {}, run, valid=lambda output: False))
+    assert (value, hit) == ({"spec": "second"}, False)
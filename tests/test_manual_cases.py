@@ -0,0 +1,93 @@
+from pipeline.manual_cases import ManualCaseIndex, parse_cases, split_steps
+
+HEADING_FILE = """# Smoke test cases
+
+### ID: SMK_001
+**Title:** Log in
+**Preconditions:** User is on https://example.com/login
+**Steps:**
+1. Enter the username
+2. Enter the password
+3. Click "Sign in"
+**Expected Result:** The dashboard is shown
+
+---
+
+### ID: SMK_002
+**Title:** Log out
+**Steps:**
+1. Click "Log out"
+**Expected Result:** The login page is shown
+"""
+
+TABLE_FILE = """| ID | Title | Preconditions | Steps | Expected Result |
+|----|-------|---------------|-------|-----------------|
+| SMK_003 | Search | Open https://example.com | 1. Type "shoes"<br>2. Press Enter | Results are listed |
+| SMK_004 | Filter | Open https://example.com/search | 1. Pick a size | Results are filtered |
+"""
+
+
+def section(text: str, case) -> str:
+    return text.encode("utf-8")[case.offset:case.offset + case.length].decode("utf-8")
+
+
+def test_heading_cases():
+    cases = parse_cases(HEADING_FILE)
+
+    assert [case.id for case in cases] == ["SMK_001", "SMK_002"]
+    first = cases[0]
+    assert first.format == "heading"
+    assert first.title == "Log in"
+    assert first.starting_url == "https://example.com/login"
+    assert first.steps == ["Enter the username", "Enter the password", 'Click "Sign in"']
+    assert first.expected_result == "The dashboard is shown"
+    assert section(HEADING_FILE, first).startswith("### ID: SMK_001")
+    assert "SMK_002" not in section(HEADING_FILE, first)
+
+
+def test_table_cases():
+    cases = parse_cases(TABLE_FILE)
+
+    assert [case.id for case in cases] == ["SMK_003", "SMK_004"]
+    search = cases[0]
+    assert search.format == "table"
+    assert search.steps == ['Type "shoes"', "Press Enter"]
+    assert search.starting_url == "https://example.com"
+    assert section(TABLE_FILE, search).strip().startswith("| SMK_003 |")
+    assert "\n" not in section(TABLE_FILE, search).strip()
+
+
+def test_table_after_heading_case_closes_it():
+    text = HEADING_FILE + "\n" + TABLE_FILE
+    cases = parse_cases(text)
+
+    assert [case.id for case in cases] == ["SMK_001", "SMK_002", "SMK_003", "SMK_004"]
+    logout = cases[1]
+    assert logout.expected_result == "The login page is shown"
+    assert "SMK_003" not in section(text, logout)
+    assert "| ID |" not in section(text, logout)
+
+
+def test_heading_after_table():
+    text = TABLE_FILE + "\n" + HEADING_FILE
+    assert [case.id for case in parse_cases(text)] == ["SMK_003", "SMK_004", "SMK_001", "SMK_002"]
+
+
+def test_fenced_headings_are_ignored():
+    text = HEADING_FILE + "```\n### ID: NOT_A_CASE\n```\n"
+    assert [case.id for case in parse_cases(text)] == ["SMK_001", "SMK_002"]
+
+
+def test_split_steps_keeps_observations_with_their_step():
+    steps = split_steps("1. Click Save\n- **Observation**: a toast appears\n2. Reload")
+    assert steps == ["Click Save | **Observation**: a toast appears", "Reload"]
+
+
+def test_index_reads_a_case_by_offset(tmp_path):
+    path = tmp_path / "smoke_test_cases.md"
+    path.write_text(HEADING_FILE + "\n" + TABLE_FILE)
+    index = ManualCaseIndex(cache_dir=str(tmp_path / "cache"))
+
+    assert index.get(str(path), "SMK_004").title == "Filter"
+    assert index.raw_section(str(path), "SMK_002").endswith("The login page is shown")
+    assert index.get(str(path), "SMK_999") is None
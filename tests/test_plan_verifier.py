@@ -0,0 +1,84 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from pipeline import plan_verifier
+from pipeline.plan_verifier import PlanVerifier, dom_query, locator_expression, page_script_unsupported
+
+CSS_PLAN = {
+    "startUrl": "https://example.com",
+    "steps": [
+        {"action": "fill", "selector": "#q", "value": "shoes"},
+        {"action": "click", "selector": "page.locator('button[type=submit]')"},
+        {"action": "navigate", "url": "https://example.com/cart"},
+    ],
+}
+LOCATOR_PLAN = {
+    "startUrl": "https://example.com",
+    "steps": [
+        {"action": "click", "selector": "page.getByRole('link', { name: 'Cart' })"},
+        {"action": "click", "selector": "#checkout", "assertions": [{"type": "text", "selector": "page.getByText('Paid')"}]},
+    ],
+}
+
+
+def test_locator_expression():
+    assert locator_expression("page.getByRole('button', { name: 'Go' })") == "page.getByRole('button', { name: 'Go' })"
+    assert locator_expression("#main .item") == 'page.locator("#main .item")'
+    assert locator_expression("page.getByRole('button'") is None
+
+
+def test_dom_query():
+    assert dom_query("#q") == 'Array.from(document.querySelectorAll("#q"))'
+    assert dom_query("page.locator('input[name=q]')") == 'Array.from(document.querySelectorAll("input[name=q]"))'
+    assert "document.evaluate(\"//a\"" in dom_query("xpath=//a")
+    assert dom_query("textarea") is not None
+    assert dom_query("page.getByLabel('Email')") is None
+    assert dom_query("button:has-text('Go')") is None
+    assert dom_query("text=Go") is None
+
+
+def test_page_script_unsupported():
+    assert page_script_unsupported(CSS_PLAN) == []
+    assert page_script_unsupported(LOCATOR_PLAN) == [
+        "page.getByRole('link', { name: 'Cart' })",
+        "page.getByText('Paid')",
+    ]
+
+
+class Session:
+    """Playwright MCP server without browser_run_code."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def list_tools(self):
+        names = (plan_verifier.EVALUATE_TOOL, plan_verifier.NAVIGATE_TOOL)
+        return SimpleNamespace(tools=[SimpleNamespace(name=name, inputSchema={}) for name in names])
+
+    async def call_tool(self, name, arguments):
+        self.calls.append(name)
+        value = {"url": "https://example.com"}
+        if "querySelectorAll" in arguments.get("function", ""):
+            value.update(count=1, visible=True, done=True)
+        text = f"### Result\n{json.dumps(value)}"
+        return SimpleNamespace(content=[SimpleNamespace(text=text)], isError=False)
+
+
+def test_evaluate_mode_skips_plans_with_playwright_locators():
+    session = Session()
+    report = asyncio.run(PlanVerifier(session).verify(LOCATOR_PLAN, "TC_1_plan.json"))
+
+    assert report.status == "skipped"
+    assert "2 selectors are Playwright locators" in report.reason
+    assert report.checks == []
+    assert session.calls == []
+
+
+def test_evaluate_mode_checks_css_plans():
+    session = Session()
+    report = asyncio.run(PlanVerifier(session).verify(CSS_PLAN, "TC_1_plan.json"))
+
+    assert report.status == "passed"
+    assert [check.status for check in report.checks] == ["ok", "ok", "ok"]
+    assert plan_verifier.EVALUATE_TOOL in session.calls
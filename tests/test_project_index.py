@@ -0,0 +1,121 @@
+import json
+import os
+import threading
+
+from pipeline.project_index import ProjectIndex, mask_source, parse_base_url, parse_classes
+
+LOGIN_PAGE = """import { Page, Locator } from '@playwright/test';
+import { BasePage } from './BasePage';
+
+// class Commented extends Nothing {}
+export class LoginPage extends BasePage {
+  readonly username: Locator;
+  readonly submit: Locator;
+
+  constructor(page: Page) {
+    super(page);
+    this.username = page.getByLabel('Username');
+    this.submit = page.getByRole('button', { name: 'Sign in {now}' });
+  }
+
+  async login(user: string, password: string): Promise<void> {
+    if (user) {
+      await this.username.fill(user);
+    }
+    const helper = () => { return '}'; };
+    await this.submit.click();
+  }
+
+  isOpen() {
+    return this.page.url().includes("/login");
+  }
+}
+"""
+
+
+def test_mask_source_keeps_offsets_and_blanks_literals():
+    text = "const a = 'x{y}'; // }\n/* {\n */ const b = `${1}`;"
+    masked = mask_source(text)
+
+    assert len(masked) == len(text)
+    assert masked.count("\n") == text.count("\n")
+    assert "{" not in masked and "}" not in masked
+    assert masked.startswith("const a = '")
+
+
+def test_mask_source_handles_escaped_quotes():
+    masked = mask_source(r"f('it\'s {') + g('}')")
+    assert "{" not in masked and "}" not in masked
+    assert masked.endswith("')")
+
+
+def test_parse_classes_reads_locators_and_top_level_methods():
+    classes = parse_classes(LOGIN_PAGE, mask_source(LOGIN_PAGE))
+
+    assert len(classes) == 1
+    login = classes[0]
+    assert login["name"] == "LoginPage"
+    assert login["extends"] == "BasePage"
+    assert login["locators"] == {
+        "username": "page.getByLabel('Username')",
+        "submit": "page.getByRole('button', { name: 'Sign in {now}' })",
+    }
+    assert login["methods"] == ["async login(user: string, password: string): Promise<void>", "isOpen()"]
+
+
+def test_parse_base_url_ignores_comments():
+    config = "export default defineConfig({\n  // baseURL: 'http://old',\n  use: { baseURL: 'https://example.com', },\n});"
+    assert parse_base_url(config) == "'https://example.com'"
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_refresh_reparses_only_changed_files(tmp_path):
+    project = tmp_path / "project"
+    write(str(project / "pages" / "LoginPage.ts"), LOGIN_PAGE)
+    write(str(project / "data" / "users.json"), json.dumps({"admin": {"name": "a", "roles": ["x"]}}))
+    index_path = str(tmp_path / "index" / "project.json")
+    os.makedirs(os.path.dirname(index_path))
+
+    index = ProjectIndex(str(project), index_path)
+    assert index.refresh() == 2
+    assert index.refresh() == 0
+    assert "LoginPage" in index.page_objects()
+    assert index.files("data")["data/users.json"]["shape"] == {"admin": {"name": "str", "roles": ["str"]}}
+
+    reloaded = ProjectIndex(str(project), index_path)
+    assert reloaded.refresh() == 0
+    os.remove(str(project / "data" / "users.json"))
+    assert reloaded.refresh() == 1
+    assert os.listdir(os.path.dirname(index_path)) == ["project.json"]
+
+
+def test_concurrent_saves_share_an_index_file(tmp_path):
+    project = tmp_path / "project"
+    write(str(project / "pages" / "LoginPage.ts"), LOGIN_PAGE)
+    index_path = str(tmp_path / "project.json")
+    indexes = [ProjectIndex(str(project), index_path) for _ in range(8)]
+    for index in indexes:
+        index.refresh()
+    errors = []
+
+    def save(index):
+        try:
+            for _ in range(50):
+                index._save()
+        except OSError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=save, args=(index,)) for index in indexes]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert "LoginPage" in ProjectIndex(str(project), index_path).page_objects()
+    assert not [name for name in os.listdir(str(tmp_path)) if name.endswith(".tmp")]
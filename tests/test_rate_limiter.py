@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from pipeline import rate_limiter
+
+
+class ProviderError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class APIConnectionError(Exception):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def limits(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_SHARED", "off")
+    monkeypatch.setenv("RATE_LIMIT_RETRIES", "2")
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    monkeypatch.setattr(rate_limiter, "MAX_BACKOFF_S", 0.01)
+
+
+def test_rate_limit_of():
+    assert rate_limiter.rate_limit_of(ProviderError("slow down", 429)) == (True, None)
+    assert rate_limiter.rate_limit_of(ProviderError("RESOURCE_EXHAUSTED")) == (True, None)
+    assert rate_limiter.rate_limit_of(ProviderError("bad request", 400)) == (False, None)
+    assert rate_limiter.rate_limit_of(None) == (False, None)
+
+
+def test_transient():
+    assert rate_limiter.transient(ProviderError("overloaded", 529))
+    assert rate_limiter.transient(ProviderError("timeout", 408))
+    assert rate_limiter.transient(APIConnectionError("reset"))
+    assert not rate_limiter.transient(ProviderError("bad request", 400))
+    assert not rate_limiter.transient(None)
+
+
+def test_without_sdk_retries():
+    from openai import OpenAI
+
+    client = OpenAI(api_key="test")
+    rate_limiter.without_sdk_retries(client.chat.completions.create)
+    assert client.max_retries == 0
+    rate_limiter.without_sdk_retries(lambda: None)
+
+
+def run(errors):
+    sent = []
+
+    async def send():
+        sent.append(1)
+        error = errors.pop(0) if errors else None
+        if error is not None:
+            raise error
+        return "ok"
+
+    return sent, asyncio.run(rate_limiter.limited("test", "model", send, lambda result: None))
+
+
+def test_limited_retries_rate_limits_and_transient_errors():
+    sent, result = run([ProviderError("429", 429), ProviderError("server", 500)])
+    assert (len(sent), result) == (3, "ok")
+
+
+def test_limited_does_not_retry_other_errors():
+    with pytest.raises(ProviderError):
+        run([ProviderError("bad request", 400)])
+
+
+def test_limited_gives_up_after_the_retries():
+    with pytest.raises(ProviderError):
+        run([ProviderError("server", 500)] * 3)
+
+
+def test_limited_returns_reported_errors():
+    async def send():
+        return "failed"
+
+    errors = [ProviderError("429", 429)] * 3
+    result = asyncio.run(rate_limiter.limited("test", "model", send, lambda result: errors.pop() if errors else None))
+    assert result == "failed"
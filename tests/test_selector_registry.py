@@ -0,0 +1,64 @@
+from pipeline.selector_registry import SelectorRegistry, describe_selector, split_url
+
+
+def test_split_url_normalizes_ids():
+    assert split_url("https://shop.example.com/orders/123/items/550e8400-e29b-41d4-a716-446655440000?x=1") == (
+        "https://shop.example.com",
+        "/orders/:id/items/:id",
+    )
+    assert split_url("https://shop.example.com") == ("https://shop.example.com", "/")
+    assert split_url("https://shop.example.com/v2/checkout/") == ("https://shop.example.com", "/v2/checkout")
+    assert split_url("") == ("", "/")
+
+
+def test_describe_role_selector():
+    info = describe_selector("page.getByRole('button', { name: 'Sign in' })")
+    assert info == {"role": "button", "name": "Sign in", "test_attr": None}
+    assert describe_selector('getByRole("link")') == {"role": "link", "name": None, "test_attr": None}
+
+
+def test_describe_name_and_test_attribute_selectors():
+    assert describe_selector("page.getByLabel('Email')")["name"] == "Email"
+    assert describe_selector("page.getByTestId('submit-order')")["test_attr"] == "submit-order"
+    assert describe_selector("[data-testid='cart']")["test_attr"] == "cart"
+    assert describe_selector('button[data-qa="pay"]')["test_attr"] == "pay"
+    assert describe_selector("#main > .item") == {"role": None, "name": None, "test_attr": None}
+
+
+def test_lookup_prefers_the_same_page(tmp_path):
+    registry = SelectorRegistry(str(tmp_path / "selectors.sqlite3"))
+    try:
+        registry.record("https://example.com/orders/1", "page.getByRole('button', { name: 'Cancel' })", "click")
+        registry.record("https://example.com/", "page.getByRole('link', { name: 'Orders' })", "click")
+        registry.record("https://other.example.com/orders/1", "page.getByText('Elsewhere')")
+
+        rows = registry.lookup("https://example.com/orders/42")
+        assert [row["selector"] for row in rows] == [
+            "page.getByRole('button', { name: 'Cancel' })",
+            "page.getByRole('link', { name: 'Orders' })",
+        ]
+        assert registry.lookup("https://example.com/orders/42", role="link")[0]["hits"] == 1
+        assert registry.lookup("https://example.com/x", name="cancel")[0]["name"] == "Cancel"
+    finally:
+        registry.close()
+
+
+def test_ingest_plan_records_steps_and_assertions(tmp_path):
+    plan = {
+        "startUrl": "https://example.com/login",
+        "setupSteps": [{"action": "fill", "selector": "page.getByLabel('Username')"}],
+        "steps": [
+            {
+                "action": "click",
+                "selector": "page.getByRole('button', { name: 'Sign in' })",
+                "assertions": [{"selector": "page.getByText('Welcome')", "url": "https://example.com/home"}],
+            },
+            {"action": "wait"},
+        ],
+    }
+    registry = SelectorRegistry(str(tmp_path / "selectors.sqlite3"))
+    try:
+        assert registry.ingest_plan(plan) == 3
+        assert [row["selector"] for row in registry.lookup("https://example.com/home")][0] == "page.getByText('Welcome')"
+    finally:
+        registry.close()